@@ -0,0 +1,482 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from race_core.competitions import DEFAULT_EVENT  # noqa: E402
+from race_core.formats import iter_records  # noqa: E402
+from race_core.parsers import seconds_to_hms  # noqa: E402
+from race_core.rollups import ALL, SUMMARY_COLUMNS, frame_rollups, read_rollups  # noqa: E402
+from race_core.runner_stats import RunnerStats  # noqa: E402
+from race_core.vectorized import derive_columns  # noqa: E402
+
+
+# Cambiar al modificar una etapa: invalida todas las salidas memoizadas.
+REPORT_FORMAT_VERSION = "1"
+MANIFEST_NAME = "_stages.json"
+DEFAULT_OUTPUT_DIR = ROOT_DIR / "analysis" / "output"
+# Columnas del DataFrame derivado que leen las etapas; el hash de cada ano se calcula sobre ellas.
+STAGE_COLUMNS = ["year", "runner_name", "time_seconds", "pace_seconds", "gender", "age_group"]
+TOP_RUNNERS = 20
+TOP_RUNNERS_MIN_RACES = 2
+
+
+# --- Etapas: funciones puras (se ejecutan en otros procesos) ---
+
+
+def year_summary(year_df):
+    # Tablas resumen de un ano: las mismas filas que frame_rollups sobre todo el historico.
+    return frame_rollups(year_df)[0]
+
+
+def year_totals(summary):
+    return summary[(summary["gender"] == ALL) & (summary["age_group"] == ALL)].sort_values("year")
+
+
+def average_by(rows, column):
+    weighted = rows.assign(total_seconds=rows["mean_seconds"] * rows["participants"])
+    averages = (
+        weighted.groupby(column)
+        .agg(participants=("participants", "sum"), total_seconds=("total_seconds", "sum"))
+        .reset_index()
+    )
+    averages["avg_seconds"] = averages["total_seconds"] / averages["participants"]
+    averages = averages.drop(columns="total_seconds").sort_values("avg_seconds")
+    averages["avg_time"] = averages["avg_seconds"].apply(seconds_to_hms)
+    return averages.reset_index(drop=True)
+
+
+def avg_by_age(summary):
+    return average_by(
+        summary[(summary["gender"] == ALL) & ~summary["age_group"].isin([ALL, "OTRA", "SIN_CATEGORIA"])],
+        "age_group",
+    )
+
+
+def avg_by_gender(summary):
+    return average_by(summary[(summary["gender"] != ALL) & (summary["age_group"] == ALL)], "gender")
+
+
+def participants_by_year(summary):
+    return year_totals(summary)[["year", "participants"]].reset_index(drop=True)
+
+
+def gender_pivot(summary):
+    # Plano (columna year) para que la tabla se guarde y se lea igual que las demas.
+    gender_by_year = summary[(summary["gender"] != ALL) & (summary["age_group"] == ALL)]
+    pivot = gender_by_year.pivot(index="year", columns="gender", values="participants").fillna(0).sort_index()
+    pivot.columns.name = None
+    return pivot.reset_index()
+
+
+def time_stats_by_year(summary):
+    stats = year_totals(summary)[["year", "mean_seconds", "median_seconds"]].reset_index(drop=True)
+    stats["mean_time"] = stats["mean_seconds"].apply(seconds_to_hms)
+    stats["median_time"] = stats["median_seconds"].apply(seconds_to_hms)
+    return stats
+
+
+def extremes_by_year(summary):
+    extremes = year_totals(summary)[["year", "min_seconds", "max_seconds"]].reset_index(drop=True)
+    extremes["min_time"] = extremes["min_seconds"].apply(seconds_to_hms)
+    extremes["max_time"] = extremes["max_seconds"].apply(seconds_to_hms)
+    return extremes
+
+
+# Tablas que salen solo de las tablas resumen, en el orden en que aparecen en el notebook.
+SUMMARY_TABLES = {
+    "avg_by_age": avg_by_age,
+    "avg_by_gender": avg_by_gender,
+    "participants_by_year": participants_by_year,
+    "gender_pivot": gender_pivot,
+    "time_stats_by_year": time_stats_by_year,
+    "extremes_by_year": extremes_by_year,
+}
+
+
+def runner_perf(df_valid):
+    # Ranking por tiempo medio entre los corredores con al menos TOP_RUNNERS_MIN_RACES carreras.
+    leaders = RunnerStats.from_frame(df_valid).leaderboard("mean", TOP_RUNNERS, min_races=TOP_RUNNERS_MIN_RACES)
+    leaders["avg_time"] = leaders["mean_seconds"].apply(seconds_to_hms)
+    return leaders
+
+
+def trend_word(delta):
+    return "mejora" if delta < 0 else "empeora" if delta > 0 else "estable"
+
+
+def fastest(table, column):
+    if table.empty:
+        return "N/D", "N/D"
+    row = table.sort_values("avg_seconds").iloc[0]
+    return row[column], row["avg_time"]
+
+
+def covid_note(participants):
+    by_year = participants.set_index("year")["participants"]
+    if 2019 in by_year.index and 2021 in by_year.index:
+        drop = int(by_year[2021] - by_year[2019])
+        drop_pct = (drop / by_year[2019]) * 100
+        if drop < 0:
+            return f"Entre 2019 y 2021 se observa un bajon de {abs(drop):,} participantes ({abs(drop_pct):.1f}%)."
+        if drop > 0:
+            return f"Entre 2019 y 2021 se observa un aumento de {drop:,} participantes ({drop_pct:.1f}%)."
+        return "Entre 2019 y 2021 la participacion se mantiene estable."
+    if 2020 not in by_year.index:
+        return "No hay registros de 2020, lo que coincide con el periodo COVID."
+    return ""
+
+
+def gender_note(pivot, year):
+    row = pivot.set_index("year").loc[year] if year in pivot["year"].values else None
+    if row is None or row.sum() <= 0:
+        return ""
+    share_m = row.get("M", 0) / row.sum()
+    share_f = row.get("F", 0) / row.sum()
+    return f"En {year}, la participacion fue {share_m:.1%} hombres y {share_f:.1%} mujeres."
+
+
+def report(tables):
+    """Hallazgos clave en Markdown a partir de las tablas ya calculadas (sin volver a los datos)."""
+    participants = tables["participants_by_year"]
+    time_stats = tables["time_stats_by_year"].sort_values("year")
+    extremes = tables["extremes_by_year"]
+    if participants.empty:
+        return "**Hallazgos clave**\n- No hay resultados validos.\n"
+
+    # Los totales del ano (ALL, ALL) cuentan todos los resultados validos.
+    total_results = int(participants["participants"].sum())
+    year_min = int(participants["year"].min())
+    year_max = int(participants["year"].max())
+    fastest_age_group, fastest_age_time = fastest(tables["avg_by_age"], "age_group")
+    fastest_gender, fastest_gender_time = fastest(tables["avg_by_gender"], "gender")
+
+    max_participation_row = participants.loc[participants["participants"].idxmax()]
+    latest = time_stats.iloc[-1]
+    first = time_stats.iloc[0]
+    mean_delta = float(latest["mean_seconds"]) - float(first["mean_seconds"])
+    median_delta = float(latest["median_seconds"]) - float(first["median_seconds"])
+    mean_median_gap = seconds_to_hms(abs(float(latest["mean_seconds"]) - float(latest["median_seconds"])))
+
+    global_min = extremes["min_seconds"].min()
+    global_max = extremes["max_seconds"].max()
+    top_names = ", ".join(
+        f"{row['runner']} ({row['avg_time']})" for _, row in tables["runner_perf"].head(5).iterrows()
+    )
+
+    return f"""
+**Hallazgos clave**
+- Periodo analizado: {year_min}-{year_max} con {total_results:,} resultados validos.
+- Grupo de edad mas rapido (promedio): {fastest_age_group} con {fastest_age_time}.
+- Genero con mejor promedio: {fastest_gender} con {fastest_gender_time}.
+- Ano con mayor participacion: {int(max_participation_row['year'])} ({int(max_participation_row['participants']):,} corredores).
+- Ultimo ano ({int(latest['year'])}) - media: {latest['mean_time']}, mediana: {latest['median_time']} (gap {mean_median_gap}).
+- Evolucion de marcas: media {trend_word(mean_delta)} entre {int(first['year'])} y {year_max} por {seconds_to_hms(abs(mean_delta))}; mediana {trend_word(median_delta)} por {seconds_to_hms(abs(median_delta))}.
+- Tiempos extremos globales: minimo {seconds_to_hms(global_min)}, maximo {seconds_to_hms(global_max)} (rango {seconds_to_hms(int(global_max - global_min))}).
+- {covid_note(participants)}
+- {gender_note(tables["gender_pivot"], int(latest["year"]))}
+- Top 5 por promedio (>={TOP_RUNNERS_MIN_RACES} carreras): {top_names}.
+"""
+
+
+# --- Claves de contenido y memoizacion ---
+
+
+def frame_hash(df):
+    digest = hashlib.sha256(json.dumps([str(column) for column in df.columns]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def stage_key(name, *inputs):
+    # La clave de una etapa depende solo de las claves de sus entradas: si no cambian, su salida tampoco.
+    payload = json.dumps([REPORT_FORMAT_VERSION, name, *inputs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with path.open("rb") as file_handle:
+        for block in iter(lambda: file_handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StageStore:
+    """Salidas memoizadas en un directorio: una tabla CSV (o un Markdown) por etapa y un manifiesto
+    con la clave de entradas con la que se calculo cada una."""
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        manifest_path = self.output_dir / MANIFEST_NAME
+        self.manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.is_file() else {}
+        self.manifest.setdefault("stages", {})
+
+    def path(self, name):
+        return self.output_dir / f"{name}{'.md' if name == 'report' else '.csv'}"
+
+    def load(self, name, key):
+        entry = self.manifest["stages"].get(name)
+        path = self.path(name)
+        if entry is None or entry["key"] != key or not path.is_file():
+            return None
+        if path.suffix == ".md":
+            return path.read_text(encoding="utf-8")
+        # Solo la celda vacia es nula (un grupo de edad "NA" sigue siendo texto) y los decimales se
+        # leen tal cual se escribieron, para que una tabla memoizada sea identica a la recalculada.
+        return pd.read_csv(path, keep_default_na=False, na_values=[""], float_precision="round_trip")
+
+    def save(self, name, key, value, seconds):
+        path = self.path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        if isinstance(value, str):
+            tmp_path.write_text(value, encoding="utf-8")
+        else:
+            value.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        self.manifest["stages"][name] = {"key": key, "seconds": round(seconds, 3)}
+
+    def write_manifest(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.output_dir / f"{MANIFEST_NAME}.tmp"
+        tmp_path.write_text(json.dumps(self.manifest, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.output_dir / MANIFEST_NAME)
+
+
+class Pipeline:
+    """Lanza las etapas que no estan memoizadas en un pool de procesos; las independientes corren a la
+    vez y cada salida se guarda al recogerla."""
+
+    def __init__(self, store, executor=None):
+        self.store = store
+        self.executor = executor
+        self.pending = {}
+        self.results = {}
+        self.computed = []
+
+    def submit(self, name, key, func, args):
+        # `args` es una funcion: las entradas (p. ej. el DataFrame de un ano) solo se preparan si la
+        # etapa hay que calcularla.
+        cached = self.store.load(name, key)
+        if cached is not None:
+            future = Future()
+            future.set_result((cached, None))
+            self.pending[name] = (key, future)
+            return
+        if self.executor is None:
+            future = Future()
+            future.set_result(timed(func, *args()))
+        else:
+            future = self.executor.submit(timed, func, *args())
+        self.pending[name] = (key, future)
+
+    def result(self, name):
+        if name not in self.results:
+            key, future = self.pending.pop(name)
+            value, seconds = future.result()
+            if seconds is not None:
+                self.store.save(name, key, value, seconds)
+                self.computed.append((name, seconds))
+            self.results[name] = value
+        return self.results[name]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - started
+
+
+# --- Entradas ---
+
+
+class ResultsSource:
+    """Resultados validos de un evento, leidos del JSON solo si alguna etapa los necesita.
+
+    Las claves de cada ano (hash de sus filas) se guardan en el manifiesto junto al hash del fichero:
+    si el fichero no ha cambiado, no hace falta ni parsearlo.
+    """
+
+    def __init__(self, source_path, event, store):
+        self.source_path = Path(source_path)
+        self.event = event
+        self.store = store
+        self._valid = None
+        self._year_keys = None
+
+    @property
+    def valid(self):
+        if self._valid is None:
+            self._valid = load_results(self.source_path, self.event)
+        return self._valid
+
+    @property
+    def year_keys(self):
+        if self._year_keys is None:
+            source_hash = file_sha256(self.source_path)
+            cached = self.store.manifest.get("source", {})
+            if cached.get("sha256") == source_hash and cached.get("event") == self.event:
+                self._year_keys = {int(year): key for year, key in cached["years"].items()}
+            else:
+                self._year_keys = {
+                    int(year): frame_hash(year_df.reset_index(drop=True))
+                    for year, year_df in self.valid.groupby("year")
+                }
+                self.store.manifest["source"] = {
+                    "sha256": source_hash,
+                    "event": self.event,
+                    "years": {str(year): key for year, key in self._year_keys.items()},
+                }
+        return self._year_keys
+
+    def year_frame(self, year):
+        return self.valid[self.valid["year"] == year]
+
+
+def load_results(source_path, event=DEFAULT_EVENT):
+    df = pd.DataFrame(list(iter_records(source_path)))
+
+    if "categoria" not in df.columns and "categoría" in df.columns:
+        df["categoria"] = df["categoría"]
+
+    for col in ["tiempo", "sexo", "carrera", "categoria", "distancia", "nombre", "apellido", "evento"]:
+        if col not in df.columns:
+            df[col] = None
+
+    # Los ficheros anteriores al registro de competiciones no traen evento.
+    df = df[df["evento"].fillna(DEFAULT_EVENT).replace("", DEFAULT_EVENT) == event]
+    df = derive_columns(df.reset_index(drop=True))
+
+    df_valid = df.dropna(subset=["year", "time_seconds"])[STAGE_COLUMNS].copy()
+    df_valid["year"] = df_valid["year"].astype(int)
+    for column in ["gender", "age_group"]:
+        df_valid[column] = df_valid[column].astype(object)
+    return df_valid.reset_index(drop=True)
+
+
+def database_summary(event):
+    from race_core.db import get_connection
+
+    connection = get_connection()
+    try:
+        summary_rows, _ = read_rollups(connection, event=event)
+    finally:
+        connection.close()
+    return pd.DataFrame(summary_rows, columns=SUMMARY_COLUMNS)
+
+
+# --- Orquestacion ---
+
+
+def run_report(source_path, output_dir=DEFAULT_OUTPUT_DIR, event=DEFAULT_EVENT, workers=1, use_mariadb=None):
+    """Calcula (o reutiliza) todas las tablas del informe y devuelve {nombre: tabla} mas "summary",
+    "report" y "computed" (etapas recalculadas y su duracion).
+
+    Con un ano nuevo solo se calculan las tablas resumen de ese ano y las etapas que dependen del
+    historico completo (tablas por ano, ranking e informe).
+    """
+    if use_mariadb is None:
+        use_mariadb = os.getenv("RACE_DATA_SOURCE", "").lower() == "mariadb"
+    store = StageStore(Path(output_dir) / f"event={event}")
+    source = ResultsSource(source_path, event, store)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        pipeline = Pipeline(store, executor)
+        year_keys = source.year_keys
+
+        # El ranking recorre todos los anos: se lanza primero, en paralelo con las tablas por ano.
+        runner_key = stage_key("runner_perf", TOP_RUNNERS, TOP_RUNNERS_MIN_RACES, sorted(year_keys.items()))
+        pipeline.submit("runner_perf", runner_key, runner_perf, lambda: (source.valid,))
+
+        if use_mariadb:
+            # Tablas resumen ya calculadas en MariaDB: su contenido es la clave de lo que depende de ellas.
+            summary = database_summary(event)
+            summary_key = stage_key("summary", frame_hash(summary))
+        else:
+            year_stage_keys = {}
+            for year, year_key in sorted(year_keys.items()):
+                name = f"years/summary_{year}"
+                year_stage_keys[year] = stage_key(name, year_key)
+                pipeline.submit(
+                    name, year_stage_keys[year], year_summary,
+                    lambda year=year: (source.year_frame(year),),
+                )
+            frames = [pipeline.result(f"years/summary_{year}") for year in sorted(year_keys)]
+            summary = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=SUMMARY_COLUMNS)
+            summary_key = stage_key("summary", sorted(year_stage_keys.items()))
+
+        table_keys = {name: stage_key(name, summary_key) for name in SUMMARY_TABLES}
+        for name, stage in SUMMARY_TABLES.items():
+            pipeline.submit(name, table_keys[name], stage, lambda: (summary,))
+        tables = {name: pipeline.result(name) for name in SUMMARY_TABLES}
+        tables["runner_perf"] = pipeline.result("runner_perf")
+        table_keys["runner_perf"] = runner_key
+
+        pipeline.submit("report", stage_key("report", table_keys), report, lambda: (tables,))
+        tables["report"] = pipeline.result("report")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        store.write_manifest()
+
+    tables["summary"] = summary
+    tables["computed"] = pipeline.computed
+    return tables
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Genera las tablas del analisis y el informe en analysis/output/, recalculando solo lo que cambia."
+    )
+    parser.add_argument(
+        "--input",
+        default="data/salidas.json",
+        help="Ruta a los resultados (JSON, NDJSON o msgpack, con o sin gzip/zstd).",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(DEFAULT_OUTPUT_DIR),
+        help="Directorio de salida (un subdirectorio event=<evento> con tablas, informe y manifiesto).",
+    )
+    parser.add_argument("--event", default=DEFAULT_EVENT, help="Evento del registro de competiciones.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Procesos para las etapas independientes (1: todo en este proceso).",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    source_path = Path(args.input)
+    if not source_path.exists():
+        raise FileNotFoundError(f"No existe el archivo: {source_path}")
+
+    started = time.perf_counter()
+    tables = run_report(source_path, Path(args.output), args.event, args.workers)
+    elapsed = time.perf_counter() - started
+
+    for name, seconds in tables["computed"]:
+        print(f"{name}: {seconds:.2f} s")
+    print(tables["report"])
+    print(
+        f"Informe en {Path(args.output) / f'event={args.event}'}: {len(tables['computed'])} etapas "
+        f"recalculadas en {elapsed:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from race_core.db import get_connection  # noqa: E402
+
+
+# Indices de database/sql/migrations/003_results_indexes.sql. "Antes" repite cada consulta
+# ignorandolos, que es el plan que tenia la base sin la migracion.
+NEW_INDEXES = ["idx_results_runner_race", "idx_results_race_time", "idx_results_race_group_time"]
+EXPLAIN_COLUMNS = ["table", "type", "key", "rows", "Extra"]
+
+# SQL_NO_CACHE: se mide el plan, no el resultado guardado en la cache de consultas.
+QUERIES = {
+    "historial de corredor": """
+        SELECT SQL_NO_CACHE ra.year, r.time_seconds, r.position
+        FROM results r {hint}
+        JOIN races ra ON ra.id = r.race_id
+        WHERE r.runner_id = %(runner_id)s
+        ORDER BY ra.year
+    """,
+    "tiempos de una carrera": """
+        SELECT SQL_NO_CACHE r.time_seconds
+        FROM results r {hint}
+        WHERE r.race_id = %(race_id)s AND r.time_seconds IS NOT NULL
+        ORDER BY r.time_seconds
+    """,
+    "tiempos por genero y edad": """
+        SELECT SQL_NO_CACHE r.time_seconds
+        FROM results r {hint}
+        WHERE r.race_id = %(race_id)s AND r.gender = %(gender)s AND r.age_group = %(age_group)s
+        ORDER BY r.time_seconds
+    """,
+    "participantes por grupo": """
+        SELECT SQL_NO_CACHE r.gender, r.age_group, COUNT(*), MIN(r.time_seconds), MAX(r.time_seconds)
+        FROM results r {hint}
+        WHERE r.race_id = %(race_id)s
+        GROUP BY r.gender, r.age_group
+    """,
+}
+
+
+def sample_params(cursor):
+    # La carrera con mas resultados, su grupo mas numeroso y el corredor con mas carreras.
+    cursor.execute(
+        """
+        SELECT race_id, gender, age_group
+        FROM results
+        WHERE gender IS NOT NULL
+        GROUP BY race_id, gender, age_group
+        ORDER BY COUNT(*) DESC
+        LIMIT 1
+        """
+    )
+    race_id, gender, age_group = cursor.fetchone()
+    cursor.execute("SELECT runner_id FROM results GROUP BY runner_id ORDER BY COUNT(*) DESC LIMIT 1")
+    (runner_id,) = cursor.fetchone()
+    return {"race_id": race_id, "gender": gender, "age_group": age_group, "runner_id": runner_id}
+
+
+def explain(cursor, sql, params):
+    cursor.execute(f"EXPLAIN {sql}", params)
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def time_query(cursor, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def print_plan(plan):
+    for row in plan:
+        print("    " + "  ".join(f"{column}={row.get(column)}" for column in EXPLAIN_COLUMNS))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Planes (EXPLAIN) y tiempos de las consultas del dashboard con y sin los indices nuevos."
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="Ejecuciones por consulta (se usa la mediana).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    connection = get_connection()
+    try:
+        with connection.cursor() as cursor:
+            params = sample_params(cursor)
+            print(f"Parametros: {params}")
+
+            for name, template in QUERIES.items():
+                before_sql = template.format(hint=f"IGNORE INDEX ({', '.join(NEW_INDEXES)})")
+                after_sql = template.format(hint="")
+                before_ms = time_query(cursor, before_sql, params, args.repeat)
+                after_ms = time_query(cursor, after_sql, params, args.repeat)
+
+                print(f"\n{name}")
+                print("  antes:")
+                print_plan(explain(cursor, before_sql, params))
+                print("  despues:")
+                print_plan(explain(cursor, after_sql, params))
+                print(f"  mediana: {before_ms:8.2f} ms -> {after_ms:8.2f} ms")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "dashboard"))
+
+from data_store import RaceDataset, build_frame, partition_path, write_cache  # noqa: E402
+from race_core.competitions import DEFAULT_EVENT  # noqa: E402
+from race_core.formats import iter_records  # noqa: E402
+from race_core.runner_index import RunnerIndex  # noqa: E402
+
+
+def replicate_years(df, copies):
+    # Copias del historico desplazadas 100 anos para simular muchas mas ediciones.
+    frames = [df]
+    for copy in range(1, copies):
+        shifted = df.copy()
+        shifted["year"] = (shifted["year"] + 100 * copy).astype(df["year"].dtype)
+        frames.append(shifted)
+    return pd.concat(frames, ignore_index=True)
+
+
+def frame_megabytes(*frames):
+    return sum(frame.memory_usage(deep=True).sum() for frame in frames) / (1 << 20)
+
+
+def index_megabytes(runner_index):
+    # Lo que se queda en memoria del indice: posiciones de las filas y claves de cada corredor.
+    keys = sum(sys.getsizeof(key) for key in runner_index.keys)
+    return (runner_index.rows_by_key.nbytes + runner_index.starts.nbytes + keys) / (1 << 20)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Arranque del dashboard con la cache por ano frente a leer todos los anos."
+    )
+    parser.add_argument("--input", default="data/salidas.json", help="Resultados exportados (cualquier formato).")
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 4, 16], help="Multiplicadores del historico.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    base = build_frame(list(iter_records(Path(args.input))))
+    print(f"{'anos':>6} {'filas':>10} {'arranque':>10} {'MiB':>8} {'1 ano':>9} {'todo':>10} {'MiB':>8}")
+
+    for copies in args.copies:
+        df = replicate_years(base, copies)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = Path(tmp_dir) / "salidas.parquet"
+            write_cache(df, cache_path, {"version": "bench"})
+
+            started = time.perf_counter()
+            dataset = RaceDataset(cache_path)
+            runner_index = RunnerIndex.from_names(dataset.runner_names(DEFAULT_EVENT))
+            eager = list(dataset.rollups(DEFAULT_EVENT))
+            startup = time.perf_counter() - started
+
+            years = dataset.years(DEFAULT_EVENT)
+            started = time.perf_counter()
+            dataset.year_frame(DEFAULT_EVENT, years[-1])
+            one_year = time.perf_counter() - started
+
+            started = time.perf_counter()
+            everything = pd.concat(
+                [pd.read_parquet(partition_path(cache_path, DEFAULT_EVENT, year)) for year in years],
+                ignore_index=True,
+            )
+            full = time.perf_counter() - started
+
+            print(
+                f"{len(years):>6} {len(df):>10,} {startup:>9.2f}s"
+                f" {frame_megabytes(*eager) + index_megabytes(runner_index):>8.1f}"
+                f" {one_year * 1000:>7.0f}ms {full:>9.2f}s {frame_megabytes(everything):>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "database" / "scripts"))
+
+from bench_records import synthetic_csv  # noqa: E402
+from export_csv_to_json import export  # noqa: E402
+from race_core.formats import iter_records  # noqa: E402
+
+
+CASES = [
+    ("json", "none"),
+    ("ndjson", "none"),
+    ("ndjson", "gzip"),
+    ("ndjson", "zstd"),
+    ("msgpack", "none"),
+    ("msgpack", "zstd"),
+    ("json", "gzip"),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Velocidad de exportacion, tamano y velocidad de lectura de cada formato de salida."
+    )
+    parser.add_argument("--rows", type=int, default=500_000, help="Filas sinteticas del CSV.")
+    parser.add_argument(
+        "--input",
+        default=None,
+        help="CSV real en lugar del sintetico (por ejemplo el salidas.csv del spider).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, os.cpu_count() or 1],
+        help="Procesos del exportador a comparar.",
+    )
+    parser.add_argument("--chunk-rows", type=int, default=20000, help="Filas por bloque.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    workers_list = sorted(set(args.workers))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.input:
+            input_path = Path(args.input)
+        else:
+            input_path = Path(tmp_dir) / "salidas.csv"
+            input_path.write_text(synthetic_csv(args.rows), encoding="utf-8")
+
+        size_csv = input_path.stat().st_size
+        print(f"CSV: {input_path} ({size_csv / (1 << 20):.1f} MiB)")
+        header = " ".join(f"{f'escritura w={workers}':>18}" for workers in workers_list)
+        print(f"{'formato':<16} {'MiB':>8} {'vs CSV':>7} {header} {'lectura':>14}")
+
+        for record_format, compression in CASES:
+            output_path = Path(tmp_dir) / f"salidas.{record_format}.{compression}"
+            rates = []
+            for workers in workers_list:
+                started = time.perf_counter()
+                count = export(input_path, output_path, record_format, compression, workers, args.chunk_rows)
+                rates.append(count / (time.perf_counter() - started))
+
+            started = time.perf_counter()
+            read = sum(1 for _ in iter_records(output_path))
+            read_rate = read / (time.perf_counter() - started)
+            if read != count:
+                raise AssertionError(f"{record_format}/{compression}: escritos {count}, leidos {read}")
+
+            size = output_path.stat().st_size
+            label = record_format if compression == "none" else f"{record_format}+{compression}"
+            writes = " ".join(f"{rate:>12,.0f} reg/s" for rate in rates)
+            print(
+                f"{label:<16} {size / (1 << 20):>8.1f} {size / size_csv:>6.0%} {writes} {read_rate:>8,.0f} reg/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import csv
+import gc
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scrapy_project" / "sansilvestrecoruna"))
+
+from itemadapter import ItemAdapter  # noqa: E402
+
+from race_core.loader import record_fingerprint  # noqa: E402
+from race_core.parsers import normalize_name  # noqa: E402
+from race_core.records import RunnerRecord, iter_csv_records  # noqa: E402
+from sansilvestrecoruna.items import corredor  # noqa: E402
+from sansilvestrecoruna.pipelines import SanSilvestreLimpiezaPipeline  # noqa: E402
+
+
+HEADER = ["puesto", "dorsal", "nombre", "apellido", "sexo", "categoría", "tiempo", "distancia", "carrera", "ubicacion", "evento"]
+CATEGORIES = ["SNM", "SNF", "VTAM", "VTAF", "VTBM", "JV2F"]
+EVENTS = ["san-silvestre-coruna", "coruna-10k"]
+
+
+def synthetic_rows(count):
+    for index in range(count):
+        seconds = 20 * 60 + index % 4000
+        category = CATEGORIES[index % len(CATEGORIES)]
+        yield [
+            str(index % 2000 + 1),
+            str(index + 1),
+            f"nombre {index % 997}",
+            f"Apellido  {index}",
+            f"{category[-1]}-{index % 500}",
+            f"{category}-{index % 500}",
+            f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}",
+            "KM 7,5",
+            str(2010 + index % 15),
+            "A Coruña",
+            EVENTS[index % len(EVENTS)],
+        ]
+
+
+def synthetic_csv(count):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    writer.writerows(synthetic_rows(count))
+    return buffer.getvalue()
+
+
+# Camino anterior del exportador: csv.DictReader y un dict nuevo por fila.
+def normalize_header(header):
+    if header == "categoría":
+        return "categoria"
+    return header
+
+
+def to_int_or_value(value):
+    if value is None:
+        return value
+    value = value.strip()
+    if value == "":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def normalize_row(row):
+    normalized = {}
+    for key, value in row.items():
+        clean_key = normalize_header(key.strip())
+        clean_value = value.strip() if value is not None else ""
+        normalized[clean_key] = clean_value
+
+    for key in ("puesto", "dorsal", "carrera"):
+        if key in normalized:
+            normalized[key] = to_int_or_value(normalized[key])
+
+    return normalized
+
+
+def export_dicts(text):
+    return (normalize_row(row) for row in csv.DictReader(io.StringIO(text)))
+
+
+def export_records(text):
+    return iter_csv_records(io.StringIO(text))
+
+
+# Camino anterior de los pipelines: limpieza sobre el item y copia a dict para la carga.
+def clean_item(item):
+    adapter = ItemAdapter(item)
+    for campo in ["nombre", "apellido"]:
+        valor = adapter.get(campo)
+        if valor:
+            adapter[campo] = normalize_name(valor)
+    return adapter.asdict()
+
+
+def pipeline_items(items):
+    return (clean_item(item) for item in items)
+
+
+def pipeline_records(items):
+    pipeline = SanSilvestreLimpiezaPipeline()
+    return (pipeline.process_item(item, None) for item in items)
+
+
+def spider_items(text):
+    items = []
+    for row in csv.DictReader(io.StringIO(text)):
+        item = corredor()
+        for key, value in row.items():
+            item[key] = value
+        items.append(item)
+    return items
+
+
+def throughput(produce, source):
+    gc.collect()
+    started = time.perf_counter()
+    count = sum(1 for _ in produce(source))
+    elapsed = time.perf_counter() - started
+    return count, count / elapsed
+
+
+def retained_bytes(produce, source):
+    # Memoria que ocupan los registros vivos (lo que pesaria una lista o un lote en memoria).
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    records = list(produce(source))
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return retained / len(records)
+
+
+def check_equal(text, sample):
+    # El registro debe exportar (y firmar) exactamente lo mismo que el dict de antes.
+    for row, record in zip(export_dicts(text), export_records(text)):
+        if record.as_dict() != row or record_fingerprint(record) != record_fingerprint(row):
+            raise AssertionError(f"Registro distinto: {row} != {record}")
+        sample -= 1
+        if not sample:
+            break
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Memoria y velocidad de los dicts por fila frente a RunnerRecord (exportador y pipelines)."
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Registros sinteticos.")
+    parser.add_argument(
+        "--pipeline-rows",
+        type=int,
+        default=200_000,
+        help="Items del spider para la comparacion de pipelines (cada scrapy.Item es caro de crear).",
+    )
+    return parser.parse_args()
+
+
+def report(label, before, after, unit, fmt):
+    print(f"  {label:<26} {fmt.format(before):>12} -> {fmt.format(after):>12} {unit}")
+
+
+def main():
+    args = parse_args()
+    text = synthetic_csv(args.rows)
+    check_equal(text, 10_000)
+
+    print(f"Exportador ({args.rows:,} filas): dict por fila -> RunnerRecord")
+    _, dict_rate = throughput(export_dicts, text)
+    _, record_rate = throughput(export_records, text)
+    report("filas/s", dict_rate, record_rate, "", "{:,.0f}")
+    report("bytes por registro vivo", retained_bytes(export_dicts, text), retained_bytes(export_records, text), "B", "{:,.0f}")
+
+    items_text = synthetic_csv(args.pipeline_rows)
+    print(f"\nPipelines ({args.pipeline_rows:,} items): ItemAdapter + asdict -> RunnerRecord")
+    _, item_rate = throughput(pipeline_items, spider_items(items_text))
+    _, record_rate = throughput(pipeline_records, spider_items(items_text))
+    report("items/s", item_rate, record_rate, "", "{:,.0f}")
+    report(
+        "bytes por registro vivo",
+        retained_bytes(pipeline_items, spider_items(items_text)),
+        retained_bytes(pipeline_records, spider_items(items_text)),
+        "B",
+        "{:,.0f}",
+    )
+
+
+if __name__ == "__main__":
+    main()
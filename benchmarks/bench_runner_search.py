@@ -0,0 +1,82 @@
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from race_core.formats import iter_records  # noqa: E402
+from race_core.runner_index import RunnerIndex, fold_name  # noqa: E402
+
+
+def load_names(input_path, copies):
+    names = [
+        " ".join(f"{record.get('nombre') or ''} {record.get('apellido') or ''}".split())
+        for record in iter_records(input_path)
+    ]
+    # Copias con un sufijo distinto para simular un historico mas grande.
+    names += [f"{name} {copy}" for copy in range(1, copies) for name in names]
+    return pd.Series(names, dtype="object")
+
+
+def sample_queries(names, count, seed=0):
+    rng = random.Random(seed)
+    unique_names = names.drop_duplicates().tolist()
+    queries = []
+    for _ in range(count):
+        words = fold_name(rng.choice(unique_names)).split() or ["A"]
+        picked = rng.sample(words, k=min(len(words), rng.choice([1, 1, 2])))
+        queries.append(" ".join(word[: rng.randint(1, len(word))] for word in picked).lower())
+    return queries
+
+
+def scan_search(names, query):
+    # Busqueda anterior: subcadena sobre toda la columna y orden de los nombres encontrados.
+    matches = names.dropna()
+    matches = matches[matches.str.contains(query.strip().upper(), regex=False)]
+    return sorted(matches.unique().tolist())
+
+
+def timings_ms(search, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1], timings[-1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Latencia del buscador de corredores: indice frente a recorrer la columna de nombres."
+    )
+    parser.add_argument("--input", default="data/salidas.json", help="Resultados exportados (cualquier formato).")
+    parser.add_argument("--copies", type=int, default=1, help="Multiplica los nombres para probar mas volumen.")
+    parser.add_argument("--queries", type=int, default=500, help="Consultas aleatorias (prefijos de nombres).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    names = load_names(Path(args.input), args.copies)
+
+    started = time.perf_counter()
+    index = RunnerIndex.from_names(names)
+    build_seconds = time.perf_counter() - started
+
+    queries = sample_queries(names, args.queries)
+    print(f"Filas: {len(names):,}  corredores: {len(index):,}  indice construido en {build_seconds:.2f} s")
+    print(f"{'busqueda':<12} {'mediana':>10} {'p99':>10} {'max':>10}")
+    for label, search in (("columna", lambda query: scan_search(names, query)), ("indice", index.search)):
+        median, p99, worst = timings_ms(search, queries)
+        print(f"{label:<12} {median:>8.2f}ms {p99:>8.2f}ms {worst:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "dashboard"))
+
+from data_store import build_frame  # noqa: E402
+from race_core.formats import iter_records  # noqa: E402
+from race_core.runner_stats import RunnerStats  # noqa: E402
+
+
+def groupby_leaderboard(df, limit):
+    # Ranking anterior del notebook: groupby de todos los resultados en cada consulta.
+    valid = df.dropna(subset=["year", "time_seconds"])
+    perf = (
+        valid.groupby(["nombre", "apellido", "gender"], observed=True)
+        .agg(races=("year", "count"), avg_seconds=("time_seconds", "mean"))
+        .reset_index()
+    )
+    return perf[perf["races"] >= 2].sort_values("avg_seconds").head(limit)
+
+
+def timed_ms(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Perfiles y rankings de corredores: almacen precalculado frente a groupby por consulta."
+    )
+    parser.add_argument("--input", default="data/salidas.json", help="Resultados exportados (cualquier formato).")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones de cada consulta.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    df = build_frame(list(iter_records(Path(args.input))))
+    years = sorted(df["year"].dropna().astype(int).unique().tolist())
+    last_year = years[-1]
+
+    started = time.perf_counter()
+    stats = RunnerStats.from_frame(df)
+    build_seconds = time.perf_counter() - started
+
+    partial = RunnerStats.from_frame(df[df["year"] != last_year])
+    started = time.perf_counter()
+    partial.add_year(last_year, df[df["year"] == last_year])
+    add_seconds = time.perf_counter() - started
+
+    keys = list(stats.profiles)[:: max(len(stats) // 1000, 1)]
+    print(f"Filas: {len(df):,}  corredores: {len(stats):,}")
+    print(f"Construccion completa: {build_seconds:.2f} s  anadir {last_year}: {add_seconds:.2f} s")
+    print(f"Top 20 (groupby):      {timed_ms(lambda: groupby_leaderboard(df, 20), args.repeat):8.2f} ms")
+    print(f"Top 20 (almacen):      {timed_ms(lambda: stats.leaderboard('mean', 20, 2), args.repeat):8.2f} ms")
+    lookup_ms = timed_ms(lambda: [stats.profile(key) for key in keys], args.repeat) / len(keys)
+    print(f"Perfil de un corredor: {lookup_ms * 1000:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+import argparse
+import csv
+import html
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+PROJECT_DIR = ROOT / "scrapy_project" / "sansilvestrecoruna"
+sys.path.insert(0, str(PROJECT_DIR))
+
+os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "sansilvestrecoruna.settings")
+
+import sansilvestrecoruna  # noqa: E402,F401  (anade la raiz del repo al path)
+from scrapy.http import HtmlResponse, Request  # noqa: E402
+from scrapy.utils.test import get_crawler  # noqa: E402
+from race_core.competitions import DEFAULT_EVENT, load_competitions  # noqa: E402
+from sansilvestrecoruna.spiders.resultados import ResultadosSpider  # noqa: E402
+
+
+SITE = "https://sansilvestrecoruna.com"
+LISTING_PATH = "/es/web/resultado/competicion-{id_comp}"
+DEFAULT_FIXTURES = Path(__file__).resolve().parent / "fixtures" / "resultados"
+DEFAULT_CSV = PROJECT_DIR / "sansilvestrecoruna" / "salidas.csv"
+FIELDS = ["puesto", "dorsal", "nombre", "apellido", "sexo", "categoría", "tiempo", "url_perfil"]
+PROFILE_FIXTURE = "perfil.html"
+# Las fixtures son de la San Silvestre de A Coruna (registro por defecto): id de competicion -> ano.
+COMPETITION_YEARS = {
+    competition.competition_id: competition.year
+    for competition in load_competitions(events=[DEFAULT_EVENT])
+}
+
+
+# --- Fixtures -------------------------------------------------------------------------------
+# Un directorio con manifest.json ({ruta: fichero}) y el HTML de cada pagina. Se graban de la web
+# real con --record o se sintetizan a partir de salidas.csv con la estructura de la web.
+
+def fixture_row(row, id_comp, index):
+    cells = [
+        ("puesto", html.escape(row["puesto"])),
+        ("dorsal", f'<a>{html.escape(row["dorsal"])}</a>'),
+        ("nombre", f'<a href="/es/web/participante/{id_comp}-{index}">{html.escape(row["nombre"])}</a>'),
+        ("apellidos", f'<a href="/es/web/participante/{id_comp}-{index}">{html.escape(row["apellido"])}</a>'),
+        ("hidden-xs sexo", html.escape(row["sexo"])),
+        ("hidden-xs categoria", html.escape(row["categoría"])),
+        ("tiempo_display", html.escape(row["tiempo"])),
+    ]
+    return "<tr>" + "".join(f'<td class="{cls}">{value}</td>' for cls, value in cells) + "</tr>"
+
+
+def fixture_page(rows, id_comp, page, next_path):
+    body = "\n".join(fixture_row(row, id_comp, (page - 1) * len(rows) + i) for i, row in enumerate(rows))
+    pager = f'<a href="{next_path}">Siguiente &raquo;</a>' if next_path else ""
+    return (
+        "<html><body><div class=\"table-container\"><table><thead><tr><th>Puesto</th></tr></thead>"
+        f"<tbody>\n{body}\n</tbody></table></div><div class=\"pager\">{pager}</div></body></html>"
+    )
+
+
+def synthesize_fixtures(csv_path, fixtures_dir, rows_per_page):
+    years = {ano: id_comp for id_comp, ano in COMPETITION_YEARS.items()}
+    rows_by_year = defaultdict(list)
+    with csv_path.open("r", encoding="utf-8-sig", newline="") as file_handle:
+        for row in csv.DictReader(file_handle):
+            rows_by_year[int(row["carrera"])].append(row)
+
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for ano, rows in sorted(rows_by_year.items()):
+        id_comp = years.get(ano)
+        if id_comp is None:
+            continue
+        pages = [rows[i:i + rows_per_page] for i in range(0, len(rows), rows_per_page)]
+        for page, page_rows in enumerate(pages, start=1):
+            path = LISTING_PATH.format(id_comp=id_comp) + (f"?page={page}" if page > 1 else "")
+            next_path = LISTING_PATH.format(id_comp=id_comp) + f"?page={page + 1}" if page < len(pages) else None
+            filename = f"competicion-{id_comp}-{page}.html"
+            (fixtures_dir / filename).write_text(fixture_page(page_rows, id_comp, page, next_path), encoding="utf-8")
+            manifest[path] = filename
+
+    distance = next(iter(rows_by_year.values()))[0]["distancia"]
+    (fixtures_dir / PROFILE_FIXTURE).write_text(
+        f"<html><body><table><tr><td>Distancia</td><td>{html.escape(distance)}</td></tr></table></body></html>",
+        encoding="utf-8",
+    )
+    (fixtures_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def record_fixtures(fixtures_dir, pages_per_year, user_agent):
+    # Descarga paginas reales (las primeras de cada ano y un perfil) para reproducirlas offline.
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    profile_saved = False
+    for id_comp in COMPETITION_YEARS:
+        url = SITE + LISTING_PATH.format(id_comp=id_comp)
+        for page in range(1, pages_per_year + 1):
+            request = urllib.request.Request(url, headers={"User-Agent": user_agent})
+            with urllib.request.urlopen(request, timeout=30) as response:
+                body = response.read()
+            listing = HtmlResponse(url=url, body=body, encoding="utf-8")
+            filename = f"competicion-{id_comp}-{page}.html"
+            (fixtures_dir / filename).write_bytes(body)
+            manifest[urllib.parse.urlsplit(url)._replace(scheme="", netloc="").geturl()] = filename
+
+            profile = listing.css("td.nombre a::attr(href)").get()
+            if profile and not profile_saved:
+                profile_request = urllib.request.Request(listing.urljoin(profile), headers={"User-Agent": user_agent})
+                with urllib.request.urlopen(profile_request, timeout=30) as response:
+                    (fixtures_dir / PROFILE_FIXTURE).write_bytes(response.read())
+                profile_saved = True
+
+            next_page = listing.xpath('//a[contains(text(), "Siguiente")]/@href').get()
+            if not next_page:
+                break
+            url = listing.urljoin(next_page)
+            time.sleep(0.5)
+
+    (fixtures_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def load_fixtures(fixtures_dir):
+    manifest = json.loads((fixtures_dir / "manifest.json").read_text(encoding="utf-8"))
+    responses = []
+    for path, filename in manifest.items():
+        id_comp = path.split("competicion-", 1)[1].split("?", 1)[0]
+        meta = {"competicion": f"{DEFAULT_EVENT}/{id_comp}", "ano": COMPETITION_YEARS[id_comp], "prio_actual": 0}
+        request = Request(SITE + path, meta=meta)
+        body = (fixtures_dir / filename).read_bytes()
+        responses.append(HtmlResponse(url=request.url, body=body, encoding="utf-8", request=request))
+    return responses
+
+
+# --- Estrategias de extraccion --------------------------------------------------------------
+# Todas devuelven, por fila, los mismos campos que ResultadosSpider.parse_fila.
+
+def spider_for_benchmark():
+    return ResultadosSpider.from_crawler(get_crawler(ResultadosSpider, {"CRAWL_MODE": "serial"}))
+
+
+def parsed_items(spider, response):
+    # parse() completo del spider, con la distancia de la competicion ya resuelta.
+    spider.distancias[response.meta["competicion"]] = "KM 7,5"
+    return [item for item in spider.parse(response) if not isinstance(item, Request)]
+
+
+def extract_css(spider, response):
+    # Codigo actual: ~8 selectores CSS por fila (ResultadosSpider.parse_fila).
+    filas = response.css("div.table-container table tbody tr")
+    comp = spider.competiciones[response.meta["competicion"]]
+    return [dict(item, url_perfil=url) for item, url in (spider.parse_fila(fila, comp) for fila in filas)]
+
+
+def classify(classes):
+    tokens = classes.split()
+    if "puesto" in tokens:
+        return "puesto"
+    if "dorsal" in tokens:
+        return "dorsal"
+    if "nombre" in tokens:
+        return "nombre"
+    if "apellidos" in tokens:
+        return "apellido"
+    if "tiempo_display" in tokens:
+        return "tiempo"
+    if "sexo" in classes:
+        return "sexo"
+    if "categoria" in classes:
+        return "categoría"
+    return None
+
+
+LINK_FIELDS = {"dorsal", "nombre", "apellido"}
+
+
+def first_text(element):
+    if element.text:
+        return element.text
+    for child in element:
+        if child.tail:
+            return child.tail
+    return None
+
+
+def lxml_row(tr):
+    row = dict.fromkeys(FIELDS[:-1], "")
+    row["url_perfil"] = None
+    seen = set()
+    for td in tr.iterchildren("td"):
+        field = classify(td.get("class", ""))
+        if field is None or field in seen:
+            continue
+        seen.add(field)
+        if field in LINK_FIELDS:
+            links = list(td.iter("a"))
+            text = next((link.text for link in links if link.text), None)
+            if field == "nombre" and links:
+                row["url_perfil"] = next((link.get("href") for link in links if link.get("href")), None)
+        else:
+            text = first_text(td)
+        row[field] = (text or "").strip()
+    return row
+
+
+def extract_xpath_row(spider, response):
+    # Un unico XPath por fila (sus <td>) y despacho por la clase de cada celda.
+    return [
+        lxml_row(fila.root) for fila in response.xpath('//div[contains(concat(" ", normalize-space(@class), " "), " table-container ")]//table/tbody/tr')
+    ]
+
+
+def extract_lxml(spider, response):
+    # Recorre el arbol lxml de la respuesta directamente, sin crear Selectors por celda.
+    rows = []
+    for container in response.selector.root.iter("div"):
+        if "table-container" not in container.get("class", "").split():
+            continue
+        for tbody in container.iter("tbody"):
+            rows.extend(lxml_row(tr) for tr in tbody.iterchildren("tr"))
+    return rows
+
+
+STRATEGIES = {
+    "css": extract_css,
+    "xpath-fila": extract_xpath_row,
+    "lxml": extract_lxml,
+}
+
+
+def normalized(rows):
+    return [[row.get(field) for field in FIELDS] for row in rows]
+
+
+def check_strategies(spider, responses, sample=20):
+    # Todas las estrategias deben devolver exactamente las filas del codigo actual.
+    expected = [normalized(extract_css(spider, response)) for response in responses]
+    for name, extract in STRATEGIES.items():
+        if name == "css":
+            continue
+        if [normalized(extract(spider, response)) for response in responses] != expected:
+            raise AssertionError(f"La estrategia {name} no produce las mismas filas que el spider")
+
+    for response, rows in zip(responses[:sample], expected):
+        items = [[item.get(field) for field in FIELDS[:-1]] for item in parsed_items(spider, response)]
+        if items != [row[:-1] for row in rows]:
+            raise AssertionError("parse() no coincide con parse_fila()")
+
+
+def measure(extract, spider, responses, repeat):
+    rows = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for response in responses:
+            rows += len(extract(spider, response))
+    elapsed = time.perf_counter() - started
+
+    # Una pasada con tracemalloc: memoria asignada por pagina (pico sobre lo que ya habia) y
+    # bloques que siguen vivos al terminar cada pagina, ambos por fila extraida.
+    tracemalloc.start()
+    allocated = 0
+    blocks = 0
+    pass_rows = 0
+    for response in responses:
+        base_size, _ = tracemalloc.get_traced_memory()
+        base_blocks = sys.getallocatedblocks()
+        tracemalloc.reset_peak()
+        page = extract(spider, response)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - base_size
+        blocks += sys.getallocatedblocks() - base_blocks
+        pass_rows += len(page)
+        del page
+    tracemalloc.stop()
+    return rows / elapsed, blocks / pass_rows, allocated / pass_rows
+
+
+# --- Servidor local -------------------------------------------------------------------------
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Sirve las paginas del manifiesto; cualquier otra ruta de la web devuelve el perfil."""
+
+    def __init__(self, *args, fixtures_dir, manifest, **kwargs):
+        self.fixtures_dir = fixtures_dir
+        self.manifest = manifest
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        filename = self.manifest.get(self.path, PROFILE_FIXTURE)
+        body = (self.fixtures_dir / filename).read_bytes()
+        body = body.replace(SITE.encode("utf-8"), f"http://{self.headers['Host']}".encode("utf-8"))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(fixtures_dir, manifest):
+    handler = partial(FixtureHandler, fixtures_dir=fixtures_dir, manifest=manifest)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def crawl_against_server(fixtures_dir, manifest, mode, perfiles):
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    server = start_server(fixtures_dir, manifest)
+    base = f"http://127.0.0.1:{server.server_port}"
+    recorded = {path.split("?", 1)[0] for path in manifest}
+
+    class ReplaySpider(ResultadosSpider):
+        def set_competitions(self, competitions):
+            super().set_competitions(competitions)
+            self.allowed_domains = ["127.0.0.1"]
+
+        def start_requests(self):
+            for request in super().start_requests():
+                path = request.url.removeprefix(SITE)
+                if path in recorded:
+                    yield request.replace(url=base + path)
+
+    # Ajustes del proyecto, sin retardos (el servidor es local) ni cache HTTP.
+    settings = get_project_settings()
+    settings.setdict(
+        {
+            "CRAWL_MODE": mode,
+            "CRAWL_START_DELAY": 0,
+            "DOWNLOAD_DELAY": 0,
+            "HTTPCACHE_ENABLED": False,
+            "LOG_LEVEL": "WARNING",
+        },
+        priority="cmdline",
+    )
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(ReplaySpider)
+    started = time.perf_counter()
+    process.crawl(crawler, perfiles="1" if perfiles else None)
+    process.start()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    stats = crawler.stats.get_stats()
+    return stats.get("item_scraped_count", 0), stats.get("response_received_count", 0), elapsed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Reproduce paginas grabadas a traves de ResultadosSpider y mide filas/s y asignaciones por fila."
+    )
+    parser.add_argument("--fixtures", default=str(DEFAULT_FIXTURES), help="Directorio de fixtures (manifest.json + HTML).")
+    parser.add_argument("--record", action="store_true", help="Graba las fixtures desde la web real.")
+    parser.add_argument("--record-pages", type=int, default=2, help="Paginas por ano a grabar con --record.")
+    parser.add_argument("--csv", default=str(DEFAULT_CSV), help="CSV del que sintetizar fixtures si no existen.")
+    parser.add_argument("--rows-per-page", type=int, default=50, help="Filas por pagina sintetica.")
+    parser.add_argument("--repeat", type=int, default=3, help="Pasadas sobre todas las paginas por estrategia.")
+    parser.add_argument(
+        "--strategy",
+        choices=sorted(STRATEGIES),
+        action="append",
+        help="Estrategias a medir (por defecto, todas).",
+    )
+    parser.add_argument(
+        "--server",
+        choices=["serial", "concurrent"],
+        help="Ademas, rastrea las fixtures con el spider completo contra un servidor local en ese modo.",
+    )
+    parser.add_argument("--perfiles", action="store_true", help="Con --server, sigue el perfil de cada corredor.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    fixtures_dir = Path(args.fixtures)
+    if args.record:
+        spider_settings = get_crawler(ResultadosSpider).settings
+        manifest = record_fixtures(fixtures_dir, args.record_pages, spider_settings.get("USER_AGENT"))
+    elif not (fixtures_dir / "manifest.json").exists():
+        manifest = synthesize_fixtures(Path(args.csv), fixtures_dir, args.rows_per_page)
+    else:
+        manifest = json.loads((fixtures_dir / "manifest.json").read_text(encoding="utf-8"))
+
+    responses = load_fixtures(fixtures_dir)
+    spider = spider_for_benchmark()
+    check_strategies(spider, responses)
+
+    print(f"Fixtures: {fixtures_dir} ({len(manifest)} paginas)")
+    print(f"{'estrategia':<12} {'filas/s':>12} {'bloques/fila':>13} {'B asignados/fila':>17}")
+    for name in args.strategy or STRATEGIES:
+        rate, blocks, peak = measure(STRATEGIES[name], spider, responses, args.repeat)
+        print(f"{name:<12} {rate:>12,.0f} {blocks:>13.1f} {peak:>17,.0f}")
+
+    if args.server:
+        items, responses_count, elapsed = crawl_against_server(fixtures_dir, manifest, args.server, args.perfiles)
+        print(
+            f"\nRastreo local ({args.server}): {items} items, {responses_count} respuestas en {elapsed:.2f} s "
+            f"({items / elapsed:,.0f} items/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import csv
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "database" / "scripts"))
+
+from export_csv_to_json import export  # noqa: E402
+from import_json_to_mariadb import iter_records, iter_valid_records  # noqa: E402
+
+
+TEMPLATE = {
+    "puesto": 1,
+    "dorsal": 139,
+    "nombre": "PABLO",
+    "apellido": "BOCELO BELLAS",
+    "sexo": "M-1",
+    "categoría": "SNM-1",
+    "tiempo": "00:23:07",
+    "distancia": "KM 7,5",
+    "carrera": 2025,
+    "ubicacion": "A Coruña",
+}
+
+
+def synthetic_records(count):
+    for index in range(count):
+        record = dict(TEMPLATE)
+        record["puesto"] = index + 1
+        record["dorsal"] = index + 1
+        record["apellido"] = f"APELLIDO {index}"
+        record["carrera"] = 2010 + index % 15
+        yield record
+
+
+def write_csv(records, path):
+    # Mismo formato que el feed del spider; el JSON y el NDJSON salen del exportador real.
+    with path.open("w", encoding="utf-8", newline="") as file_handle:
+        writer = csv.DictWriter(file_handle, fieldnames=list(TEMPLATE))
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def consume(mode, path):
+    counters = {"inserted": 0, "skipped": 0, "races": set()}
+    if mode == "json.load":
+        with path.open("r", encoding="utf-8") as file_handle:
+            records = json.load(file_handle)
+    else:
+        records = iter_records(path)
+
+    for _ in iter_valid_records(records, counters):
+        counters["inserted"] += 1
+    return counters["inserted"]
+
+
+def run_child(mode, path):
+    started = time.perf_counter()
+    count = consume(mode, Path(path))
+    elapsed = time.perf_counter() - started
+    # ru_maxrss esta en KiB en Linux.
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"count": count, "seconds": elapsed, "peak_mib": peak_kib / 1024}))
+
+
+def measure(mode, path):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, str(path)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compara el pico de memoria de json.load frente a la lectura en streaming."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[50_000, 200_000, 800_000],
+        help="Numero de registros sinteticos por prueba.",
+    )
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child(*args.child)
+        return
+
+    print(f"{'registros':>10} {'modo':<18} {'pico RSS (MiB)':>15} {'filas/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            csv_path = Path(tmp_dir) / f"salidas_{size}.csv"
+            array_path = Path(tmp_dir) / f"salidas_{size}.json"
+            ndjson_path = Path(tmp_dir) / f"salidas_{size}.ndjson"
+            write_csv(synthetic_records(size), csv_path)
+            export(csv_path, array_path, "json")
+            export(csv_path, ndjson_path, "ndjson")
+
+            cases = [
+                ("json.load", array_path),
+                ("stream (array)", array_path),
+                ("stream (ndjson)", ndjson_path),
+            ]
+            for label, path in cases:
+                mode = "json.load" if label == "json.load" else "stream"
+                result = measure(mode, path)
+                rate = result["count"] / result["seconds"] if result["seconds"] else 0.0
+                print(f"{size:>10} {label:<18} {result['peak_mib']:>15.1f} {rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from race_core.vectorized import derive_columns  # noqa: E402
+
+
+CATEGORIES = ["SNM", "SNF", "VTAM", "VTAF", "VTBM", "VTBF", "VTCM", "JV1M", "JV2F", "VTDM", "PROM"]
+DISTANCES = ["KM 7,5", "7250 m", "6750 m", "6040 m", "4000 m", "N/A"]
+
+
+def synthetic_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(20 * 60, 90 * 60, rows)
+    ranks = rng.integers(1, 2000, rows).astype(str)
+    categories = rng.choice(CATEGORIES, rows)
+    genders = np.where(np.char.endswith(categories.astype(str), "F"), "F", "M")
+    return pd.DataFrame(
+        {
+            "puesto": np.arange(1, rows + 1),
+            "nombre": rng.choice(["PABLO", "MARIA", "ANA", "DAVID"], rows),
+            "apellido": rng.choice(["PEREZ", "LOPEZ", "GARCIA"], rows),
+            "sexo": pd.Series(genders).str.cat(ranks, sep="-"),
+            "categoria": pd.Series(categories).str.cat(ranks, sep="-"),
+            "tiempo": [f"{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}" for s in seconds],
+            "distancia": rng.choice(DISTANCES, rows),
+            "carrera": rng.integers(2010, 2026, rows),
+        }
+    )
+
+
+# Camino anterior de data_store.build_frame: funciones escalares sin cache, una llamada por fila.
+
+
+def time_to_seconds(value):
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    parts = text.split(":")
+    if len(parts) == 2:
+        hours = 0
+        minutes, seconds = parts
+    elif len(parts) == 3:
+        hours, minutes, seconds = parts
+    else:
+        return None
+    try:
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+    except ValueError:
+        return None
+
+
+def parse_distance_km(value):
+    if value is None:
+        return None
+    text = str(value).strip().upper()
+    if not text:
+        return None
+    match = re.search(r"(\d+[\.,]?\d*)", text)
+    if not match:
+        return None
+    number = match.group(1).replace(",", ".")
+    try:
+        numeric = float(number)
+    except ValueError:
+        return None
+    if "KM" in text:
+        return numeric
+    if "M" in text:
+        return numeric / 1000
+    return None
+
+
+def map_age_group(code):
+    if not code or code == "SIN_CATEGORIA":
+        return "SIN_CATEGORIA"
+    code = str(code).upper()
+    if code.startswith("JV1"):
+        return "Joven 11-15"
+    if code.startswith("JV2"):
+        return "Joven 16-19"
+    if code.startswith("SN"):
+        return "Senior 20-34"
+    if code.startswith("VTA"):
+        return "Veteranos A 35-44"
+    if code.startswith("VTB"):
+        return "Veteranos B 45-54"
+    if code.startswith("VTC"):
+        return "Veteranos C 55-64"
+    if code.startswith("VTD"):
+        return "Veteranos D 65+"
+    return "OTRA"
+
+
+def normalize_category_base(value):
+    if value is None:
+        return ""
+    text = str(value).strip().upper()
+    if not text:
+        return ""
+    text = re.sub(r"[-\s]*\d+$", "", text)
+    text = re.sub(r"[MF]$", "", text)
+    return text
+
+
+def detect_gender(sexo_value, category_value):
+    for candidate in (sexo_value, category_value):
+        if candidate is None:
+            continue
+        text = str(candidate).strip().upper()
+        match = re.search(r"\b([MF])\b", text)
+        if match:
+            return match.group(1)
+        if text.startswith("M"):
+            return "M"
+        if text.startswith("F"):
+            return "F"
+    return None
+
+
+
+
+def derive_scalar(df):
+    df["year"] = pd.to_numeric(df["carrera"], errors="coerce")
+    df["time_seconds"] = df["tiempo"].apply(time_to_seconds)
+    df["categoria"] = df["categoria"].fillna("SIN_CATEGORIA")
+    df["category_raw"] = df["categoria"].astype(str).str.strip()
+    df["category_base"] = df["category_raw"].apply(normalize_category_base)
+    df["gender"] = [
+        detect_gender(sexo, cat)
+        for sexo, cat in zip(df["sexo"].tolist(), df["category_raw"].tolist())
+    ]
+    df["age_group"] = df["category_base"].apply(map_age_group)
+    df["distance_km"] = df["distancia"].apply(parse_distance_km)
+    df["pace_seconds"] = df["time_seconds"] / df["distance_km"]
+    df["runner_name"] = (df["nombre"].fillna("") + " " + df["apellido"].fillna("")).str.strip()
+    return df
+
+
+def timed(func, df):
+    started = time.perf_counter()
+    result = func(df.copy())
+    return result, time.perf_counter() - started
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compara las derivaciones escalares anteriores (.apply fila a fila) con las vectorizadas."
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Filas sinteticas.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    df = synthetic_frame(args.rows)
+
+    scalar, scalar_seconds = timed(derive_scalar, df)
+    vectorized, vectorized_seconds = timed(derive_columns, df)
+
+    columns = ["time_seconds", "category_base", "gender", "age_group", "distance_km", "pace_seconds"]
+    for column in columns:
+        left = scalar[column].astype(object).where(scalar[column].notna(), None)
+        right = vectorized[column].astype(object).where(vectorized[column].notna(), None)
+        if not left.equals(right):
+            raise AssertionError(f"La columna {column} no coincide")
+
+    print(f"Filas: {args.rows:,}")
+    print(f"Escalar (.apply):  {scalar_seconds:8.2f} s")
+    print(f"Vectorizado:       {vectorized_seconds:8.2f} s")
+    print(f"Aceleracion:       {scalar_seconds / vectorized_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
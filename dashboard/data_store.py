@@ -0,0 +1,343 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from race_core.competitions import DEFAULT_EVENT  # noqa: E402
+from race_core.formats import iter_records  # noqa: E402
+from race_core.rollups import PERCENTILE_COLUMNS, frame_percentile_ranks, frame_rollups  # noqa: E402
+from race_core.vectorized import derive_columns  # noqa: E402
+
+
+CACHE_FORMAT_VERSION = "7"
+MANIFEST_NAME = "_manifest.json"
+SUMMARY_FILE = "summary.parquet"
+HISTOGRAM_FILE = "histogram.parquet"
+# Columnas de corredor de cada ano: las que leen los perfiles y las que entran en la huella del ano.
+RUNNER_COLUMNS = [
+    "year", "runner_name", "time_seconds", "pace_seconds", "puesto", "gender", "age_group"
+] + PERCENTILE_COLUMNS
+DEFAULT_PARTITION_CACHE_BYTES = 256 << 20
+CATEGORY_COLUMNS = ["evento", "ubicacion", "distancia", "category_base", "gender", "age_group"]
+INTEGER_COLUMNS = {"puesto": "Int32", "dorsal": "Int32", "carrera": "Int16", "year": "Int16"}
+
+
+def find_source_path():
+    candidate_paths = [
+        Path("data/salidas.json"),
+        Path("..") / "data" / "salidas.json",
+        Path("../data/salidas.json"),
+    ]
+    data_path = next((p for p in candidate_paths if p.exists()), None)
+    if data_path is None:
+        raise FileNotFoundError("No se encontro data/salidas.json. Ejecuta el exportador primero.")
+    return data_path
+
+
+def build_frame(records):
+    df = pd.DataFrame(records)
+    if "categoria" not in df.columns and "categoría" in df.columns:
+        df["categoria"] = df["categoría"]
+
+    for col in ["tiempo", "sexo", "carrera", "distancia", "nombre", "apellido", "puesto", "dorsal", "ubicacion", "evento"]:
+        if col not in df.columns:
+            df[col] = None
+
+    if "categoria" not in df.columns:
+        df["categoria"] = None
+    # Los resultados anteriores al registro de eventos son todos de la San Silvestre.
+    df["evento"] = df["evento"].where(df["evento"].notna() & (df["evento"] != ""), DEFAULT_EVENT)
+
+    df = apply_column_types(derive_columns(df))
+    # Percentiles de cada resultado en su evento y ano; se guardan en el Parquet con el resto de columnas.
+    ranks = [frame_percentile_ranks(event_df) for _, event_df in df.groupby("evento", observed=True)]
+    return df.join(pd.concat(ranks) if ranks else frame_percentile_ranks(df))
+
+
+def apply_column_types(df):
+    # Tipos fijos para que el Parquet sea estable: enteros nullable y categorias de baja cardinalidad.
+    for col, dtype in INTEGER_COLUMNS.items():
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+    for col in ["categoria", "category_raw", "sexo", "tiempo", "nombre", "apellido"]:
+        df[col] = df[col].astype("string")
+    for col in ["time_seconds", "distance_km", "pace_seconds"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype("category")
+    return df
+
+
+def source_fingerprint(source_path):
+    stat = source_path.stat()
+    return {"mtime_ns": str(stat.st_mtime_ns), "size": str(stat.st_size)}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with path.open("rb") as file_handle:
+        for block in iter(lambda: file_handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path_for(source_path):
+    return source_path.with_suffix(".parquet")
+
+
+def event_path(cache_path, event):
+    return cache_path / f"event={event}"
+
+
+def partition_path(cache_path, event, year):
+    return event_path(cache_path, event) / f"year={year}" / "part-0.parquet"
+
+
+def read_cache_metadata(cache_path):
+    manifest_path = cache_path / MANIFEST_NAME
+    if not manifest_path.is_file():
+        return None
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def write_manifest(cache_path, metadata):
+    tmp_path = cache_path / f"{MANIFEST_NAME}.tmp"
+    tmp_path.write_text(json.dumps(metadata, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, cache_path / MANIFEST_NAME)
+
+
+def write_parquet(df, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, compression="zstd")
+
+
+def runner_digest(year_df):
+    # Huella de las columnas de corredor de un ano: al recargar, los perfiles solo se recalculan
+    # para los anos cuya huella ha cambiado.
+    hashes = pd.util.hash_pandas_object(year_df[RUNNER_COLUMNS], index=False)
+    return hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()[:16]
+
+
+def write_event(event_df, cache_path, event):
+    # Un directorio por ano con todas las columnas, mas las tablas resumen que el dashboard carga al
+    # arrancar. Los corredores no tienen tabla propia: el indice y los perfiles se leen de los anos.
+    path = event_path(cache_path, event)
+    years = {}
+    for year, year_df in event_df.dropna(subset=["year"]).groupby(event_df["year"].dropna().astype(int)):
+        write_parquet(year_df, partition_path(cache_path, event, year))
+        years[str(year)] = {
+            "rows": len(year_df),
+            "bytes": int(year_df.memory_usage(deep=True).sum()),
+            "digest": runner_digest(year_df),
+        }
+
+    summary, histogram = frame_rollups(event_df)
+    write_parquet(summary, path / SUMMARY_FILE)
+    write_parquet(histogram, path / HISTOGRAM_FILE)
+    locations = event_df["ubicacion"].astype("object").dropna().value_counts()
+    return {"location": locations.index[0] if len(locations) else "", "years": years}
+
+
+def write_cache(df, cache_path, metadata):
+    # Un directorio por evento, que no comparte nada con los demas: abrir o consultar un evento
+    # solo lee sus ficheros.
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    events = {}
+    for event, event_df in df.groupby("evento", observed=True):
+        events[str(event)] = write_event(event_df, tmp_path, str(event))
+    write_manifest(tmp_path, {**metadata, "events": events})
+
+    # El formato anterior era un solo fichero con el mismo nombre.
+    if cache_path.is_dir():
+        shutil.rmtree(cache_path)
+    elif cache_path.exists():
+        cache_path.unlink()
+    os.replace(tmp_path, cache_path)
+
+
+def rebuild_cache(source_path, cache_path, source_hash=None):
+    df = build_frame(list(iter_records(source_path)))
+    metadata = {
+        "version": CACHE_FORMAT_VERSION,
+        "sha256": source_hash or file_sha256(source_path),
+        **source_fingerprint(source_path),
+    }
+    write_cache(df, cache_path, metadata)
+    return df
+
+
+def open_dataset(source_path, cache_path=None, max_bytes=DEFAULT_PARTITION_CACHE_BYTES):
+    """Abre la cache particionada por evento y ano, reconstruyendola solo si cambia el contenido del origen."""
+    cache_path = cache_path or cache_path_for(source_path)
+    metadata = read_cache_metadata(cache_path)
+    if metadata is None or metadata.get("version") != CACHE_FORMAT_VERSION:
+        rebuild_cache(source_path, cache_path)
+    else:
+        fingerprint = source_fingerprint(source_path)
+        if any(metadata.get(key) != value for key, value in fingerprint.items()):
+            # El mtime cambio (copia, touch...): solo se reconstruye si el contenido es distinto.
+            source_hash = file_sha256(source_path)
+            if metadata.get("sha256") != source_hash:
+                rebuild_cache(source_path, cache_path, source_hash)
+            else:
+                write_manifest(cache_path, {**metadata, **fingerprint})
+    return RaceDataset(cache_path, max_bytes)
+
+
+class RaceDataset:
+    """Cache particionada por evento y ano: lo pequeno de cada evento se lee al elegirlo y cada ano
+    completo bajo demanda.
+
+    Los anos leidos (de cualquier evento) comparten un LRU limitado por memoria (`max_bytes`,
+    medido con memory_usage(deep=True)); el ultimo pedido se conserva aunque supere el limite.
+    """
+
+    def __init__(self, cache_path, max_bytes=DEFAULT_PARTITION_CACHE_BYTES):
+        self.cache_path = cache_path
+        self.manifest = read_cache_metadata(cache_path)
+        self.max_bytes = max_bytes
+        self._partitions = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def events(self):
+        return sorted(self.manifest["events"])
+
+    def location(self, event):
+        return self.manifest["events"].get(event, {}).get("location", "")
+
+    def year_info(self, event):
+        return self.manifest["events"].get(event, {}).get("years", {})
+
+    def years(self, event):
+        return sorted(int(year) for year in self.year_info(event))
+
+    def runner_names(self, event):
+        """runner_name de cada fila del evento, con los anos en orden: una sola columna por ano. Sus
+        posiciones son las que guarda RunnerIndex y las que recibe runner_rows."""
+        names = [
+            pd.read_parquet(partition_path(self.cache_path, event, year), columns=["runner_name"])["runner_name"]
+            for year in self.years(event)
+        ]
+        if not names:
+            return pd.Series(dtype="object")
+        return pd.concat([column.astype("object") for column in names], ignore_index=True)
+
+    def runner_rows(self, event, positions):
+        """Filas completas en las posiciones dadas de runner_names. Solo se leen los anos que las
+        contienen, y a traves del LRU, como la vista de carrera."""
+        year_info = self.year_info(event)
+        years = self.years(event)
+        starts = np.cumsum([0] + [year_info[str(year)]["rows"] for year in years])
+        positions = np.sort(np.asarray(positions, dtype=np.int64))
+        year_ids = np.searchsorted(starts, positions, side="right") - 1
+        frames = [
+            self.year_frame(event, years[year_id]).iloc[positions[year_ids == year_id] - starts[year_id]]
+            for year_id in np.unique(year_ids)
+        ]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def year_versions(self, event):
+        return {int(year): info.get("digest") for year, info in self.year_info(event).items()}
+
+    def year_runners(self, event, year):
+        # Solo las columnas de corredor del ano y sin pasar por el LRU: lo que necesitan los perfiles.
+        return pd.read_parquet(partition_path(self.cache_path, event, year), columns=RUNNER_COLUMNS)
+
+    def sync_runner_stats(self, event, stats):
+        """Pone al dia `stats` (RunnerStats) con los anos del evento: solo se leen y se suman con
+        add_year los anos nuevos o con otra huella, y se quitan los que ya no estan."""
+        versions = self.year_versions(event)
+        for year in set(stats.year_versions) - set(versions):
+            stats.remove_year(year)
+        changed = [
+            year
+            for year, version in sorted(versions.items())
+            if year not in stats.year_versions or stats.year_versions[year] != version
+        ]
+        stats.add_years((year, self.year_runners(event, year), versions[year]) for year in changed)
+        return stats
+
+    def rollups(self, event):
+        path = event_path(self.cache_path, event)
+        return pd.read_parquet(path / SUMMARY_FILE), pd.read_parquet(path / HISTOGRAM_FILE)
+
+    def cached_partitions(self):
+        with self._lock:
+            return list(self._partitions)
+
+    def year_frame(self, event, year):
+        key = (event, int(year))
+        with self._lock:
+            if key in self._partitions:
+                self._partitions.move_to_end(key)
+                return self._partitions[key][0]
+
+        path = partition_path(self.cache_path, *key)
+        if not path.exists():
+            return pd.DataFrame()
+        df = pd.read_parquet(path, memory_map=True)
+        size = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            if key not in self._partitions:
+                self._partitions[key] = (df, size)
+                self._cached_bytes += size
+            self._partitions.move_to_end(key)
+            while self._cached_bytes > self.max_bytes and len(self._partitions) > 1:
+                _, (_, evicted_size) = self._partitions.popitem(last=False)
+                self._cached_bytes -= evicted_size
+            return self._partitions[key][0]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Genera la cache columnar (Parquet) que usa el dashboard."
+    )
+    parser.add_argument(
+        "--input",
+        default="data/salidas.json",
+        help="Ruta a los resultados (JSON, NDJSON o msgpack, con o sin gzip/zstd).",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Directorio de la cache (por defecto, junto al JSON con extension .parquet).",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    source_path = Path(args.input)
+    if not source_path.exists():
+        raise FileNotFoundError(f"No existe el archivo: {source_path}")
+
+    cache_path = Path(args.output) if args.output else cache_path_for(source_path)
+    started = time.perf_counter()
+    df = rebuild_cache(source_path, cache_path)
+    elapsed = time.perf_counter() - started
+    events = df["evento"].nunique()
+    races = len(df.dropna(subset=["year"]).groupby(["evento", "year"], observed=True))
+    print(f"Cache generada: {cache_path} ({len(df)} filas, {events} eventos, {races} carreras, en {elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
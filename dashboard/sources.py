@@ -0,0 +1,306 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from race_core.competitions import DEFAULT_EVENT
+from race_core.db import ConnectionPool
+from race_core.parsers import detect_gender, fold_name, map_age_group, normalize_category_base
+from race_core.rollups import ALL, HISTOGRAM_COLUMNS, PERCENTILE_COLUMNS, SUMMARY_COLUMNS, fetch_rows
+from race_core.runner_index import RunnerIndex
+from race_core.runner_stats import LEADERBOARD_COLUMNS, RunnerStats
+from race_core.sketches import TimeSketch, build_sketches
+
+
+RUNNER_SEARCH_LIMIT = 50
+RACE_RESULTS_PAGE_SIZE = 100
+RACE_RESULTS_COLUMNS = ["puesto", "dorsal", "runner_name", "categoria", "time_seconds", "pace_seconds"]
+LEADERBOARD_ORDER_SQL = {
+    "mean": "mean_seconds",
+    "best": "best_seconds",
+    "pace": "mean_pace_seconds",
+    "trend": "trend_seconds",
+}
+RUNNER_STATS_SELECT = (
+    "CONCAT_WS(' ', first_name, last_name) AS runner, sex, races, best_seconds, mean_seconds, "
+    "mean_pace_seconds, trend_seconds"
+)
+HISTORY_COLUMNS = ["year", "time_seconds", "pace_seconds", "puesto", "gender", "age_group"] + PERCENTILE_COLUMNS
+
+
+class FrameSource:
+    """Datos en memoria de un evento: las tablas resumen, el indice de corredores y los perfiles.
+
+    Las filas completas (la clasificacion de un ano, el historial de un corredor) se piden a
+    `dataset` (RaceDataset) solo cuando hacen falta; sin `dataset` salen de `df`.
+    """
+
+    def __init__(
+        self, df, summary, histogram, runner_index=None, sketches=None, runner_stats=None, dataset=None,
+        event=DEFAULT_EVENT,
+    ):
+        self.df = df
+        self.event = event
+        self.dataset = dataset
+        self.summary = summary
+        self.runner_index = runner_index if runner_index is not None else RunnerIndex.from_names(df["runner_name"])
+        self.sketches = sketches if sketches is not None else build_sketches(histogram)
+        self.runner_stats = (
+            runner_stats if runner_stats is not None
+            else RunnerStats.from_frame(df, self.runner_index.row_keys(len(df)))
+        )
+
+    def years(self):
+        return sorted(self.summary["year"].unique().tolist())
+
+    def race_summary(self, year):
+        return self.summary[self.summary["year"] == year]
+
+    def time_sketch(self, year, gender=ALL, age_group=ALL):
+        return self.sketches.get((int(year), gender, age_group))
+
+    def race_rows(self, year, gender, age_group):
+        year_df = self.dataset.year_frame(self.event, year) if self.dataset is not None else self.df
+        if year_df.empty:
+            return year_df
+        mask = (year_df["year"] == year) & year_df["time_seconds"].notna()
+        if gender != ALL:
+            mask &= year_df["gender"] == gender
+        if age_group != ALL:
+            mask &= year_df["age_group"] == age_group
+        return year_df[mask]
+
+    def race_results(self, year, gender=ALL, age_group=ALL, limit=RACE_RESULTS_PAGE_SIZE, offset=0):
+        # Mismo orden que MariaDBSource (puesto y, a igual puesto, orden de carga).
+        rows = self.race_rows(year, gender, age_group)
+        if rows.empty:
+            return pd.DataFrame(columns=RACE_RESULTS_COLUMNS)
+        columns = [column for column in RACE_RESULTS_COLUMNS if column in rows.columns]
+        return rows[columns].sort_values("puesto", kind="stable").iloc[offset:offset + limit]
+
+    def race_results_count(self, year, gender=ALL, age_group=ALL):
+        return len(self.race_rows(year, gender, age_group))
+
+    def search_runners(self, query):
+        return self.runner_index.search(query, RUNNER_SEARCH_LIMIT)
+
+    def runner_history(self, runner_key):
+        # Solo las filas del corredor (offsets del indice), sin recorrer la columna entera: con
+        # `dataset`, de los anos en los que ha corrido.
+        rows = self.runner_index.rows(runner_key)
+        runner_df = self.dataset.runner_rows(self.event, rows) if self.dataset is not None else self.df.iloc[rows]
+        if runner_df.empty:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        return runner_df.dropna(subset=["year"]).sort_values("year")[HISTORY_COLUMNS]
+
+    def runner_profile(self, runner_key):
+        return self.runner_stats.profile(runner_key)
+
+    def leaderboard(self, metric, limit, min_races=1):
+        return self.runner_stats.leaderboard(metric, limit, min_races)
+
+
+@st.cache_resource
+def get_pool():
+    # Un solo pool por proceso de Streamlit: los reruns reutilizan las conexiones abiertas.
+    return ConnectionPool(size=int(os.getenv("DB_POOL_SIZE", "4")))
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def run_query(sql, params=None):
+    with get_pool().connection() as connection, connection.cursor() as cursor:
+        return pd.DataFrame(fetch_rows(cursor, sql, params))
+
+
+class MariaDBSource:
+    """Consultas a MariaDB sobre un evento: filtros y agregados se resuelven en SQL por indice, y
+    cada consulta se limita a las carreras del evento (uq_races_event_year)."""
+
+    def __init__(self, event=DEFAULT_EVENT):
+        self.event = event
+
+    @staticmethod
+    def events():
+        events = run_query("SELECT DISTINCT event FROM races ORDER BY event")
+        return events["event"].tolist() if not events.empty else []
+
+    def years(self):
+        years = run_query("SELECT DISTINCT year FROM race_summary WHERE event = %s ORDER BY year", (self.event,))
+        return years["year"].tolist() if not years.empty else []
+
+    def race_summary(self, year):
+        summary = run_query(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM race_summary WHERE event = %s AND year = %s",
+            (self.event, year),
+        )
+        return summary if not summary.empty else pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    def time_sketch(self, year, gender=ALL, age_group=ALL):
+        # Solo los bins del grupo (race_time_histogram), nunca los resultados individuales.
+        histogram = run_query(
+            f"""
+            SELECT {', '.join(HISTOGRAM_COLUMNS)}
+            FROM race_time_histogram
+            WHERE event = %s AND year = %s AND gender = %s AND age_group = %s
+            ORDER BY bin_start_seconds
+            """,
+            (self.event, year, gender, age_group),
+        )
+        return TimeSketch.from_bins(histogram) if not histogram.empty else None
+
+    def race_filters(self, year, gender, age_group):
+        # Filtra con las columnas gender/age_group de results (indice idx_results_race_group_time),
+        # que el importador rellena con las mismas reglas que las tablas resumen.
+        filters = ""
+        params = [self.event, year]
+        if gender != ALL:
+            filters += " AND r.gender = %s"
+            params.append(gender)
+        if age_group != ALL:
+            filters += " AND r.age_group = %s"
+            params.append(age_group)
+        return filters, params
+
+    def race_results(self, year, gender=ALL, age_group=ALL, limit=RACE_RESULTS_PAGE_SIZE, offset=0):
+        # Una pagina de la clasificacion: el orden (puesto, id) es estable, asi que las paginas no se
+        # solapan ni dejan huecos.
+        filters, params = self.race_filters(year, gender, age_group)
+        results = run_query(
+            f"""
+            SELECT
+                r.position AS puesto,
+                r.bib_number AS dorsal,
+                CONCAT_WS(' ', ru.first_name, ru.last_name) AS runner_name,
+                r.category_code AS categoria,
+                r.time_seconds,
+                r.time_seconds / (r.distance_m / 1000) AS pace_seconds
+            FROM results r
+            JOIN races ra ON ra.id = r.race_id
+            JOIN runners ru ON ru.id = r.runner_id
+            WHERE ra.event = %s AND ra.year = %s AND r.time_seconds IS NOT NULL{filters}
+            ORDER BY r.position, r.id
+            LIMIT %s OFFSET %s
+            """,
+            (*params, limit, offset),
+        )
+        if results.empty:
+            return pd.DataFrame(columns=RACE_RESULTS_COLUMNS)
+        return results.astype({"time_seconds": "float64", "pace_seconds": "float64"})
+
+    def race_results_count(self, year, gender=ALL, age_group=ALL):
+        filters, params = self.race_filters(year, gender, age_group)
+        count = run_query(
+            f"""
+            SELECT COUNT(*) AS total
+            FROM results r
+            JOIN races ra ON ra.id = r.race_id
+            WHERE ra.event = %s AND ra.year = %s AND r.time_seconds IS NOT NULL{filters}
+            """,
+            tuple(params),
+        )
+        return int(count["total"].iloc[0]) if not count.empty else 0
+
+    def search_runners(self, query):
+        # Cada termino debe ser el principio de alguna palabra del nombre o de los apellidos, como los
+        # primeros resultados de RunnerIndex: "perez" encuentra a los Perez. Cada termino es un rango
+        # de la clave primaria de runner_tokens (y del indice (runner_id, token) para los siguientes),
+        # y el evento se comprueba con idx_results_runner_race, sin recorrer runners.
+        terms = list(dict.fromkeys(fold_name(query).split()))
+        if not terms:
+            return []
+        term_joins = "".join(
+            f"\n            JOIN runner_tokens t{position} ON t{position}.runner_id = t0.runner_id"
+            f" AND t{position}.token LIKE %s"
+            for position in range(1, len(terms))
+        )
+        runners = run_query(
+            f"""
+            SELECT DISTINCT ru.first_name, ru.last_name
+            FROM runner_tokens t0{term_joins}
+            JOIN runners ru ON ru.id = t0.runner_id
+            JOIN results r ON r.runner_id = t0.runner_id
+            JOIN races ra ON ra.id = r.race_id
+            WHERE t0.token LIKE %s AND ra.event = %s
+            ORDER BY ru.first_name, ru.last_name
+            LIMIT %s
+            """,
+            (*(f"{term}%" for term in terms[1:]), f"{terms[0]}%", self.event, RUNNER_SEARCH_LIMIT),
+        )
+        return [
+            (f"{row.first_name} {row.last_name}".strip(), (row.first_name, row.last_name))
+            for row in runners.itertuples(index=False)
+        ]
+
+    def runner_history(self, runner_key):
+        first_name, last_name = runner_key
+        history = run_query(
+            """
+            SELECT
+                ra.year,
+                r.time_seconds,
+                r.time_seconds / (r.distance_m / 1000) AS pace_seconds,
+                r.position AS puesto,
+                ru.sex,
+                r.category_code,
+                r.pct_overall,
+                r.pct_gender,
+                r.pct_age_group
+            FROM runners ru
+            JOIN results r ON r.runner_id = ru.id
+            JOIN races ra ON ra.id = r.race_id
+            WHERE ru.first_name = %s AND ru.last_name = %s AND ra.event = %s
+            ORDER BY ra.year
+            """,
+            (first_name, last_name, self.event),
+        )
+        if history.empty:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        # Mismas reglas que refresh_rollups, para que el grupo coincida con race_time_histogram.
+        history["gender"] = [
+            detect_gender(sex, category) for sex, category in zip(history["sex"], history["category_code"])
+        ]
+        history["age_group"] = history["category_code"].map(
+            lambda category: map_age_group(normalize_category_base(category))
+        )
+        numeric = {column: "float64" for column in ["time_seconds", "pace_seconds"] + PERCENTILE_COLUMNS}
+        return history.astype(numeric)[HISTORY_COLUMNS]
+
+    def runner_profile(self, runner_key):
+        # Una fila de runner_stats por clave primaria, con los atributos de RunnerProfile que usa la
+        # vista (races, best_seconds, mean_seconds, mean_pace_seconds, trend_seconds, gender).
+        first_name, last_name = runner_key
+        profile = run_query(
+            f"""
+            SELECT {RUNNER_STATS_SELECT}
+            FROM runner_stats
+            WHERE event = %s AND first_name = %s AND last_name = %s
+            """,
+            (self.event, first_name, last_name),
+        )
+        if profile.empty:
+            return None
+        return next(self.stats_frame(profile).itertuples(index=False))
+
+    def leaderboard(self, metric, limit, min_races=1):
+        # runner_stats ya tiene los agregados de cada corredor (los mantiene refresh_rollups): el
+        # top-N recorre el principio del indice (event, metrica) en lugar de agrupar results.
+        order = LEADERBOARD_ORDER_SQL[metric]
+        leaderboard = run_query(
+            f"""
+            SELECT {RUNNER_STATS_SELECT}
+            FROM runner_stats
+            WHERE event = %s AND races >= %s AND {order} IS NOT NULL
+            ORDER BY {order}
+            LIMIT %s
+            """,
+            (self.event, min_races, limit),
+        )
+        if leaderboard.empty:
+            return pd.DataFrame(columns=LEADERBOARD_COLUMNS)
+        return self.stats_frame(leaderboard)
+
+    @staticmethod
+    def stats_frame(stats):
+        stats["gender"] = [detect_gender(sex, None) for sex in stats["sex"]]
+        numeric = {column: "float64" for column in LEADERBOARD_COLUMNS[3:]}
+        return stats.astype(numeric)[LEADERBOARD_COLUMNS]
@@ -1,156 +1,134 @@
-import json
-import re
+import os
+import sys
+import threading
 from pathlib import Path
 
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
 
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
 
-def time_to_seconds(value):
-    if value is None:
-        return None
-    text = str(value).strip()
-    if not text:
-        return None
-    parts = text.split(":")
-    if len(parts) == 2:
-        hours = 0
-        minutes, seconds = parts
-    elif len(parts) == 3:
-        hours, minutes, seconds = parts
-    else:
-        return None
-    try:
-        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
-    except ValueError:
-        return None
+from data_store import find_source_path, open_dataset  # noqa: E402
+from race_core.competitions import DEFAULT_EVENT  # noqa: E402
+from race_core.parsers import pace_seconds_to_str, seconds_to_hms  # noqa: E402
+from race_core.rollups import ALL  # noqa: E402
+from race_core.runner_index import RunnerIndex  # noqa: E402
+from race_core.runner_stats import LEADERBOARD_METRICS, RunnerStats  # noqa: E402
+from race_core.sketches import build_sketches  # noqa: E402
+from sources import RACE_RESULTS_PAGE_SIZE, FrameSource, MariaDBSource  # noqa: E402
 
 
-def seconds_to_hms(seconds):
-    if seconds is None or pd.isna(seconds):
-        return "N/D"
-    seconds = int(seconds)
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
-
-
-def parse_distance_km(value):
-    if value is None:
-        return None
-    text = str(value).strip().upper()
-    if not text:
-        return None
-    match = re.search(r"(\d+[\.,]?\d*)", text)
-    if not match:
-        return None
-    number = match.group(1).replace(",", ".")
-    try:
-        numeric = float(number)
-    except ValueError:
-        return None
-    if "KM" in text:
-        return numeric
-    if "M" in text:
-        return numeric / 1000
-    return None
-
-
-def pace_seconds_to_str(seconds_per_km):
-    if seconds_per_km is None or pd.isna(seconds_per_km):
+@st.cache_resource
+def load_dataset():
+    # Cache Parquet particionada por evento y ano; solo se reconstruye si cambia el JSON de origen.
+    # Los anos completos se leen bajo demanda y se guardan hasta DASHBOARD_CACHE_MB en memoria.
+    return open_dataset(find_source_path(), max_bytes=int(os.getenv("DASHBOARD_CACHE_MB", "256")) << 20)
+
+
+# Todo lo que sigue se carga por evento: elegir un evento nunca lee los ficheros de los demas.
+@st.cache_resource
+def load_rollups(event):
+    # Mismo formato que race_summary / race_time_histogram en MariaDB.
+    return load_dataset().rollups(event)
+
+
+@st.cache_resource
+def load_runner_index(event):
+    # Se construye una vez por proceso con la columna de nombres de cada ano. Solo se quedan las claves
+    # y la posicion de cada fila: el historial lee las filas de los anos del corredor bajo demanda.
+    return RunnerIndex.from_names(load_dataset().runner_names(event))
+
+
+@st.cache_resource
+def load_runner_stats(event):
+    # Perfiles y rankings de corredores. Sobreviven a "Recargar datos": runner_stats solo suma los
+    # anos nuevos o cambiados del evento, sin recalcular el resto.
+    return RunnerStats(), threading.Lock()
+
+
+def runner_stats(event):
+    stats, lock = load_runner_stats(event)
+    with lock:
+        return load_dataset().sync_runner_stats(event, stats)
+
+
+@st.cache_resource
+def load_sketches(event):
+    # Histograma acumulado por (ano, genero, grupo de edad) para graficos y percentiles.
+    return build_sketches(load_rollups(event)[1])
+
+
+def use_mariadb():
+    # RACE_DATA_SOURCE=mariadb consulta la base de datos en vez de cargar el JSON entero.
+    return os.getenv("RACE_DATA_SOURCE", "").lower() == "mariadb"
+
+
+def list_events():
+    return MariaDBSource.events() if use_mariadb() else load_dataset().events()
+
+
+def load_source(event):
+    if use_mariadb():
+        return MariaDBSource(event)
+    summary, histogram = load_rollups(event)
+    return FrameSource(
+        None,
+        summary,
+        histogram,
+        load_runner_index(event),
+        load_sketches(event),
+        runner_stats(event),
+        load_dataset(),
+        event,
+    )
+
+
+def histogram_figure(sketch, title):
+    # Una barra por bin: al navegador solo llegan los recuentos, no los tiempos de cada corredor.
+    bins = sketch.bin_starts if sketch else []
+    width = sketch.bin_seconds / 60 if sketch else 1
+    fig = go.Figure(
+        go.Bar(
+            x=[(start / 60) + width / 2 for start in bins],
+            y=sketch.counts if sketch else [],
+            width=width,
+            hovertemplate="%{x:.1f} min: %{y}<extra></extra>",
+        )
+    )
+    fig.update_layout(title=title, xaxis_title="Minutos", yaxis_title="count", bargap=0)
+    return fig
+
+
+LEADERBOARD_LABELS = {
+    "mean": "Tiempo medio",
+    "best": "Mejor tiempo",
+    "pace": "Ritmo medio",
+    "trend": "Mayor mejora por ano",
+}
+
+
+def trend_text(trend_seconds):
+    if trend_seconds is None:
         return "N/D"
-    total = int(seconds_per_km)
-    minutes = total // 60
-    secs = total % 60
-    return f"{minutes:02d}:{secs:02d} /km"
-
-
-def map_age_group(code):
-    if not code or code == "SIN_CATEGORIA":
-        return "SIN_CATEGORIA"
-    code = str(code).upper()
-    if code.startswith("JV1"):
-        return "Joven 11-15"
-    if code.startswith("JV2"):
-        return "Joven 16-19"
-    if code.startswith("SN"):
-        return "Senior 20-34"
-    if code.startswith("VTA"):
-        return "Veteranos A 35-44"
-    if code.startswith("VTB"):
-        return "Veteranos B 45-54"
-    if code.startswith("VTC"):
-        return "Veteranos C 55-64"
-    if code.startswith("VTD"):
-        return "Veteranos D 65+"
-    return "OTRA"
-
-
-def normalize_category_base(value):
-    if value is None:
-        return ""
-    text = str(value).strip().upper()
-    if not text:
-        return ""
-    text = re.sub(r"[-\s]*\d+$", "", text)
-    text = re.sub(r"[MF]$", "", text)
-    return text
-
-
-def detect_gender(sexo_value, category_value):
-    for candidate in (sexo_value, category_value):
-        if candidate is None:
-            continue
-        text = str(candidate).strip().upper()
-        match = re.search(r"\b([MF])\b", text)
-        if match:
-            return match.group(1)
-        if text.startswith("M"):
-            return "M"
-        if text.startswith("F"):
-            return "F"
-    return None
-
-
-@st.cache_data
-def load_data():
-    candidate_paths = [
-        Path("data/salidas.json"),
-        Path("..") / "data" / "salidas.json",
-        Path("../data/salidas.json"),
-    ]
-    data_path = next((p for p in candidate_paths if p.exists()), None)
-    if data_path is None:
-        raise FileNotFoundError("No se encontro data/salidas.json. Ejecuta el exportador primero.")
-
-    with data_path.open("r", encoding="utf-8") as file_handle:
-        records = json.load(file_handle)
-
-    df = pd.DataFrame(records)
-    if "categoria" not in df.columns and "categoría" in df.columns:
-        df["categoria"] = df["categoría"]
-
-    for col in ["tiempo", "sexo", "carrera", "distancia", "nombre", "apellido"]:
-        if col not in df.columns:
-            df[col] = None
-
-    df["year"] = pd.to_numeric(df["carrera"], errors="coerce")
-    df["time_seconds"] = df["tiempo"].apply(time_to_seconds)
-    df["categoria"] = df.get("categoria", pd.Series(dtype=str)).fillna("SIN_CATEGORIA")
-    df["category_raw"] = df["categoria"].astype(str).str.strip()
-    df["category_base"] = df["category_raw"].apply(normalize_category_base)
-    df["gender"] = [
-        detect_gender(sexo, cat)
-        for sexo, cat in zip(df["sexo"].tolist(), df["category_raw"].tolist())
-    ]
-    df["age_group"] = df["category_base"].apply(map_age_group)
-    df["distance_km"] = df["distancia"].apply(parse_distance_km)
-    df["pace_seconds"] = df["time_seconds"] / df["distance_km"]
-    df["runner_name"] = (df["nombre"].fillna("") + " " + df["apellido"].fillna("")).str.strip()
-
-    return df
+    sign = "-" if trend_seconds < 0 else "+"
+    return f"{sign}{seconds_to_hms(abs(trend_seconds))} /ano"
+
+
+def top_text(percentile):
+    # pct_*: fraccion de corredores mas lentos; "Top 12%" es estar entre el 12% mas rapido.
+    return "" if pd.isna(percentile) else f"Top {1.0 - percentile:.1%}"
+
+
+def percentile_groups(year, gender, age_group):
+    groups = [("Carrera", "pct_overall", (year, ALL, ALL))]
+    if isinstance(gender, str):
+        groups.append((f"Genero {gender}", "pct_gender", (year, gender, ALL)))
+        if isinstance(age_group, str):
+            groups.append((age_group, "pct_age_group", (year, gender, age_group)))
+    return groups
 
 
 st.set_page_config(page_title="Race Analysis Dashboard", layout="wide")
@@ -158,54 +136,66 @@ st.title("Race Analysis Dashboard")
 
 if st.sidebar.button("Recargar datos"):
     st.cache_data.clear()
+    load_dataset.clear()
+    load_rollups.clear()
+    load_runner_index.clear()
+    load_sketches.clear()
     st.rerun()
 
 try:
-    df = load_data()
+    events = list_events()
 except FileNotFoundError as exc:
     st.error(str(exc))
     st.stop()
 
+if not events:
+    st.warning("No hay resultados cargados.")
+    st.stop()
+
+event = st.sidebar.selectbox(
+    "Evento",
+    events,
+    index=events.index(DEFAULT_EVENT) if DEFAULT_EVENT in events else 0,
+)
+source = load_source(event)
+
 
 race_tab, runner_tab = st.tabs(["Race Analysis", "Runner Analysis"])
 
 with race_tab:
     st.subheader("Race Analysis View")
 
-    years = sorted(df["year"].dropna().astype(int).unique().tolist())
-    year = st.selectbox("Selecciona una carrera (ano)", years)
+    year = st.selectbox("Selecciona una carrera (ano)", source.years())
 
-    df_year = df[df["year"] == year].copy()
+    summary_year = source.race_summary(year)
 
-    gender_options = ["Todos"] + sorted(df_year["gender"].dropna().unique().tolist())
+    gender_options = ["Todos"] + sorted(
+        summary_year.loc[summary_year["gender"] != ALL, "gender"].unique().tolist()
+    )
     gender_choice = st.selectbox("Genero", gender_options)
 
     age_options = [
         "Todos"
     ] + sorted(
-        df_year["age_group"]
-        .dropna()
-        .loc[lambda s: ~s.isin(["OTRA", "SIN_CATEGORIA"])]
+        summary_year["age_group"]
+        .loc[lambda s: ~s.isin([ALL, "OTRA", "SIN_CATEGORIA"])]
         .unique()
         .tolist()
     )
     age_choice = st.selectbox("Grupo de edad", age_options)
 
+    gender_key = ALL if gender_choice == "Todos" else gender_choice
+    age_key = ALL if age_choice == "Todos" else age_choice
+    stats = summary_year[(summary_year["gender"] == gender_key) & (summary_year["age_group"] == age_key)]
 
-    if gender_choice != "Todos":
-        df_year = df_year[df_year["gender"] == gender_choice]
-    if age_choice != "Todos":
-        df_year = df_year[df_year["age_group"] == age_choice]
-
-    df_times = df_year.dropna(subset=["time_seconds"])
-
-    if df_times.empty:
+    if stats.empty:
         st.warning("No hay datos para los filtros seleccionados.")
     else:
-        min_time = seconds_to_hms(df_times["time_seconds"].min())
-        max_time = seconds_to_hms(df_times["time_seconds"].max())
-        mean_time = seconds_to_hms(df_times["time_seconds"].mean())
-        median_time = seconds_to_hms(df_times["time_seconds"].median())
+        stats = stats.iloc[0]
+        min_time = seconds_to_hms(stats["min_seconds"])
+        max_time = seconds_to_hms(stats["max_seconds"])
+        mean_time = seconds_to_hms(stats["mean_seconds"])
+        median_time = seconds_to_hms(stats["median_seconds"])
 
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Min", min_time)
@@ -213,53 +203,134 @@ with race_tab:
         col3.metric("Media", mean_time)
         col4.metric("Mediana", median_time)
 
-        df_times = df_times.assign(time_minutes=df_times["time_seconds"] / 60)
-        fig = px.histogram(
-            df_times,
-            x="time_minutes",
-            nbins=40,
-            title="Distribucion de tiempos (minutos)",
-            labels={"time_minutes": "Minutos"},
+        fig = histogram_figure(
+            source.time_sketch(year, gender_key, age_key),
+            "Distribucion de tiempos (minutos)",
         )
         st.plotly_chart(fig, use_container_width=True)
 
+        with st.expander("Clasificacion"):
+            # Las filas completas del ano se leen al abrirlo por primera vez (cache por ano); con
+            # MariaDB cada pagina es una consulta con LIMIT/OFFSET.
+            total = source.race_results_count(year, gender_key, age_key)
+            pages = max(1, -(-total // RACE_RESULTS_PAGE_SIZE))
+            # La clave incluye los filtros: al cambiarlos se vuelve a la primera pagina.
+            page = st.number_input(
+                "Pagina", min_value=1, max_value=pages, value=1, step=1,
+                key=f"race-page-{event}-{year}-{gender_key}-{age_key}",
+            )
+            st.caption(f"{total:,} corredores, pagina {page} de {pages}")
+            results = source.race_results(
+                year, gender_key, age_key, RACE_RESULTS_PAGE_SIZE, (int(page) - 1) * RACE_RESULTS_PAGE_SIZE
+            )
+            st.dataframe(
+                pd.DataFrame(
+                    {
+                        "Puesto": results["puesto"],
+                        "Dorsal": results["dorsal"],
+                        "Corredor": results["runner_name"],
+                        "Categoria": results["categoria"],
+                        "Tiempo": results["time_seconds"].apply(seconds_to_hms),
+                        "Ritmo": results["pace_seconds"].apply(pace_seconds_to_str),
+                    }
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
+
 
 with runner_tab:
     st.subheader("Runner Analysis View")
 
-    runners = sorted(df["runner_name"].dropna().unique().tolist())
-    runner = st.selectbox("Selecciona un corredor", runners)
+    with st.expander("Mejores corredores"):
+        col1, col2 = st.columns(2)
+        metric = col1.selectbox(
+            "Ordenar por", LEADERBOARD_METRICS, format_func=lambda name: LEADERBOARD_LABELS[name]
+        )
+        min_races = col2.number_input("Carreras minimas", min_value=1, max_value=20, value=2)
+        leaders = source.leaderboard(metric, 20, int(min_races))
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Corredor": leaders["runner"],
+                    "Genero": leaders["gender"],
+                    "Carreras": leaders["races"],
+                    "Mejor": leaders["best_seconds"].apply(seconds_to_hms),
+                    "Media": leaders["mean_seconds"].apply(seconds_to_hms),
+                    "Ritmo": leaders["mean_pace_seconds"].apply(pace_seconds_to_str),
+                    "Tendencia": leaders["trend_seconds"].apply(trend_text),
+                }
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    query = st.text_input("Buscar corredor (nombre y apellidos)")
+    matches = source.search_runners(query)
+    runner = st.selectbox(
+        "Selecciona un corredor",
+        matches,
+        format_func=lambda match: match[0],
+    )
 
-    runner_df = df[df["runner_name"] == runner].copy()
-    runner_df = runner_df.dropna(subset=["year"]).sort_values("year")
+    runner_df = source.runner_history(runner[1]).copy() if runner else None
 
-    if runner_df.empty:
+    if not query.strip():
+        st.info("Escribe parte del nombre o los apellidos (sin importar tildes ni mayusculas).")
+    elif runner_df is None or runner_df.empty:
         st.warning("No hay datos para el corredor seleccionado.")
     else:
+        profile = source.runner_profile(runner[1])
+        if profile is not None:
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Carreras", profile.races)
+            col2.metric("Mejor", seconds_to_hms(profile.best_seconds))
+            col3.metric("Media", seconds_to_hms(profile.mean_seconds))
+            col4.metric("Tendencia", trend_text(profile.trend_seconds))
+
         runner_df["finish_time"] = runner_df["time_seconds"].apply(seconds_to_hms)
         runner_df["pace"] = runner_df["pace_seconds"].apply(pace_seconds_to_str)
-
-        table = runner_df[["year", "finish_time", "pace", "puesto"]].rename(
-            columns={"year": "Ano", "finish_time": "Tiempo", "puesto": "Puesto"}
+        table = pd.DataFrame(
+            {
+                "Ano": runner_df["year"],
+                "Tiempo": runner_df["finish_time"],
+                "pace": runner_df["pace"],
+                "Puesto": runner_df["puesto"],
+                "Carrera": runner_df["pct_overall"].apply(top_text),
+                "Genero": runner_df["pct_gender"].apply(top_text),
+                "Grupo de edad": runner_df["pct_age_group"].apply(top_text),
+            }
         )
         st.dataframe(table, use_container_width=True)
 
         race_years = runner_df["year"].dropna().astype(int).tolist()
         race_year = st.selectbox("Ver detalles de la carrera", race_years)
 
-        race_df = df[df["year"] == race_year].dropna(subset=["time_seconds"]).copy()
         runner_race = runner_df[runner_df["year"] == race_year].dropna(subset=["time_seconds"]).head(1)
 
         if runner_race.empty:
             st.warning("No hay tiempo registrado para este corredor en esa carrera.")
         else:
-            runner_time = runner_race.iloc[0]["time_seconds"]
-            fig = px.histogram(
-                race_df.assign(time_minutes=race_df["time_seconds"] / 60),
-                x="time_minutes",
-                nbins=40,
-                title=f"Distribucion de tiempos en {race_year}",
-                labels={"time_minutes": "Minutos"},
+            runner_row = runner_race.iloc[0]
+            runner_time = runner_row["time_seconds"]
+
+            # Percentiles precalculados del resultado; si faltan (base sin recalcular), se estiman con
+            # el histograma acumulado del grupo (O(log bins)).
+            percentiles = []
+            for label, column, key in percentile_groups(race_year, runner_row["gender"], runner_row["age_group"]):
+                percentile = runner_row[column]
+                if pd.isna(percentile):
+                    sketch = source.time_sketch(*key)
+                    percentile = 1.0 - sketch.rank_fraction(runner_time) if sketch and sketch.total else None
+                if percentile is not None:
+                    percentiles.append((label, percentile))
+            if percentiles:
+                for column, (label, percentile) in zip(st.columns(len(percentiles)), percentiles):
+                    column.metric(label, top_text(percentile))
+
+            fig = histogram_figure(
+                source.time_sketch(race_year),
+                f"Distribucion de tiempos en {race_year}",
             )
             fig.add_vline(x=runner_time / 60, line_color="red", line_width=2)
             st.plotly_chart(fig, use_container_width=True)
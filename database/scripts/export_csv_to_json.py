@@ -1,44 +1,102 @@
 import argparse
-import csv
+import io
 import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-
-def normalize_header(header):
-    if header == "categoría":
-        return "categoria"
-    return header
-
-
-def to_int_or_value(value):
-    if value is None:
-        return value
-    value = value.strip()
-    if value == "":
-        return value
-    try:
-        return int(value)
-    except ValueError:
-        return value
-
-
-def normalize_row(row):
-    normalized = {}
-    for key, value in row.items():
-        clean_key = normalize_header(key.strip())
-        clean_value = value.strip() if value is not None else ""
-        normalized[clean_key] = clean_value
-
-    for key in ("puesto", "dorsal", "carrera"):
-        if key in normalized:
-            normalized[key] = to_int_or_value(normalized[key])
-
-    return normalized
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from race_core.formats import COMPRESSIONS, FORMATS, compress_bytes, require_msgpack  # noqa: E402
+from race_core.records import iter_csv_records  # noqa: E402
+
+
+DEFAULT_CHUNK_ROWS = 20000
+# json.dumps con argumentos crea un encoder nuevo en cada llamada; estos se reutilizan.
+COMPACT_ENCODER = json.JSONEncoder(ensure_ascii=False)
+INDENT_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+
+def iter_csv_chunks(file_handle, chunk_rows):
+    # Bloques de lineas enteras del CSV. Solo se corta donde las comillas estan cerradas, para no
+    # partir un campo entrecomillado con saltos de linea.
+    header = file_handle.readline()
+    lines = []
+    quotes = 0
+    for line in file_handle:
+        lines.append(line)
+        quotes += line.count('"')
+        if len(lines) >= chunk_rows and quotes % 2 == 0:
+            yield header, "".join(lines)
+            lines = []
+            quotes = 0
+    if lines:
+        yield header, "".join(lines)
+
+
+def encode_chunk(task):
+    """Parsea un bloque del CSV y lo devuelve ya serializado (y comprimido) en el formato pedido."""
+    header, text, record_format, compression, first = task
+    records = [record.as_dict() for record in iter_csv_records(io.StringIO(header + text))]
+
+    if record_format == "json":
+        # Mismo texto que json.dump(..., indent=2) del array entero; el primer bloque no lleva la
+        # coma inicial.
+        parts = ["\n  " + INDENT_ENCODER.encode(record).replace("\n", "\n  ") for record in records]
+        data = (("" if first else ",") + ",".join(parts)).encode("utf-8")
+    elif record_format == "ndjson":
+        data = "".join(COMPACT_ENCODER.encode(record) + "\n" for record in records).encode("utf-8")
+    else:
+        packer = require_msgpack().Packer()
+        data = b"".join(packer.pack(record) for record in records)
+
+    return compress_bytes(data, compression), len(records)
+
+
+def map_ordered(function, tasks, workers):
+    # Como executor.map, pero con pocos bloques en vuelo: el CSV no se carga entero en memoria.
+    if workers <= 1:
+        yield from map(function, tasks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, task))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def export(input_path, output_path, record_format="json", compression="none", workers=1, chunk_rows=DEFAULT_CHUNK_ROWS):
+    count = 0
+    with input_path.open("r", encoding="utf-8-sig", newline="") as input_handle, output_path.open(
+        "wb"
+    ) as output_handle:
+        if record_format == "json":
+            output_handle.write(compress_bytes(b"[", compression))
+
+        tasks = (
+            (header, text, record_format, compression, index == 0)
+            for index, (header, text) in enumerate(iter_csv_chunks(input_handle, chunk_rows))
+        )
+        for data, rows in map_ordered(encode_chunk, tasks, workers):
+            output_handle.write(data)
+            count += rows
+
+        if record_format == "json":
+            output_handle.write(compress_bytes(b"\n]" if count else b"]", compression))
+    return count
 
 
 def parse_args():
     parser = argparse.ArgumentParser(
-        description="Convierte el CSV de resultados a JSON para respaldo."
+        description="Convierte el CSV de resultados a JSON, NDJSON o msgpack (opcionalmente comprimido)."
     )
     parser.add_argument(
         "--input",
@@ -48,7 +106,31 @@ def parse_args():
     parser.add_argument(
         "--output",
         default="data/salidas.json",
-        help="Ruta al JSON de salida.",
+        help="Ruta al fichero de salida.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="json: array indentado (por defecto); ndjson: un registro por linea; msgpack: binario.",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default="none",
+        help="Comprime la salida con gzip o zstd (los lectores lo detectan solos).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos que parsean y serializan bloques del CSV en paralelo.",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help="Filas del CSV por bloque.",
     )
     return parser.parse_args()
 
@@ -63,14 +145,16 @@ def main():
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with input_path.open("r", encoding="utf-8-sig", newline="") as file_handle:
-        reader = csv.DictReader(file_handle)
-        records = [normalize_row(row) for row in reader]
+    started = time.perf_counter()
+    count = export(input_path, output_path, args.format, args.compress, args.workers, args.chunk_rows)
+    elapsed = time.perf_counter() - started
 
-    with output_path.open("w", encoding="utf-8") as file_handle:
-        json.dump(records, file_handle, ensure_ascii=False, indent=2)
-
-    print(f"JSON generado: {output_path} ({len(records)} registros)")
+    size_mib = output_path.stat().st_size / (1 << 20)
+    rate = count / elapsed if elapsed else 0
+    print(
+        f"{args.format.upper()} generado: {output_path} "
+        f"({count} registros, {size_mib:.2f} MiB, {rate:,.0f} registros/s)"
+    )
 
 
 if __name__ == "__main__":
@@ -1,173 +1,229 @@
 import argparse
 import json
-import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
 
 import pymysql
 
-
-REQUIRED_FIELDS = ("carrera", "nombre", "apellido", "sexo", "puesto")
-
-
-def parse_distance_to_meters(distance_text):
-    if not distance_text:
-        return None
-
-    text = distance_text.strip().upper()
-    if text.startswith("KM"):
-        number = text.replace("KM", "").strip().replace(",", ".")
-        try:
-            return int(float(number) * 1000)
-        except ValueError:
-            return None
-
-    if "M" in text:
-        number = text.replace("M", "").strip().replace(",", ".")
-        try:
-            return int(float(number))
-        except ValueError:
-            return None
-
-    return None
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from race_core.db import get_connection  # noqa: E402
+from race_core.formats import iter_ndjson, iter_records  # noqa: E402
+from race_core.loader import (  # noqa: E402
+    RESULT_UPSERT_SQL,
+    load_runner_cache,
+    prepare_record,
+    race_key,
+    record_fingerprint,
+    refresh_rollups,
+    resolve_race_id,
+    resolve_runner_ids,
+    result_row,
+    runner_key,
+    upsert_race,
+    upsert_result,
+    upsert_runner,
+    validate_item,
+    write_results_batch,
+)
+from race_core.parsers import to_int_or_none  # noqa: E402
+
+
+DEADLOCK_ERROR = 1213
+MAX_SHARD_ATTEMPTS = 3
+
+
+def iter_valid_records(records, counters):
+    for item in records:
+        is_valid, reason = validate_item(item)
+        if not is_valid:
+            counters["skipped"] += 1
+            if counters["skipped"] <= 5:
+                print(f"Registro omitido ({reason}): {item}")
+            continue
+        counters["races"].add(race_key(item))
+        yield item
+
+
+def load_result_hashes(cursor, event, year):
+    cursor.execute(
+        """
+        SELECT r.position, r.record_hash
+        FROM results r
+        JOIN races ra ON ra.id = r.race_id
+        WHERE ra.event = %s AND ra.year = %s
+        """,
+        (event, year),
+    )
+    return dict(cursor.fetchall())
+
+
+def iter_changed_records(connection, records, counters):
+    # Las huellas existentes se leen una vez por carrera, la primera vez que aparece.
+    known_hashes = {}
+    with connection.cursor() as cursor:
+        for item in records:
+            key = race_key(item)
+            hashes = known_hashes.get(key)
+            if hashes is None:
+                hashes = known_hashes[key] = load_result_hashes(cursor, *key)
+
+            if hashes.get(to_int_or_none(item.get("puesto"))) == record_fingerprint(item):
+                counters["unchanged"] += 1
+                continue
+            yield item
+
+
+def iter_batches(items, batch_size):
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_row_by_row(connection, records, batch_size, counters):
+    with connection.cursor() as cursor:
+        for item in iter_valid_records(records, counters):
+            record = prepare_record(item)
+
+            race_id = upsert_race(
+                cursor,
+                record["event"],
+                record["year"],
+                record["location"],
+                record["distance_text"],
+                record["distance_m"],
+            )
+            runner_id = upsert_runner(cursor, *record["runner_key"])
+
+            upsert_result(
+                cursor,
+                race_id,
+                runner_id,
+                record["position"],
+                record["bib_number"],
+                record["category_code"],
+                record["time_text"],
+                record["time_seconds"],
+                record["distance_text"],
+                record["distance_m"],
+                record["record_hash"],
+                record["gender"],
+                record["age_group"],
+            )
+
+            counters["inserted"] += 1
+
+            if counters["inserted"] % batch_size == 0:
+                connection.commit()
+
+        connection.commit()
+
+
+def import_bulk(connection, records, batch_size, counters):
+    with connection.cursor() as cursor:
+        # Las carreras (evento, ano) se resuelven una vez por ejecucion (actualizando su distancia);
+        # los corredores existentes se precargan para no consultar fila a fila.
+        race_cache = {}
+        runner_cache = load_runner_cache(cursor)
+
+        for batch in iter_batches(iter_valid_records(records, counters), batch_size):
+            counters["inserted"] += write_results_batch(cursor, race_cache, runner_cache, batch)
+            connection.commit()
 
 
-def parse_time_to_seconds(time_text):
-    if not time_text:
-        return None
+def shard_name(event, year):
+    return f"{event}.{year}.ndjson"
 
-    parts = time_text.strip().split(":")
-    if len(parts) == 2:
-        minutes, seconds = parts
-        hours = 0
-    elif len(parts) == 3:
-        hours, minutes, seconds = parts
-    else:
-        return None
 
+def shard_records(connection, records, shard_dir, batch_size, counters):
+    # Pre-paso en un solo proceso y en orden estable: crea carreras y corredores antes de
+    # lanzar los workers, que asi solo insertan en results y no compiten por las claves unicas.
+    shards = {}
+    race_cache = {}
     try:
-        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
-    except ValueError:
-        return None
-
-
-def to_int_or_none(value):
-    if value is None:
-        return None
+        with connection.cursor() as cursor:
+            runner_cache = load_runner_cache(cursor)
+            for batch in iter_batches(iter_valid_records(records, counters), batch_size):
+                resolve_runner_ids(cursor, runner_cache, [runner_key(item) for item in batch])
+                for item in batch:
+                    key = race_key(item)
+                    if key not in race_cache:
+                        resolve_race_id(cursor, race_cache, prepare_record(item))
+
+                    shard = shards.get(key)
+                    if shard is None:
+                        shard = shards[key] = (shard_dir / shard_name(*key)).open("w", encoding="utf-8")
+                    entry = {
+                        "race_id": race_cache[key],
+                        "runner_id": runner_cache[runner_key(item)],
+                        "item": item,
+                    }
+                    shard.write(json.dumps(entry, ensure_ascii=False))
+                    shard.write("\n")
+            connection.commit()
+    finally:
+        for shard in shards.values():
+            shard.close()
 
-    if isinstance(value, int):
-        return value
+    return [shard_dir / shard_name(*key) for key in sorted(shards)]
 
-    text = str(value).strip()
-    if text == "":
-        return None
 
+def load_shard(connection, shard_path, batch_size):
+    inserted = 0
+    with connection.cursor() as cursor, shard_path.open("r", encoding="utf-8") as file_handle:
+        for batch in iter_batches(iter_ndjson(file_handle), batch_size):
+            rows = [
+                result_row(entry["race_id"], entry["runner_id"], prepare_record(entry["item"]))
+                for entry in batch
+            ]
+            cursor.executemany(RESULT_UPSERT_SQL, rows)
+            inserted += len(rows)
+    connection.commit()
+    return inserted
+
+
+def import_year_shard(shard_path, batch_size):
+    connection = get_connection()
     try:
-        return int(text)
-    except ValueError:
-        return None
-
-
-def validate_item(item):
-    missing = [field for field in REQUIRED_FIELDS if not item.get(field)]
-    if missing:
-        return False, f"Campos obligatorios vacios: {', '.join(missing)}"
-
-    if to_int_or_none(item.get("carrera")) is None:
-        return False, "Carrera no es un ano valido"
-
-    if to_int_or_none(item.get("puesto")) is None:
-        return False, "Puesto no es un numero valido"
+        with connection.cursor() as cursor:
+            # Sin gap locks entre workers que escriben rangos contiguos de uq_results_race_position.
+            cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+
+        for attempt in range(1, MAX_SHARD_ATTEMPTS + 1):
+            try:
+                return load_shard(connection, shard_path, batch_size)
+            except pymysql.err.OperationalError as exc:
+                connection.rollback()
+                if exc.args[0] != DEADLOCK_ERROR or attempt == MAX_SHARD_ATTEMPTS:
+                    raise
+    finally:
+        connection.close()
 
-    return True, ""
 
+def import_parallel(connection, records, batch_size, workers, counters):
+    with tempfile.TemporaryDirectory(prefix="race_shards_") as tmp_dir:
+        shard_paths = shard_records(connection, records, Path(tmp_dir), batch_size, counters)
+        # Las carreras mas grandes primero para repartir mejor el trabajo entre procesos.
+        shard_paths.sort(key=lambda path: path.stat().st_size, reverse=True)
 
-def get_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=int(os.getenv("DB_PORT", "3306")),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASSWORD", ""),
-        database=os.getenv("DB_NAME", "race_results"),
-        charset="utf8mb4",
-        autocommit=False,
-    )
-
-
-def upsert_race(cursor, year, location, distance_text, distance_m):
-    cursor.execute(
-        """
-        INSERT INTO races (year, location, distance_text, distance_m)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            id = LAST_INSERT_ID(id),
-            distance_text = VALUES(distance_text),
-            distance_m = VALUES(distance_m)
-        """,
-        (year, location, distance_text, distance_m),
-    )
-    return cursor.lastrowid
-
-
-def upsert_runner(cursor, first_name, last_name, sex):
-    cursor.execute(
-        """
-        INSERT INTO runners (first_name, last_name, sex)
-        VALUES (%s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            id = LAST_INSERT_ID(id)
-        """,
-        (first_name, last_name, sex),
-    )
-    return cursor.lastrowid
-
-
-def upsert_result(
-    cursor,
-    race_id,
-    runner_id,
-    position,
-    bib_number,
-    category_code,
-    time_text,
-    time_seconds,
-    distance_text,
-    distance_m,
-):
-    cursor.execute(
-        """
-        INSERT INTO results (
-            race_id,
-            runner_id,
-            position,
-            bib_number,
-            category_code,
-            time_text,
-            time_seconds,
-            distance_text,
-            distance_m
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            runner_id = VALUES(runner_id),
-            bib_number = VALUES(bib_number),
-            category_code = VALUES(category_code),
-            time_text = VALUES(time_text),
-            time_seconds = VALUES(time_seconds),
-            distance_text = VALUES(distance_text),
-            distance_m = VALUES(distance_m)
-        """,
-        (
-            race_id,
-            runner_id,
-            position,
-            bib_number,
-            category_code,
-            time_text,
-            time_seconds,
-            distance_text,
-            distance_m,
-        ),
-    )
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(import_year_shard, shard_path, batch_size): shard_path.stem
+                for shard_path in shard_paths
+            }
+            for future in as_completed(futures):
+                inserted = future.result()
+                counters["inserted"] += inserted
+                print(f"Carrera {futures[future]}: {inserted} resultados")
 
 
 def parse_args():
@@ -177,13 +233,39 @@ def parse_args():
     parser.add_argument(
         "--input",
         default="data/salidas.json",
-        help="Ruta al JSON de entrada.",
+        help="Ruta al fichero de entrada (JSON, NDJSON o msgpack, con o sin gzip/zstd; se detecta solo).",
     )
     parser.add_argument(
         "--batch-size",
         type=int,
         default=500,
-        help="Tamano de lote para commits.",
+        help="Tamano de lote para commits (y para los inserts multi-fila en modo --bulk).",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Carga masiva: cachea carreras/corredores en memoria e inserta resultados por lotes.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos en paralelo, uno por carrera (evento y ano; con N > 1 la carga es siempre masiva).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Solo envia registros nuevos o modificados (compara con results.record_hash).",
+    )
+    parser.add_argument(
+        "--skip-rollups",
+        action="store_true",
+        help="No recalcular las tablas resumen (race_summary, race_time_histogram, runner_stats) ni runner_tokens.",
+    )
+    parser.add_argument(
+        "--only-rollups",
+        action="store_true",
+        help="No cargar nada: recalcular tablas resumen, percentiles y runner_tokens de las carreras ya cargadas.",
     )
     return parser.parse_args()
 
@@ -195,67 +277,42 @@ def main():
     if not input_path.exists():
         raise FileNotFoundError(f"No existe el archivo: {input_path}")
 
-    with input_path.open("r", encoding="utf-8") as file_handle:
-        records = json.load(file_handle)
+    records = iter_records(input_path)
 
     connection = get_connection()
-    inserted = 0
-    skipped = 0
+    counters = {"inserted": 0, "skipped": 0, "unchanged": 0, "races": set()}
+    started = time.perf_counter()
 
     try:
-        with connection.cursor() as cursor:
-            for index, item in enumerate(records, start=1):
-                is_valid, reason = validate_item(item)
-                if not is_valid:
-                    skipped += 1
-                    if skipped <= 5:
-                        print(f"Registro omitido ({reason}): {item}")
-                    continue
-
-                year = to_int_or_none(item.get("carrera"))
-                location = item.get("ubicacion") or ""
-                distance_text = item.get("distancia") or ""
-                distance_m = parse_distance_to_meters(distance_text)
-
-                race_id = upsert_race(cursor, year, location, distance_text, distance_m)
-
-                runner_id = upsert_runner(
-                    cursor,
-                    item.get("nombre") or "",
-                    item.get("apellido") or "",
-                    item.get("sexo") or "",
-                )
-
-                position = to_int_or_none(item.get("puesto"))
-                bib_number = to_int_or_none(item.get("dorsal"))
-                category_code = item.get("categoria") or item.get("categoría") or ""
-                time_text = item.get("tiempo") or ""
-                time_seconds = parse_time_to_seconds(time_text)
-
-                upsert_result(
-                    cursor,
-                    race_id,
-                    runner_id,
-                    position,
-                    bib_number,
-                    category_code,
-                    time_text,
-                    time_seconds,
-                    distance_text,
-                    distance_m,
-                )
-
-                inserted += 1
-
-                if index % args.batch_size == 0:
-                    connection.commit()
-
-            connection.commit()
-
+        if args.only_rollups:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT event, year FROM races")
+                counters["races"] = set(cursor.fetchall())
+            records = []
+        elif args.incremental:
+            records = iter_changed_records(connection, records, counters)
+
+        if args.workers > 1:
+            import_parallel(connection, records, args.batch_size, args.workers, counters)
+        elif args.bulk:
+            import_bulk(connection, records, args.batch_size, counters)
+        else:
+            import_row_by_row(connection, records, args.batch_size, counters)
+
+        if counters["races"] and not args.skip_rollups:
+            refresh_rollups(connection, counters["races"])
+            updated = ", ".join(f"{event} {year}" for event, year in sorted(counters["races"]))
+            print(f"Resumenes actualizados: {updated}")
     finally:
         connection.close()
 
-    print(f"Carga completada. Insertados: {inserted}, omitidos: {skipped}")
+    elapsed = time.perf_counter() - started
+    rate = counters["inserted"] / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Carga completada. Insertados: {counters['inserted']}, omitidos: {counters['skipped']}, "
+        f"sin cambios: {counters['unchanged']} "
+        f"({rate:.0f} filas/s en {elapsed:.1f} s)"
+    )
 
 
 if __name__ == "__main__":
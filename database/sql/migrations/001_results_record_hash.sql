@@ -0,0 +1,4 @@
+-- Huella del registro de origen para la carga incremental (--incremental).
+-- Necesaria en bases creadas antes de anadir la columna a schema_mariadb.sql.
+ALTER TABLE results
+    ADD COLUMN IF NOT EXISTS record_hash CHAR(32) NULL AFTER distance_m;
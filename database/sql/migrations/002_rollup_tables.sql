@@ -0,0 +1,25 @@
+-- Tablas resumen (rollups) que mantiene el importador. Ver schema_mariadb.sql.
+CREATE TABLE IF NOT EXISTS race_summary (
+    year INT NOT NULL,
+    gender VARCHAR(10) NOT NULL,
+    age_group VARCHAR(30) NOT NULL,
+    participants INT NOT NULL,
+    min_seconds INT NOT NULL,
+    p10_seconds DECIMAL(10, 2) NOT NULL,
+    p25_seconds DECIMAL(10, 2) NOT NULL,
+    median_seconds DECIMAL(10, 2) NOT NULL,
+    p75_seconds DECIMAL(10, 2) NOT NULL,
+    p90_seconds DECIMAL(10, 2) NOT NULL,
+    max_seconds INT NOT NULL,
+    mean_seconds DECIMAL(10, 2) NOT NULL,
+    PRIMARY KEY (year, gender, age_group)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS race_time_histogram (
+    year INT NOT NULL,
+    gender VARCHAR(10) NOT NULL,
+    age_group VARCHAR(30) NOT NULL,
+    bin_start_seconds INT NOT NULL,
+    bin_count INT NOT NULL,
+    PRIMARY KEY (year, gender, age_group, bin_start_seconds)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,33 @@
+-- Genero y grupo de edad derivados solo de category_code ("SNM-12" -> M, Senior 20-34). Son
+-- PERSISTENT para poder indexarlos. No usan runners.sex como race_core.parsers.detect_gender, asi
+-- que las categorias sin F/M (2010-2012) quedan con gender NULL: 006_results_groups.sql los
+-- sustituye por columnas normales que rellena el importador.
+-- Indices para el historial de corredor y para la vista de carrera (race_id + genero/edad +
+-- tiempo): ambas consultas se resuelven leyendo solo el indice.
+ALTER TABLE results
+    ADD COLUMN IF NOT EXISTS gender CHAR(1) AS (
+        CASE
+            WHEN TRIM(COALESCE(category_code, '')) REGEXP '(F|[[:space:]]FE[A-Z]*)[-[:space:]]*[0-9]*$' THEN 'F'
+            WHEN TRIM(COALESCE(category_code, '')) REGEXP '(M|[[:space:]]MASC[A-Z]*)[-[:space:]]*[0-9]*$' THEN 'M'
+        END
+    ) PERSISTENT,
+    ADD COLUMN IF NOT EXISTS age_group VARCHAR(30) AS (
+        CASE
+            WHEN TRIM(COALESCE(category_code, '')) REGEXP '^[MF]?[-[:space:]]*[0-9]*$' THEN 'SIN_CATEGORIA'
+            WHEN TRIM(COALESCE(category_code, '')) LIKE 'JV1%' THEN 'Joven 11-15'
+            WHEN TRIM(COALESCE(category_code, '')) LIKE 'JV2%' THEN 'Joven 16-19'
+            WHEN TRIM(COALESCE(category_code, '')) LIKE 'SN%' THEN 'Senior 20-34'
+            WHEN TRIM(COALESCE(category_code, '')) LIKE 'VTA%' THEN 'Veteranos A 35-44'
+            WHEN TRIM(COALESCE(category_code, '')) LIKE 'VTB%' THEN 'Veteranos B 45-54'
+            WHEN TRIM(COALESCE(category_code, '')) LIKE 'VTC%' THEN 'Veteranos C 55-64'
+            WHEN TRIM(COALESCE(category_code, '')) LIKE 'VTD%' THEN 'Veteranos D 65+'
+            ELSE 'OTRA'
+        END
+    ) PERSISTENT,
+    ADD INDEX IF NOT EXISTS idx_results_runner_race (runner_id, race_id),
+    ADD INDEX IF NOT EXISTS idx_results_race_time (race_id, time_seconds),
+    ADD INDEX IF NOT EXISTS idx_results_race_group_time (race_id, gender, age_group, time_seconds);
+
+-- idx_results_runner_race ya sirve a la clave foranea de runner_id; el indice que InnoDB
+-- creo implicitamente para ella sobra.
+ALTER TABLE results DROP INDEX IF EXISTS fk_results_runner;
@@ -0,0 +1,6 @@
+-- Percentiles de cada resultado en su ano (general, genero y genero + grupo de edad). Los rellena
+-- refresh_rollups; en una base existente se calculan con import_json_to_mariadb.py --only-rollups.
+ALTER TABLE results
+    ADD COLUMN IF NOT EXISTS pct_overall DECIMAL(7, 6) NULL AFTER record_hash,
+    ADD COLUMN IF NOT EXISTS pct_gender DECIMAL(7, 6) NULL AFTER pct_overall,
+    ADD COLUMN IF NOT EXISTS pct_age_group DECIMAL(7, 6) NULL AFTER pct_gender;
@@ -0,0 +1,22 @@
+-- Varios eventos (otras San Silvestres, 10K...): una carrera pasa a ser (evento, ano). Las filas
+-- existentes son de la San Silvestre de A Coruna (race_core.competitions.DEFAULT_EVENT).
+ALTER TABLE races
+    ADD COLUMN IF NOT EXISTS event VARCHAR(100) NOT NULL DEFAULT 'san-silvestre-coruna' AFTER id,
+    DROP INDEX IF EXISTS uq_races_year_location,
+    ADD UNIQUE KEY IF NOT EXISTS uq_races_event_year (event, year);
+ALTER TABLE races ALTER COLUMN event DROP DEFAULT;
+
+-- Tablas resumen con el evento al principio de la clave y una particion por hash del evento.
+ALTER TABLE race_summary
+    ADD COLUMN IF NOT EXISTS event VARCHAR(100) NOT NULL DEFAULT 'san-silvestre-coruna' FIRST,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (event, year, gender, age_group);
+ALTER TABLE race_summary ALTER COLUMN event DROP DEFAULT;
+ALTER TABLE race_summary PARTITION BY KEY (event) PARTITIONS 8;
+
+ALTER TABLE race_time_histogram
+    ADD COLUMN IF NOT EXISTS event VARCHAR(100) NOT NULL DEFAULT 'san-silvestre-coruna' FIRST,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (event, year, gender, age_group, bin_start_seconds);
+ALTER TABLE race_time_histogram ALTER COLUMN event DROP DEFAULT;
+ALTER TABLE race_time_histogram PARTITION BY KEY (event) PARTITIONS 8;
@@ -0,0 +1,13 @@
+-- gender y age_group pasan de columnas generadas (solo category_code) a columnas normales que
+-- rellena el importador con detect_gender(runners.sex, category_code) y map_age_group, asi que
+-- las categorias solo numericas (2010-2012) tambien tienen genero. Despues hay que rellenarlas:
+--     python database/scripts/import_json_to_mariadb.py --only-rollups
+ALTER TABLE results
+    DROP INDEX IF EXISTS idx_results_race_group_time,
+    DROP COLUMN IF EXISTS gender,
+    DROP COLUMN IF EXISTS age_group;
+
+ALTER TABLE results
+    ADD COLUMN gender CHAR(1) NULL AFTER pct_age_group,
+    ADD COLUMN age_group VARCHAR(30) NULL AFTER gender,
+    ADD INDEX idx_results_race_group_time (race_id, gender, age_group, time_seconds);
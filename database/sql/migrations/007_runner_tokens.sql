@@ -0,0 +1,14 @@
+-- Palabras del nombre de cada corredor, plegadas como race_core.runner_index.fold_name (sin tildes,
+-- en mayusculas), para que la busqueda del dashboard sea por prefijo sobre un indice en lugar de un
+-- LIKE '%...%' sobre toda la tabla runners. Las rellena refresh_rollups con los corredores de cada
+-- carrera recalculada; para los ya cargados:
+--     python database/scripts/import_json_to_mariadb.py --only-rollups
+CREATE TABLE IF NOT EXISTS runner_tokens (
+    token VARCHAR(255) NOT NULL,
+    runner_id INT NOT NULL,
+    PRIMARY KEY (token, runner_id),
+    KEY idx_runner_tokens_runner (runner_id, token),
+    CONSTRAINT fk_runner_tokens_runner
+        FOREIGN KEY (runner_id) REFERENCES runners (id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
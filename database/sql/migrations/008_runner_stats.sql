@@ -0,0 +1,22 @@
+-- Perfil de cada corredor (nombre y apellidos) dentro de un evento: carreras, mejor tiempo, media,
+-- ritmo medio y tendencia. Lo mantiene refresh_rollups para los corredores de cada carrera
+-- recalculada, asi que el ranking y el perfil del dashboard son lecturas por indice en lugar de
+-- un GROUP BY sobre results. Para las carreras ya cargadas:
+--     python database/scripts/import_json_to_mariadb.py --only-rollups
+CREATE TABLE IF NOT EXISTS runner_stats (
+    event VARCHAR(100) NOT NULL,
+    first_name VARCHAR(255) NOT NULL,
+    last_name VARCHAR(255) NOT NULL,
+    sex VARCHAR(10) NULL,
+    races INT NOT NULL,
+    best_seconds INT NOT NULL,
+    mean_seconds DECIMAL(10, 2) NOT NULL,
+    mean_pace_seconds DECIMAL(10, 2) NULL,
+    trend_seconds DECIMAL(10, 2) NULL,
+    PRIMARY KEY (event, first_name, last_name),
+    KEY idx_runner_stats_mean (event, mean_seconds),
+    KEY idx_runner_stats_best (event, best_seconds),
+    KEY idx_runner_stats_pace (event, mean_pace_seconds),
+    KEY idx_runner_stats_trend (event, trend_seconds)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+PARTITION BY KEY (event) PARTITIONS 8;
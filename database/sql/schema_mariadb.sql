@@ -1,10 +1,13 @@
+-- Una carrera es una edicion (year) de un evento del registro de competiciones
+-- (race_core.competitions); ubicacion y distancia son atributos de la edicion.
 CREATE TABLE IF NOT EXISTS races (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    event VARCHAR(100) NOT NULL,
     year INT NOT NULL,
     location VARCHAR(255) NOT NULL,
     distance_text VARCHAR(50) NULL,
     distance_m INT NULL,
-    UNIQUE KEY uq_races_year_location (year, location)
+    UNIQUE KEY uq_races_event_year (event, year)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE IF NOT EXISTS runners (
@@ -26,8 +29,26 @@ CREATE TABLE IF NOT EXISTS results (
     time_seconds INT NULL,
     distance_text VARCHAR(50) NULL,
     distance_m INT NULL,
+    record_hash CHAR(32) NULL,
+    -- Percentil del resultado en su ano (fraccion del grupo con peor tiempo), general, por genero y
+    -- por genero + grupo de edad. Los recalcula el importador junto con las tablas resumen.
+    pct_overall DECIMAL(7, 6) NULL,
+    pct_gender DECIMAL(7, 6) NULL,
+    pct_age_group DECIMAL(7, 6) NULL,
+    -- Genero y grupo de edad del resultado, con las reglas de race_core.parsers: detect_gender con
+    -- runners.sex y category_code (las categorias solo numericas de 2010-2012 no llevan F/M) y
+    -- map_age_group. Los rellena el importador al cargar y refresh_rollups al recalcular la carrera;
+    -- gender queda NULL solo si ni el sexo ni la categoria lo indican.
+    gender CHAR(1) NULL,
+    age_group VARCHAR(30) NULL,
+    -- Los indices de lectura empiezan por race_id: las consultas de un evento (sus race_id salen de
+    -- uq_races_event_year) solo recorren sus rangos. La tabla no se particiona por evento porque
+    -- las tablas particionadas de InnoDB no admiten claves foraneas.
     UNIQUE KEY uq_results_race_position (race_id, position),
     KEY idx_results_bib (bib_number),
+    KEY idx_results_runner_race (runner_id, race_id),
+    KEY idx_results_race_time (race_id, time_seconds),
+    KEY idx_results_race_group_time (race_id, gender, age_group, time_seconds),
     CONSTRAINT fk_results_race
         FOREIGN KEY (race_id) REFERENCES races (id)
         ON UPDATE CASCADE ON DELETE RESTRICT,
@@ -35,3 +56,71 @@ CREATE TABLE IF NOT EXISTS results (
         FOREIGN KEY (runner_id) REFERENCES runners (id)
         ON UPDATE CASCADE ON DELETE RESTRICT
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- Palabras del nombre de cada corredor plegadas como race_core.runner_index.fold_name, para buscar
+-- por prefijo con el indice (token, runner_id). refresh_rollups las rellena con los corredores de
+-- cada carrera recalculada; la segunda clave sirve para cruzar los terminos de un mismo corredor.
+CREATE TABLE IF NOT EXISTS runner_tokens (
+    token VARCHAR(255) NOT NULL,
+    runner_id INT NOT NULL,
+    PRIMARY KEY (token, runner_id),
+    KEY idx_runner_tokens_runner (runner_id, token),
+    CONSTRAINT fk_runner_tokens_runner
+        FOREIGN KEY (runner_id) REFERENCES runners (id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- Tablas resumen mantenidas por el importador (una fila por evento, ano, genero y grupo de edad;
+-- 'ALL' agrupa todos los valores). Se recalculan solo para las carreras cargadas. Particionadas
+-- por evento: las consultas de un evento no leen las de los demas.
+CREATE TABLE IF NOT EXISTS race_summary (
+    event VARCHAR(100) NOT NULL,
+    year INT NOT NULL,
+    gender VARCHAR(10) NOT NULL,
+    age_group VARCHAR(30) NOT NULL,
+    participants INT NOT NULL,
+    min_seconds INT NOT NULL,
+    p10_seconds DECIMAL(10, 2) NOT NULL,
+    p25_seconds DECIMAL(10, 2) NOT NULL,
+    median_seconds DECIMAL(10, 2) NOT NULL,
+    p75_seconds DECIMAL(10, 2) NOT NULL,
+    p90_seconds DECIMAL(10, 2) NOT NULL,
+    max_seconds INT NOT NULL,
+    mean_seconds DECIMAL(10, 2) NOT NULL,
+    PRIMARY KEY (event, year, gender, age_group)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+PARTITION BY KEY (event) PARTITIONS 8;
+
+CREATE TABLE IF NOT EXISTS race_time_histogram (
+    event VARCHAR(100) NOT NULL,
+    year INT NOT NULL,
+    gender VARCHAR(10) NOT NULL,
+    age_group VARCHAR(30) NOT NULL,
+    bin_start_seconds INT NOT NULL,
+    bin_count INT NOT NULL,
+    PRIMARY KEY (event, year, gender, age_group, bin_start_seconds)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+PARTITION BY KEY (event) PARTITIONS 8;
+
+-- Perfil de cada corredor (nombre y apellidos, como el historial del dashboard) dentro de un evento.
+-- refresh_rollups lo recalcula para los corredores de cada carrera tocada; los rankings leen el
+-- principio del indice de su metrica.
+CREATE TABLE IF NOT EXISTS runner_stats (
+    event VARCHAR(100) NOT NULL,
+    first_name VARCHAR(255) NOT NULL,
+    last_name VARCHAR(255) NOT NULL,
+    sex VARCHAR(10) NULL,
+    races INT NOT NULL,
+    best_seconds INT NOT NULL,
+    mean_seconds DECIMAL(10, 2) NOT NULL,
+    mean_pace_seconds DECIMAL(10, 2) NULL,
+    trend_seconds DECIMAL(10, 2) NULL,
+    PRIMARY KEY (event, first_name, last_name),
+    KEY idx_runner_stats_mean (event, mean_seconds),
+    KEY idx_runner_stats_best (event, best_seconds),
+    KEY idx_runner_stats_pace (event, mean_pace_seconds),
+    KEY idx_runner_stats_trend (event, trend_seconds)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+PARTITION BY KEY (event) PARTITIONS 8;
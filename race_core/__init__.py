@@ -0,0 +1 @@
+"""Codigo compartido por el scraper, el importador, el dashboard y el analisis."""
@@ -0,0 +1,90 @@
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+DEFAULT_EVENT = "san-silvestre-coruna"
+EVENT_SLUG_RE = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+# Registro por defecto: la San Silvestre de A Coruna (id de competicion -> ano), el antiguo MAPA_ANOS.
+DEFAULT_REGISTRY = [
+    {
+        "event": DEFAULT_EVENT,
+        "location": "A Coruña",
+        "url": "https://sansilvestrecoruna.com/es/web/resultado/competicion-{competition_id}",
+        "competitions": {
+            "16683": 2025,
+            "15442": 2024,
+            "14359": 2023,
+            "13121": 2022,
+            "11984": 2021,
+            "10910": 2019,
+            "9310": 2018,
+            "7799": 2017,
+            "6273": 2016,
+            "5000": 2015,
+            "899": 2014,
+            "-836": 2012,
+            "-603": 2011,
+            "-435": 2010,
+        },
+    },
+]
+
+
+@dataclass(frozen=True, slots=True)
+class Competition:
+    """Una edicion de una prueba: (evento, ano) y la pagina de resultados que la publica."""
+
+    event: str
+    year: int
+    competition_id: str
+    location: str
+    url: str
+    concurrency: int | None = None
+
+    @property
+    def key(self):
+        # Clave del estado del rastreo: un directorio por evento, un fichero por competicion.
+        return f"{self.event}/{self.competition_id}"
+
+    @property
+    def domain(self):
+        return urlsplit(self.url).hostname
+
+
+def parse_registry(entries):
+    """Competiciones de un registro: una entrada por evento con su ubicacion, la plantilla de URL
+    (``{competition_id}``) y las competiciones como {id: ano}. ``concurrency`` es opcional."""
+    competitions = []
+    seen = set()
+    for entry in entries:
+        event = entry["event"]
+        if not EVENT_SLUG_RE.match(event):
+            raise ValueError(f"Evento no valido (minusculas, digitos y guiones): {event!r}")
+        for competition_id, year in entry["competitions"].items():
+            competition = Competition(
+                event,
+                int(year),
+                str(competition_id),
+                entry["location"],
+                entry["url"].format(competition_id=competition_id),
+                entry.get("concurrency"),
+            )
+            if (event, competition.year) in seen:
+                raise ValueError(f"Ano repetido en el registro: {event} {competition.year}")
+            seen.add((event, competition.year))
+            competitions.append(competition)
+    return competitions
+
+
+def load_competitions(path=None, events=None):
+    """Registro de competiciones desde un JSON (por defecto, DEFAULT_REGISTRY), opcionalmente
+    filtrado a los eventos de `events`."""
+    entries = DEFAULT_REGISTRY if path is None else json.loads(Path(path).read_text(encoding="utf-8"))
+    competitions = parse_registry(entries)
+    if events:
+        events = set(events)
+        competitions = [competition for competition in competitions if competition.event in events]
+    return competitions
@@ -0,0 +1,52 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import pymysql
+
+
+def get_connection():
+    return pymysql.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "3306")),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        database=os.getenv("DB_NAME", "race_results"),
+        charset="utf8mb4",
+        autocommit=False,
+    )
+
+
+class ConnectionPool:
+    """Pool minimo de conexiones pymysql reutilizables entre hilos."""
+
+    def __init__(self, size=4, connect=get_connection):
+        self._connect = connect
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+                connection.ping(reconnect=True)
+            except queue.Empty:
+                connection = self._connect()
+
+            try:
+                yield connection
+                # Cierra la transaccion para que la siguiente consulta vea datos recientes.
+                connection.rollback()
+            except Exception:
+                connection.close()
+                raise
+            self._idle.put_nowait(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,129 @@
+import gzip
+import io
+import json
+import re
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    try:
+        from backports import zstd
+    except ImportError:
+        zstd = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+READ_CHUNK_SIZE = 1 << 16
+ARRAY_SEPARATOR_RE = re.compile(r"[\s,]*")
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+WHITESPACE = b" \t\r\n"
+
+FORMATS = ("json", "ndjson", "msgpack")
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+
+def require_zstd():
+    if zstd is None:
+        raise RuntimeError("La compresion zstd necesita Python 3.14+ o el paquete backports.zstd.")
+    return zstd
+
+
+def require_msgpack():
+    if msgpack is None:
+        raise RuntimeError("El formato msgpack necesita el paquete msgpack (pip install msgpack).")
+    return msgpack
+
+
+def compress_bytes(data, compression):
+    # Cada bloque es un miembro gzip o un frame zstd completo: concatenados siguen siendo un
+    # fichero valido, asi que los bloques se pueden comprimir en paralelo.
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == "zstd":
+        return require_zstd().compress(data)
+    return data
+
+
+def open_decompressed(input_path):
+    with input_path.open("rb") as file_handle:
+        magic = file_handle.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(input_path, "rb")
+    if magic.startswith(ZSTD_MAGIC):
+        return require_zstd().ZstdFile(input_path, mode="rb")
+    return input_path.open("rb")
+
+
+def detect_format(head):
+    head = head.lstrip(WHITESPACE)
+    if head.startswith(b"["):
+        return "json"
+    # Un stream msgpack de registros empieza por un mapa: fixmap (0x80-0x8f), map16 o map32.
+    if head and (0x80 <= head[0] <= 0x8F or head[0] in (0xDE, 0xDF)):
+        return "msgpack"
+    return "ndjson"
+
+
+def iter_json_array(file_handle, buffer):
+    decoder = json.JSONDecoder()
+    position = buffer.index("[") + 1
+    eof = False
+    while True:
+        position = ARRAY_SEPARATOR_RE.match(buffer, position).end()
+        if position < len(buffer):
+            if buffer[position] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # Un valor que acaba justo al final del buffer podria estar cortado.
+                if end < len(buffer) or eof:
+                    yield value
+                    position = end
+                    continue
+        elif eof:
+            raise ValueError("JSON incompleto: falta el cierre ']'")
+
+        chunk = file_handle.read(READ_CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_ndjson(file_handle):
+    for line in file_handle:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_msgpack(file_handle):
+    yield from require_msgpack().Unpacker(file_handle, raw=False, read_size=READ_CHUNK_SIZE)
+
+
+def iter_records(input_path):
+    """Registros de un JSON (array), NDJSON o msgpack, sin comprimir o con gzip/zstd.
+
+    El formato se detecta por el contenido, no por la extension.
+    """
+    with open_decompressed(input_path) as binary_handle:
+        head = binary_handle.read(READ_CHUNK_SIZE)
+        binary_handle.seek(0)
+        record_format = detect_format(head)
+        if record_format == "msgpack":
+            yield from iter_msgpack(binary_handle)
+            return
+
+        file_handle = io.TextIOWrapper(binary_handle, encoding="utf-8")
+        if record_format == "json":
+            yield from iter_json_array(file_handle, file_handle.read(READ_CHUNK_SIZE))
+        else:
+            yield from iter_ndjson(file_handle)
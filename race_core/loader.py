@@ -0,0 +1,460 @@
+import hashlib
+import json
+
+from race_core.competitions import DEFAULT_EVENT
+from race_core.parsers import (
+    detect_gender,
+    fold_name,
+    map_age_group,
+    normalize_category_base,
+    parse_distance_to_meters,
+    parse_time_to_seconds,
+    to_int_or_none,
+)
+from race_core.records import RunnerRecord
+from race_core.rollups import compute_rollups, percentile_ranks
+
+
+REQUIRED_FIELDS = ("carrera", "nombre", "apellido", "sexo", "puesto")
+
+
+def validate_item(item):
+    missing = [field for field in REQUIRED_FIELDS if not item.get(field)]
+    if missing:
+        return False, f"Campos obligatorios vacios: {', '.join(missing)}"
+
+    if to_int_or_none(item.get("carrera")) is None:
+        return False, "Carrera no es un ano valido"
+
+    if to_int_or_none(item.get("puesto")) is None:
+        return False, "Puesto no es un numero valido"
+
+    return True, ""
+
+
+def upsert_race(cursor, event, year, location, distance_text, distance_m):
+    cursor.execute(
+        """
+        INSERT INTO races (event, year, location, distance_text, distance_m)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            id = LAST_INSERT_ID(id),
+            location = VALUES(location),
+            distance_text = VALUES(distance_text),
+            distance_m = VALUES(distance_m)
+        """,
+        (event, year, location, distance_text, distance_m),
+    )
+    return cursor.lastrowid
+
+
+def upsert_runner(cursor, first_name, last_name, sex):
+    cursor.execute(
+        """
+        INSERT INTO runners (first_name, last_name, sex)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            id = LAST_INSERT_ID(id)
+        """,
+        (first_name, last_name, sex),
+    )
+    return cursor.lastrowid
+
+
+RESULT_UPSERT_SQL = """
+    INSERT INTO results (
+        race_id,
+        runner_id,
+        position,
+        bib_number,
+        category_code,
+        time_text,
+        time_seconds,
+        distance_text,
+        distance_m,
+        record_hash,
+        gender,
+        age_group
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        runner_id = VALUES(runner_id),
+        bib_number = VALUES(bib_number),
+        category_code = VALUES(category_code),
+        time_text = VALUES(time_text),
+        time_seconds = VALUES(time_seconds),
+        distance_text = VALUES(distance_text),
+        distance_m = VALUES(distance_m),
+        record_hash = VALUES(record_hash),
+        gender = VALUES(gender),
+        age_group = VALUES(age_group)
+"""
+
+
+def upsert_result(
+    cursor,
+    race_id,
+    runner_id,
+    position,
+    bib_number,
+    category_code,
+    time_text,
+    time_seconds,
+    distance_text,
+    distance_m,
+    record_hash,
+    gender,
+    age_group,
+):
+    cursor.execute(
+        RESULT_UPSERT_SQL,
+        (
+            race_id,
+            runner_id,
+            position,
+            bib_number,
+            category_code,
+            time_text,
+            time_seconds,
+            distance_text,
+            distance_m,
+            record_hash,
+            gender,
+            age_group,
+        ),
+    )
+
+
+def record_fingerprint(item):
+    # Un RunnerRecord da el mismo hash que su registro en el JSON exportado.
+    if isinstance(item, RunnerRecord):
+        item = item.as_dict()
+    payload = json.dumps(item, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def race_key(item):
+    # Una carrera es un (evento, ano); los registros sin evento son de la San Silvestre.
+    return (item.get("evento") or DEFAULT_EVENT, to_int_or_none(item.get("carrera")))
+
+
+def runner_key(item):
+    return (
+        item.get("nombre") or "",
+        item.get("apellido") or "",
+        item.get("sexo") or "",
+    )
+
+
+def prepare_record(item):
+    distance_text = item.get("distancia") or ""
+    time_text = item.get("tiempo") or ""
+    time_seconds = item.get("time_seconds")
+    if time_seconds is None:
+        time_seconds = parse_time_to_seconds(time_text)
+    event, year = race_key(item)
+    key = runner_key(item)
+    category_code = item.get("categoria") or item.get("categoría") or ""
+    return {
+        "event": event,
+        "year": year,
+        "location": item.get("ubicacion") or "",
+        "distance_text": distance_text,
+        "distance_m": parse_distance_to_meters(distance_text),
+        "runner_key": key,
+        "position": to_int_or_none(item.get("puesto")),
+        "bib_number": to_int_or_none(item.get("dorsal")),
+        "category_code": category_code,
+        # Las mismas reglas que refresh_rollups (sexo del corredor y categoria).
+        "gender": detect_gender(key[2], category_code),
+        "age_group": map_age_group(normalize_category_base(category_code)),
+        "time_text": time_text,
+        "time_seconds": time_seconds,
+        "record_hash": record_fingerprint(item),
+    }
+
+
+def load_runner_cache(cursor):
+    cursor.execute("SELECT id, first_name, last_name, sex FROM runners")
+    return {
+        (first_name, last_name, sex): runner_id
+        for runner_id, first_name, last_name, sex in cursor.fetchall()
+    }
+
+
+def resolve_race_id(cursor, race_cache, record):
+    key = (record["event"], record["year"])
+    race_id = race_cache.get(key)
+    if race_id is None:
+        race_id = upsert_race(
+            cursor,
+            record["event"],
+            record["year"],
+            record["location"],
+            record["distance_text"],
+            record["distance_m"],
+        )
+        race_cache[key] = race_id
+    return race_id
+
+
+def resolve_runner_ids(cursor, runner_cache, runner_keys):
+    missing = sorted({key for key in runner_keys if key not in runner_cache})
+    if not missing:
+        return
+
+    cursor.executemany(
+        """
+        INSERT INTO runners (first_name, last_name, sex)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE id = id
+        """,
+        missing,
+    )
+
+    # Solo las claves que faltaban, por la clave completa de uq_runner_identity: el coste depende
+    # del lote, no del numero de corredores con el mismo nombre.
+    placeholders = ", ".join(["(%s, %s, %s)"] * len(missing))
+    cursor.execute(
+        f"""
+        SELECT id, first_name, last_name, sex
+        FROM runners
+        WHERE (first_name, last_name, sex) IN ({placeholders})
+        """,
+        [value for key in missing for value in key],
+    )
+    for runner_id, first_name, last_name, sex in cursor.fetchall():
+        runner_cache[(first_name, last_name, sex)] = runner_id
+
+    # La collation puede considerar iguales claves distintas en Python (acentos, espacios).
+    for key in missing:
+        if key not in runner_cache:
+            runner_cache[key] = upsert_runner(cursor, *key)
+
+
+def result_row(race_id, runner_id, record):
+    return (
+        race_id,
+        runner_id,
+        record["position"],
+        record["bib_number"],
+        record["category_code"],
+        record["time_text"],
+        record["time_seconds"],
+        record["distance_text"],
+        record["distance_m"],
+        record["record_hash"],
+        record["gender"],
+        record["age_group"],
+    )
+
+
+def write_results_batch(cursor, race_cache, runner_cache, items):
+    records = [prepare_record(item) for item in items]
+    resolve_runner_ids(cursor, runner_cache, [record["runner_key"] for record in records])
+
+    rows = [
+        result_row(
+            resolve_race_id(cursor, race_cache, record),
+            runner_cache[record["runner_key"]],
+            record,
+        )
+        for record in records
+    ]
+    cursor.executemany(RESULT_UPSERT_SQL, rows)
+    return len(rows)
+
+
+def write_result_groups(cursor, event, year, group_rows):
+    # Genero, grupo de edad y percentiles de cada resultado. Las filas van a una tabla temporal
+    # (INSERT multi-fila) y se aplican con un solo UPDATE ... JOIN.
+    cursor.execute(
+        """
+        CREATE TEMPORARY TABLE IF NOT EXISTS result_groups (
+            id INT PRIMARY KEY,
+            gender CHAR(1) NULL,
+            age_group VARCHAR(30) NULL,
+            pct_overall DECIMAL(7, 6) NULL,
+            pct_gender DECIMAL(7, 6) NULL,
+            pct_age_group DECIMAL(7, 6) NULL
+        ) ENGINE=MEMORY
+        """
+    )
+    cursor.execute("DELETE FROM result_groups")
+    if group_rows:
+        cursor.executemany(
+            """
+            INSERT INTO result_groups (id, gender, age_group, pct_overall, pct_gender, pct_age_group)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            group_rows,
+        )
+    # Los resultados sin tiempo no estan en result_groups: conservan genero y grupo de la carga.
+    cursor.execute(
+        """
+        UPDATE results r
+        JOIN races ra ON ra.id = r.race_id
+        LEFT JOIN result_groups g ON g.id = r.id
+        SET
+            r.gender = IF(g.id IS NULL, r.gender, g.gender),
+            r.age_group = IF(g.id IS NULL, r.age_group, g.age_group),
+            r.pct_overall = g.pct_overall,
+            r.pct_gender = g.pct_gender,
+            r.pct_age_group = g.pct_age_group
+        WHERE ra.event = %s AND ra.year = %s
+        """,
+        (event, year),
+    )
+
+
+def name_tokens(first_name, last_name):
+    return set(fold_name(f"{first_name} {last_name}").split())
+
+
+def write_runner_tokens(cursor, event, year):
+    # Palabras plegadas del nombre de los corredores de la carrera (tabla runner_tokens, la de la
+    # busqueda por prefijo). Las que ya estaban se conservan.
+    cursor.execute(
+        """
+        SELECT DISTINCT ru.id, ru.first_name, ru.last_name
+        FROM results r
+        JOIN races ra ON ra.id = r.race_id
+        JOIN runners ru ON ru.id = r.runner_id
+        WHERE ra.event = %s AND ra.year = %s
+        """,
+        (event, year),
+    )
+    token_rows = [
+        (token, runner_id)
+        for runner_id, first_name, last_name in cursor.fetchall()
+        for token in sorted(name_tokens(first_name, last_name))
+    ]
+    if token_rows:
+        cursor.executemany("INSERT IGNORE INTO runner_tokens (token, runner_id) VALUES (%s, %s)", token_rows)
+
+
+def write_runner_stats(cursor, event, year):
+    # Recalcula runner_stats (todas las ediciones del evento) solo para los corredores de la carrera.
+    # Sus nombres van a una tabla temporal y cada uno se agrega por uq_runner_identity e
+    # idx_results_runner_race: el coste depende de la carrera, no del evento entero.
+    cursor.execute(
+        """
+        CREATE TEMPORARY TABLE IF NOT EXISTS stats_runners (
+            first_name VARCHAR(255) NOT NULL,
+            last_name VARCHAR(255) NOT NULL,
+            PRIMARY KEY (first_name, last_name)
+        ) ENGINE=MEMORY
+        """
+    )
+    cursor.execute("DELETE FROM stats_runners")
+    cursor.execute(
+        """
+        INSERT IGNORE INTO stats_runners (first_name, last_name)
+        SELECT ru.first_name, ru.last_name
+        FROM results r
+        JOIN races ra ON ra.id = r.race_id
+        JOIN runners ru ON ru.id = r.runner_id
+        WHERE ra.event = %s AND ra.year = %s
+        """,
+        (event, year),
+    )
+    cursor.execute(
+        """
+        DELETE s
+        FROM runner_stats s
+        JOIN stats_runners t ON t.first_name = s.first_name AND t.last_name = s.last_name
+        WHERE s.event = %s
+        """,
+        (event,),
+    )
+    # La pendiente del tiempo frente al ano, con las sumas de minimos cuadrados (RunnerProfile).
+    cursor.execute(
+        """
+        INSERT INTO runner_stats (
+            event, first_name, last_name, sex, races, best_seconds, mean_seconds, mean_pace_seconds,
+            trend_seconds
+        )
+        SELECT
+            ra.event,
+            ru.first_name,
+            ru.last_name,
+            MAX(ru.sex),
+            COUNT(*),
+            MIN(r.time_seconds),
+            AVG(r.time_seconds),
+            AVG(r.time_seconds / (r.distance_m / 1000)),
+            (COUNT(*) * SUM(ra.year * r.time_seconds) - SUM(ra.year) * SUM(r.time_seconds))
+                / NULLIF(COUNT(*) * SUM(ra.year * ra.year) - SUM(ra.year) * SUM(ra.year), 0)
+        FROM stats_runners t
+        JOIN runners ru ON ru.first_name = t.first_name AND ru.last_name = t.last_name
+        JOIN results r ON r.runner_id = ru.id
+        JOIN races ra ON ra.id = r.race_id
+        WHERE ra.event = %s AND r.time_seconds IS NOT NULL
+        GROUP BY ra.event, ru.first_name, ru.last_name
+        """,
+        (event,),
+    )
+
+
+def refresh_rollups(connection, races):
+    # Recalcula race_summary, race_time_histogram, el genero, grupo de edad y percentiles de
+    # results, las palabras de runner_tokens y los perfiles de runner_stats solo para las carreras
+    # (evento, ano) tocadas en esta carga.
+    with connection.cursor() as cursor:
+        for event, year in sorted(races):
+            cursor.execute(
+                """
+                SELECT r.id, ru.sex, r.category_code, r.time_seconds
+                FROM results r
+                JOIN races ra ON ra.id = r.race_id
+                JOIN runners ru ON ru.id = r.runner_id
+                WHERE ra.event = %s AND ra.year = %s AND r.time_seconds IS NOT NULL
+                """,
+                (event, year),
+            )
+            fetched = cursor.fetchall()
+            rows = [
+                (
+                    year,
+                    detect_gender(sex, category_code),
+                    map_age_group(normalize_category_base(category_code)),
+                    time_seconds,
+                )
+                for _, sex, category_code, time_seconds in fetched
+            ]
+            summary_rows, histogram_rows = compute_rollups(rows)
+
+            cursor.execute("DELETE FROM race_summary WHERE event = %s AND year = %s", (event, year))
+            cursor.execute("DELETE FROM race_time_histogram WHERE event = %s AND year = %s", (event, year))
+            if summary_rows:
+                cursor.executemany(
+                    """
+                    INSERT INTO race_summary (
+                        event, year, gender, age_group, participants, min_seconds, p10_seconds,
+                        p25_seconds, median_seconds, p75_seconds, p90_seconds, max_seconds,
+                        mean_seconds
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    [(event, *row) for row in summary_rows],
+                )
+            if histogram_rows:
+                cursor.executemany(
+                    """
+                    INSERT INTO race_time_histogram (event, year, gender, age_group, bin_start_seconds, bin_count)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    [(event, *row) for row in histogram_rows],
+                )
+
+            ranks = percentile_ranks([row[1:] for row in rows])
+            write_result_groups(
+                cursor,
+                event,
+                year,
+                [(result[0], *row[1:3], *rank) for result, row, rank in zip(fetched, rows, ranks)],
+            )
+            write_runner_tokens(cursor, event, year)
+            write_runner_stats(cursor, event, year)
+            connection.commit()
+
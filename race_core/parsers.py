@@ -0,0 +1,199 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+
+TIME_SEPARATOR = ":"
+DISTANCE_NUMBER_RE = re.compile(r"(\d+[\.,]?\d*)")
+CATEGORY_RANK_RE = re.compile(r"[-\s]*\d+$")
+CATEGORY_GENDER_RE = re.compile(r"[MF]$")
+GENDER_TOKEN_RE = re.compile(r"\b([MF])\b")
+NON_WORD_RE = re.compile(r"[\W_]+")
+AGE_GROUP_PREFIXES = (
+    ("JV1", "Joven 11-15"),
+    ("JV2", "Joven 16-19"),
+    ("SN", "Senior 20-34"),
+    ("VTA", "Veteranos A 35-44"),
+    ("VTB", "Veteranos B 45-54"),
+    ("VTC", "Veteranos C 55-64"),
+    ("VTD", "Veteranos D 65+"),
+)
+NO_CATEGORY = "SIN_CATEGORIA"
+OTHER_AGE_GROUP = "OTRA"
+
+
+def _is_missing(value):
+    if value is None:
+        return True
+    try:
+        return bool(value != value)
+    except TypeError:
+        # pd.NA no se puede evaluar como booleano.
+        return True
+
+
+def to_int_or_none(value):
+    if value is None:
+        return None
+
+    if isinstance(value, int):
+        return value
+
+    text = str(value).strip()
+    if text == "":
+        return None
+
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=16384)
+def _parse_time(text):
+    parts = text.strip().split(TIME_SEPARATOR)
+    if len(parts) == 2:
+        hours = 0
+        minutes, seconds = parts
+    elif len(parts) == 3:
+        hours, minutes, seconds = parts
+    else:
+        return None
+
+    try:
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+    except ValueError:
+        return None
+
+
+def parse_time_to_seconds(value):
+    if _is_missing(value):
+        return None
+    return _parse_time(str(value))
+
+
+@lru_cache(maxsize=1024)
+def _parse_distance(text):
+    # Devuelve (valor, factor a metros) para textos como "KM 7,5", "7,5 km" o "7250 m".
+    text = text.strip().upper()
+    match = DISTANCE_NUMBER_RE.search(text)
+    if not match:
+        return None
+    try:
+        number = float(match.group(1).replace(",", "."))
+    except ValueError:
+        return None
+    if "KM" in text:
+        return number, 1000
+    if "M" in text:
+        return number, 1
+    return None
+
+
+def parse_distance_to_meters(value):
+    if _is_missing(value):
+        return None
+    parsed = _parse_distance(str(value))
+    if parsed is None:
+        return None
+    number, factor = parsed
+    return int(round(number * factor))
+
+
+def parse_distance_km(value):
+    if _is_missing(value):
+        return None
+    parsed = _parse_distance(str(value))
+    if parsed is None:
+        return None
+    number, factor = parsed
+    return number if factor == 1000 else number / 1000
+
+
+def seconds_to_hms(seconds, missing="N/D"):
+    if _is_missing(seconds):
+        return missing
+    seconds = int(seconds)
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    secs = seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+def pace_seconds_to_str(seconds_per_km, missing="N/D"):
+    if _is_missing(seconds_per_km):
+        return missing
+    total = int(seconds_per_km)
+    minutes = total // 60
+    secs = total % 60
+    return f"{minutes:02d}:{secs:02d} /km"
+
+
+@lru_cache(maxsize=4096)
+def _category_base(text):
+    text = text.strip().upper()
+    if not text:
+        return ""
+    text = CATEGORY_RANK_RE.sub("", text)
+    return CATEGORY_GENDER_RE.sub("", text)
+
+
+def normalize_category_base(value):
+    if _is_missing(value):
+        return ""
+    return _category_base(str(value))
+
+
+@lru_cache(maxsize=1024)
+def _age_group(code):
+    if not code or code == NO_CATEGORY:
+        return NO_CATEGORY
+    code = code.upper()
+    for prefix, label in AGE_GROUP_PREFIXES:
+        if code.startswith(prefix):
+            return label
+    return OTHER_AGE_GROUP
+
+
+def map_age_group(code):
+    if _is_missing(code):
+        return NO_CATEGORY
+    return _age_group(str(code))
+
+
+@lru_cache(maxsize=16384)
+def _gender_of(text):
+    text = text.strip().upper()
+    match = GENDER_TOKEN_RE.search(text)
+    if match:
+        return match.group(1)
+    if text.startswith("M"):
+        return "M"
+    if text.startswith("F"):
+        return "F"
+    return None
+
+
+def detect_gender(sexo_value, category_value):
+    for candidate in (sexo_value, category_value):
+        if candidate is None:
+            continue
+        gender = _gender_of(str(candidate))
+        if gender:
+            return gender
+    return None
+
+
+def normalize_name(value):
+    if not value:
+        return value
+    return " ".join(value.split()).upper()
+
+
+def fold_name(value):
+    """Nombre sin tildes, en mayusculas y con un espacio entre palabras: "José  Pérez-Gil" -> "JOSE PEREZ GIL"."""
+    if value is None or value != value:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(NON_WORD_RE.sub(" ", text.upper()).split())
@@ -0,0 +1,97 @@
+import csv
+from dataclasses import dataclass
+
+from race_core.competitions import DEFAULT_EVENT
+from race_core.parsers import parse_time_to_seconds, to_int_or_none
+
+
+# Orden de las columnas del CSV del spider y de las claves del JSON exportado.
+FIELDS = ("puesto", "dorsal", "nombre", "apellido", "sexo", "categoria", "tiempo", "distancia", "carrera", "ubicacion", "evento")
+HEADER_ALIASES = {"categoría": "categoria"}
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return value.strip() if isinstance(value, str) else str(value)
+
+
+@dataclass(slots=True)
+class RunnerRecord:
+    """Un corredor ya limpio: los enteros y el tiempo se convierten una sola vez, al crearlo."""
+
+    puesto: int | None
+    dorsal: int | None
+    nombre: str
+    apellido: str
+    sexo: str
+    categoria: str
+    tiempo: str
+    distancia: str
+    carrera: int | None
+    ubicacion: str
+    evento: str = DEFAULT_EVENT
+    time_seconds: int | None = None
+
+    @classmethod
+    def from_values(cls, puesto, dorsal, nombre, apellido, sexo, categoria, tiempo, distancia, carrera, ubicacion, evento=None):
+        tiempo = _text(tiempo)
+        return cls(
+            to_int_or_none(puesto),
+            to_int_or_none(dorsal),
+            _text(nombre),
+            _text(apellido),
+            _text(sexo),
+            _text(categoria),
+            tiempo,
+            _text(distancia),
+            to_int_or_none(carrera),
+            _text(ubicacion),
+            # Los resultados anteriores al registro de eventos son todos de la San Silvestre.
+            _text(evento) or DEFAULT_EVENT,
+            parse_time_to_seconds(tiempo) if tiempo else None,
+        )
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        # Acepta el item del spider (con "categoría") o un registro del JSON exportado.
+        categoria = mapping.get("categoria")
+        if categoria is None:
+            categoria = mapping.get("categoría")
+        return cls.from_values(
+            mapping.get("puesto"),
+            mapping.get("dorsal"),
+            mapping.get("nombre"),
+            mapping.get("apellido"),
+            mapping.get("sexo"),
+            categoria,
+            mapping.get("tiempo"),
+            mapping.get("distancia"),
+            mapping.get("carrera"),
+            mapping.get("ubicacion"),
+            mapping.get("evento"),
+        )
+
+    def get(self, field, default=None):
+        # Misma lectura que un dict: validate_item, prepare_record y las stats usan .get().
+        return getattr(self, field, default)
+
+    def as_dict(self):
+        """Registro con las claves del JSON exportado (sin los campos derivados)."""
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+def iter_csv_records(file_handle):
+    """Lee el CSV del spider fila a fila (csv.reader, sin un dict por fila) como RunnerRecord."""
+    reader = csv.reader(file_handle)
+    raw_header = next(reader, [])
+    header = [HEADER_ALIASES.get(name.strip(), name.strip()) for name in raw_header]
+    positions = [header.index(field) if field in header else None for field in FIELDS]
+    width = len(header)
+    for row in reader:
+        # Los feeds reanudados con versiones anteriores repetian la cabecera al anadir filas.
+        if row == raw_header:
+            continue
+        if len(row) < width:
+            row = row + [None] * (width - len(row))
+        yield RunnerRecord.from_values(*(None if position is None else row[position] for position in positions))
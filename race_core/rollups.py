@@ -0,0 +1,174 @@
+import bisect
+from collections import defaultdict
+
+from race_core.competitions import DEFAULT_EVENT
+
+
+ALL = "ALL"
+HISTOGRAM_BIN_SECONDS = 60
+QUANTILES = (("p10", 0.10), ("p25", 0.25), ("median", 0.50), ("p75", 0.75), ("p90", 0.90))
+SUMMARY_COLUMNS = (
+    ["year", "gender", "age_group", "participants", "min_seconds"]
+    + [f"{name}_seconds" for name, _ in QUANTILES]
+    + ["max_seconds", "mean_seconds"]
+)
+HISTOGRAM_COLUMNS = ["year", "gender", "age_group", "bin_start_seconds", "bin_count"]
+# Percentil de cada resultado en su ano: fraccion del grupo con un tiempo peor (el ganador se
+# acerca a 1). El grupo de edad se compara dentro del mismo genero, como las categorias.
+PERCENTILE_COLUMNS = ["pct_overall", "pct_gender", "pct_age_group"]
+
+
+def quantile(sorted_values, fraction):
+    # Interpolacion lineal, igual que pandas.Series.quantile por defecto.
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize_times(sorted_values):
+    summary = {
+        "participants": len(sorted_values),
+        "min_seconds": sorted_values[0],
+        "max_seconds": sorted_values[-1],
+        "mean_seconds": sum(sorted_values) / len(sorted_values),
+    }
+    for name, fraction in QUANTILES:
+        summary[f"{name}_seconds"] = quantile(sorted_values, fraction)
+    return summary
+
+
+def histogram_bins(sorted_values, bin_seconds=HISTOGRAM_BIN_SECONDS):
+    counts = defaultdict(int)
+    for value in sorted_values:
+        counts[int(value // bin_seconds) * bin_seconds] += 1
+    return sorted(counts.items())
+
+
+def grouping_keys(year, gender, age_group):
+    # Cada resultado cuenta en su grupo y en los totales por genero, por edad y del ano.
+    yield year, ALL, ALL
+    yield year, ALL, age_group
+    if gender:
+        yield year, gender, ALL
+        yield year, gender, age_group
+
+
+def rollup_rows(groups):
+    summary_rows = []
+    histogram_rows = []
+    for key in sorted(groups):
+        values = sorted(groups[key])
+        summary = summarize_times(values)
+        summary_rows.append(tuple(key) + tuple(summary[column] for column in SUMMARY_COLUMNS[3:]))
+        histogram_rows.extend(tuple(key) + bin_row for bin_row in histogram_bins(values))
+    return summary_rows, histogram_rows
+
+
+def compute_rollups(rows):
+    groups = defaultdict(list)
+    for year, gender, age_group, time_seconds in rows:
+        if year is None or time_seconds is None:
+            continue
+        for key in grouping_keys(year, gender, age_group):
+            groups[key].append(time_seconds)
+    return rollup_rows(groups)
+
+
+def slower_fractions(times):
+    ordered = sorted(times)
+    total = len(ordered)
+    return [(total - bisect.bisect_right(ordered, value)) / total for value in times]
+
+
+def percentile_ranks(rows):
+    """Percentiles (general, genero, grupo de edad) de los resultados de un ano.
+
+    `rows`: (gender, age_group, time_seconds) con tiempo. Devuelve una tupla por fila en el mismo
+    orden; sin genero, los percentiles de genero y grupo quedan en None.
+    """
+    ranks = [[None, None, None] for _ in rows]
+    members = defaultdict(list)
+    for position, (gender, age_group, _) in enumerate(rows):
+        # La clave empieza por la columna del percentil: 0 general, 1 genero, 2 grupo de edad.
+        members[(0,)].append(position)
+        if gender:
+            members[(1, gender)].append(position)
+            members[(2, gender, age_group)].append(position)
+    for key, positions in members.items():
+        fractions = slower_fractions([rows[position][2] for position in positions])
+        for position, fraction in zip(positions, fractions):
+            ranks[position][key[0]] = fraction
+    return [tuple(rank) for rank in ranks]
+
+
+def frame_percentile_ranks(df):
+    # Mismo calculo que percentile_ranks sobre el DataFrame derivado, con rank() por grupo.
+    import pandas as pd
+
+    valid = df["year"].notna() & df["time_seconds"].notna()
+    with_gender = valid & df["gender"].notna()
+    ranks = pd.DataFrame(index=df.index, columns=PERCENTILE_COLUMNS, dtype="float64")
+    groupings = (
+        ("pct_overall", valid, ["year"]),
+        ("pct_gender", with_gender, ["year", "gender"]),
+        ("pct_age_group", with_gender, ["year", "gender", "age_group"]),
+    )
+    for column, mask, keys in groupings:
+        times = df[mask].groupby(keys, observed=True)["time_seconds"]
+        total = times.transform("count")
+        ranks.loc[mask, column] = ((total - times.rank(method="max")) / total).to_numpy()
+    return ranks
+
+
+def frame_rollups(df):
+    # Mismas tablas que compute_rollups, a partir del DataFrame derivado. pandas se importa
+    # aqui para que el importador (que usa compute_rollups y percentile_ranks) no dependa de el.
+    import pandas as pd
+
+    valid = df.dropna(subset=["year", "time_seconds"])
+    valid = valid.assign(
+        year=valid["year"].astype(int),
+        gender=valid["gender"].astype(object).where(valid["gender"].notna(), None),
+        age_group=valid["age_group"].astype(str),
+    )
+
+    groups = {}
+    for keys in (["year"], ["year", "age_group"], ["year", "gender"], ["year", "gender", "age_group"]):
+        for group_key, times in valid.groupby(keys, observed=True, dropna=True)["time_seconds"]:
+            if not isinstance(group_key, tuple):
+                group_key = (group_key,)
+            values = dict(zip(keys, group_key))
+            key = (int(values["year"]), values.get("gender", ALL), values.get("age_group", ALL))
+            groups[key] = times.tolist()
+
+    summary_rows, histogram_rows = rollup_rows(groups)
+    return (
+        pd.DataFrame(summary_rows, columns=SUMMARY_COLUMNS),
+        pd.DataFrame(histogram_rows, columns=HISTOGRAM_COLUMNS),
+    )
+
+
+def fetch_rows(cursor, sql, params=None):
+    cursor.execute(sql, params)
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def read_rollups(connection, years=None, event=None):
+    # Las tablas resumen empiezan por el evento (clave y particion): sin evento, el de por defecto.
+    where = "WHERE event = %s"
+    params = [event or DEFAULT_EVENT]
+    if years:
+        where += f" AND year IN ({', '.join(['%s'] * len(years))})"
+        params.extend(years)
+
+    with connection.cursor() as cursor:
+        summary = fetch_rows(cursor, f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM race_summary {where}", params)
+        histogram = fetch_rows(
+            cursor, f"SELECT {', '.join(HISTOGRAM_COLUMNS)} FROM race_time_histogram {where}", params
+        )
+    for row in summary:
+        for column in SUMMARY_COLUMNS[4:]:
+            row[column] = float(row[column]) if row[column] is not None else None
+    return summary, histogram
@@ -0,0 +1,164 @@
+import bisect
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from race_core.parsers import fold_name
+
+
+SEARCH_LIMIT = 50
+NGRAM_SIZE = 3
+
+
+def ngrams(token):
+    return {token[start:start + NGRAM_SIZE] for start in range(len(token) - NGRAM_SIZE + 1)}
+
+
+class RunnerIndex:
+    """Indice de corredores por nombre normalizado para la busqueda del dashboard.
+
+    Un corredor es su nombre plegado (sin tildes ni mayusculas), asi "JOSÉ PÉREZ" y "Jose Perez"
+    son la misma persona. Para cada uno se guardan sus filas del DataFrame (offsets posicionales,
+    en formato CSR) y se indexan los trigramas de cada palabra. Los prefijos de una o dos letras
+    tienen su lista de corredores precalculada; los mas largos se buscan en las palabras ordenadas.
+    """
+
+    def __init__(self, keys, labels, starts, rows, postings, short_prefixes, tokens, token_keys):
+        self.keys = keys
+        self.labels = labels
+        self.key_ids = {key: key_id for key_id, key in enumerate(keys)}
+        self.starts = starts
+        self.rows_by_key = rows
+        self.postings = postings
+        self.short_prefixes = short_prefixes
+        self.tokens = tokens
+        self.token_keys = token_keys
+
+    @classmethod
+    def from_names(cls, names):
+        # Se pliega cada nombre distinto una sola vez, no cada fila.
+        codes, raw_names = pd.factorize(pd.Series(names, dtype="object"), use_na_sentinel=True)
+        folded = [fold_name(name) for name in raw_names]
+        keys = sorted({key for key in folded if key})
+        key_ids = {key: key_id for key_id, key in enumerate(keys)}
+        raw_key = np.array([key_ids.get(key, -1) for key in folded] + [-1], dtype=np.int64)
+
+        # codes == -1 (nombre vacio) cae en la ultima posicion de raw_key, que tambien es -1.
+        row_keys = raw_key[codes]
+        valid_rows = np.flatnonzero(row_keys >= 0)
+        order = valid_rows[np.argsort(row_keys[valid_rows], kind="stable")]
+        starts = np.searchsorted(row_keys[order], np.arange(len(keys) + 1))
+
+        # Etiqueta: la variante original mas frecuente de cada corredor.
+        raw_counts = np.bincount(codes[codes >= 0], minlength=len(raw_names))
+        labels = [None] * len(keys)
+        best = [0] * len(keys)
+        for raw_id, key_id in enumerate(raw_key[:-1]):
+            if key_id >= 0 and raw_counts[raw_id] > best[key_id]:
+                best[key_id] = raw_counts[raw_id]
+                labels[key_id] = " ".join(str(raw_names[raw_id]).split())
+
+        postings = defaultdict(list)
+        short_prefixes = defaultdict(set)
+        token_pairs = []
+        for key_id, key in enumerate(keys):
+            # Un trigrama puede repetirse en dos palabras del nombre; cada lista lleva el id una vez.
+            grams = set()
+            for token in set(key.split()):
+                token_pairs.append((token, key_id))
+                grams |= ngrams(token)
+                for size in range(1, NGRAM_SIZE):
+                    if len(token) >= size:
+                        short_prefixes[token[:size]].add(key_id)
+            for gram in grams:
+                postings[gram].append(key_id)
+        token_pairs.sort()
+
+        return cls(
+            keys,
+            labels,
+            starts,
+            order,
+            {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()},
+            {prefix: np.array(sorted(ids), dtype=np.int32) for prefix, ids in short_prefixes.items()},
+            [token for token, _ in token_pairs],
+            np.array([key_id for _, key_id in token_pairs], dtype=np.int32),
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def prefix_candidates(self, term):
+        # Corredores con alguna palabra que empieza por el termino (rango en las palabras ordenadas).
+        if len(term) < NGRAM_SIZE:
+            return self.short_prefixes.get(term, np.empty(0, dtype=np.int32))
+        low = bisect.bisect_left(self.tokens, term)
+        high = bisect.bisect_left(self.tokens, term + "\uffff")
+        return np.unique(self.token_keys[low:high])
+
+    def substring_candidates(self, term):
+        if len(term) < NGRAM_SIZE:
+            return self.prefix_candidates(term)
+
+        lists = [self.postings.get(gram) for gram in ngrams(term)]
+        if any(ids is None for ids in lists):
+            return np.empty(0, dtype=np.int32)
+        return self.intersect(lists)
+
+    def key_mask(self, ids):
+        mask = np.zeros(len(self.keys), dtype=bool)
+        mask[ids] = True
+        return mask
+
+    def intersect(self, id_arrays):
+        # Se parte de la lista mas corta y se filtra con una mascara de las demas: sin ordenar, y el
+        # resultado conserva el orden alfabetico.
+        arrays = sorted(id_arrays, key=len)
+        candidates = arrays[0]
+        for ids in arrays[1:]:
+            if not len(candidates):
+                break
+            candidates = candidates[self.key_mask(ids)[candidates]]
+        return candidates
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Corredores cuyo nombre contiene todos los terminos de la consulta, como (etiqueta, clave).
+
+        Primero, en orden alfabetico, aquellos en los que cada termino es el inicio de una palabra;
+        despues, si falta hasta el limite, los que solo los contienen en mitad de una palabra.
+        """
+        terms = list(dict.fromkeys(fold_name(query).split()))
+        if not terms:
+            return []
+
+        # Los ids siguen el orden alfabetico de las claves, asi que no hace falta ordenar.
+        prefix_ids = self.intersect([self.prefix_candidates(term) for term in terms])
+        found = prefix_ids[:limit].tolist()
+
+        if len(found) < limit and any(len(term) >= NGRAM_SIZE for term in terms):
+            candidates = self.intersect([self.substring_candidates(term) for term in terms])
+            candidates = candidates[~self.key_mask(prefix_ids)[candidates]]
+            # Los trigramas pueden dar falsos positivos: cada termino se comprueba como subcadena.
+            for key_id in candidates.tolist():
+                words = self.keys[key_id].split()
+                if all(any(term in word for word in words) for term in terms):
+                    found.append(key_id)
+                    if len(found) == limit:
+                        break
+
+        return [(self.labels[key_id], self.keys[key_id]) for key_id in found]
+
+    def row_keys(self, row_count):
+        """Clave del corredor de cada fila del DataFrame ("" si no tiene nombre), sin volver a plegar."""
+        keys = np.full(row_count, "", dtype=object)
+        key_ids = np.repeat(np.arange(len(self.keys)), np.diff(self.starts))
+        keys[self.rows_by_key] = np.asarray(self.keys, dtype=object)[key_ids]
+        return keys
+
+    def rows(self, key):
+        """Posiciones (iloc) de las filas del corredor en el DataFrame con el que se construyo."""
+        key_id = self.key_ids.get(key)
+        if key_id is None:
+            return np.empty(0, dtype=np.int64)
+        return self.rows_by_key[self.starts[key_id]:self.starts[key_id + 1]]
@@ -0,0 +1,260 @@
+import bisect
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from race_core.runner_index import fold_name
+
+
+# Metricas de los rankings: cuanto menor, mejor (una tendencia negativa es que el corredor mejora).
+LEADERBOARD_METRICS = ("mean", "best", "pace", "trend")
+LEADERBOARD_COLUMNS = [
+    "runner", "gender", "races", "best_seconds", "mean_seconds", "mean_pace_seconds", "trend_seconds"
+]
+# Por debajo de esta fraccion de corredores tocados, los rankings se actualizan entrada a entrada.
+INCREMENTAL_RERANK_FRACTION = 0.125
+
+
+@dataclass(slots=True)
+class RunnerProfile:
+    """Agregados de un corredor entre ediciones, mantenidos con sumas para poder quitar o anadir un ano."""
+
+    key: str
+    label: str
+    gender: str | None = None
+    # ano -> (time_seconds, pace_seconds, percentil: fraccion de corredores mas lentos ese ano)
+    years: dict = field(default_factory=dict)
+    best_seconds: float | None = None
+    total_seconds: float = 0.0
+    total_pace: float = 0.0
+    paced_races: int = 0
+    sum_year: float = 0.0
+    sum_year_sq: float = 0.0
+    sum_year_time: float = 0.0
+
+    @property
+    def races(self):
+        return len(self.years)
+
+    @property
+    def mean_seconds(self):
+        return self.total_seconds / len(self.years) if self.years else None
+
+    @property
+    def mean_pace_seconds(self):
+        return self.total_pace / self.paced_races if self.paced_races else None
+
+    @property
+    def trend_seconds(self):
+        """Pendiente (minimos cuadrados) del tiempo frente al ano, en segundos por ano."""
+        races = len(self.years)
+        denominator = races * self.sum_year_sq - self.sum_year * self.sum_year
+        if races < 2 or not denominator:
+            return None
+        return (races * self.sum_year_time - self.sum_year * self.total_seconds) / denominator
+
+    def metric(self, name):
+        if name == "best":
+            return self.best_seconds
+        if name == "pace":
+            return self.mean_pace_seconds
+        if name == "trend":
+            return self.trend_seconds
+        return self.mean_seconds
+
+    def add_result(self, year, time_seconds, pace_seconds=None, percentile=None):
+        if year in self.years:
+            self.remove_result(year)
+        self.years[year] = (time_seconds, pace_seconds, percentile)
+        self.total_seconds += time_seconds
+        self.sum_year += year
+        self.sum_year_sq += year * year
+        self.sum_year_time += year * time_seconds
+        if pace_seconds is not None:
+            self.total_pace += pace_seconds
+            self.paced_races += 1
+        if self.best_seconds is None or time_seconds < self.best_seconds:
+            self.best_seconds = time_seconds
+
+    def remove_result(self, year):
+        time_seconds, pace_seconds, _ = self.years.pop(year)
+        self.total_seconds -= time_seconds
+        self.sum_year -= year
+        self.sum_year_sq -= year * year
+        self.sum_year_time -= year * time_seconds
+        if pace_seconds is not None:
+            self.total_pace -= pace_seconds
+            self.paced_races -= 1
+        if time_seconds == self.best_seconds:
+            self.best_seconds = min((result[0] for result in self.years.values()), default=None)
+
+    def as_row(self):
+        return [
+            self.label,
+            self.gender,
+            self.races,
+            self.best_seconds,
+            self.mean_seconds,
+            self.mean_pace_seconds,
+            self.trend_seconds,
+        ]
+
+
+def runner_keys(names):
+    # Nombre plegado de cada fila, plegando cada nombre distinto una sola vez.
+    codes, raw_names = pd.factorize(names.astype("object"), use_na_sentinel=True)
+    folded = [fold_name(name) for name in raw_names] + [""]
+    return [folded[code] for code in codes]
+
+
+def year_rows(year_df):
+    """(clave, nombre, tiempo, ritmo, percentil, genero) de cada corredor de un ano."""
+    valid = year_df[year_df["time_seconds"].notna()]
+    if "runner_key" not in valid.columns:
+        valid = valid.assign(runner_key=runner_keys(valid["runner_name"]))
+    # Percentil: fraccion de los corredores del ano con un tiempo peor (el ganador se acerca a 1).
+    # El DataFrame del dashboard ya lo trae calculado (pct_overall).
+    if "pct_overall" in valid.columns:
+        valid = valid.assign(percentile=valid["pct_overall"])
+    else:
+        valid = valid.assign(percentile=(len(valid) - valid["time_seconds"].rank(method="max")) / len(valid))
+    # Un corredor cuenta una vez por ano (su mejor tiempo si el nombre aparece repetido).
+    valid = valid[valid["runner_key"] != ""].sort_values("time_seconds", kind="stable")
+    valid = valid.drop_duplicates("runner_key")
+    return list(
+        zip(
+            valid["runner_key"],
+            valid["runner_name"],
+            valid["time_seconds"].tolist(),
+            [pace if pace == pace else None for pace in valid["pace_seconds"].tolist()],
+            valid["percentile"].tolist(),
+            valid["gender"].astype("object"),
+        )
+    )
+
+
+def bisect_remove(ranking, entry):
+    position = bisect.bisect_left(ranking, entry)
+    if position < len(ranking) and ranking[position] == entry:
+        del ranking[position]
+
+
+def leaderboard_frame(profiles):
+    return pd.DataFrame([profile.as_row() for profile in profiles], columns=LEADERBOARD_COLUMNS)
+
+
+class RunnerStats:
+    """Perfiles de corredor (clave: nombre plegado, la misma que RunnerIndex) y rankings ordenados.
+
+    Se construye una vez por carga y cada ano nuevo se suma con add_year sin recalcular el resto:
+    solo se tocan los perfiles de ese ano. Un perfil es una consulta a un dict y un top-N recorre
+    el principio de una lista ya ordenada por la metrica. `year_versions` guarda la version de cada
+    ano sumado (la que pase quien lo carga), para saber cuales han cambiado al recargar.
+    """
+
+    def __init__(self):
+        self.profiles = {}
+        self.year_keys = {}
+        self.year_versions = {}
+        self.rankings = {metric: [] for metric in LEADERBOARD_METRICS}
+
+    @classmethod
+    def from_frame(cls, df, keys=None):
+        # Carga completa: los nombres se pliegan una vez para todo el historico (o se reutilizan las
+        # claves de RunnerIndex.row_keys) y los rankings se ordenan al final, no tras cada ano.
+        stats = cls()
+        df = df.assign(runner_key=runner_keys(df["runner_name"]) if keys is None else keys)
+        valid = df.dropna(subset=["year", "time_seconds"])
+        for year, year_df in valid.groupby(valid["year"].astype(int)):
+            stats.apply_year(int(year), year_rows(year_df))
+        stats.rebuild_rankings()
+        return stats
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def add_year(self, year, year_df, version=None):
+        """Anade (o reemplaza) los resultados de un ano: columnas runner_name, time_seconds,
+        pace_seconds y gender del DataFrame derivado. Solo se recalculan los perfiles de ese ano."""
+        rows = year_rows(year_df)
+        keys = set(self.year_keys.get(year, ())) | {row[0] for row in rows}
+        self.update(keys, lambda: self.apply_year(year, rows))
+        self.year_versions[year] = version
+
+    def add_years(self, year_frames):
+        """add_year para un iterable de (ano, DataFrame, version). En la primera carga (sin perfiles)
+        cada ano se aplica segun llega y los rankings se ordenan una sola vez al final."""
+        if self.profiles:
+            for year, year_df, version in year_frames:
+                self.add_year(year, year_df, version)
+            return
+        for year, year_df, version in year_frames:
+            self.apply_year(year, year_rows(year_df))
+            self.year_versions[year] = version
+        self.rebuild_rankings()
+
+    def apply_year(self, year, rows):
+        self.drop_year_results(year)
+        for key, label, time_seconds, pace_seconds, percentile, gender in rows:
+            profile = self.profiles.get(key)
+            if profile is None:
+                profile = self.profiles[key] = RunnerProfile(key, " ".join(str(label).split()))
+            profile.add_result(year, time_seconds, pace_seconds, percentile)
+            if isinstance(gender, str):
+                profile.gender = gender
+        self.year_keys[year] = [row[0] for row in rows]
+
+    def remove_year(self, year):
+        self.update(set(self.year_keys.get(year, ())), lambda: self.drop_year_results(year))
+        self.year_versions.pop(year, None)
+
+    def drop_year_results(self, year):
+        for key in self.year_keys.pop(year, ()):
+            profile = self.profiles[key]
+            profile.remove_result(year)
+            if not profile.years:
+                del self.profiles[key]
+
+    def update(self, keys, apply):
+        # Pocos perfiles tocados: se sacan de los rankings y se reinsertan en orden tras el cambio.
+        # Muchos: se aplica el cambio y se reordena todo de una vez.
+        incremental = len(keys) <= INCREMENTAL_RERANK_FRACTION * len(self.profiles)
+        if incremental:
+            for key in keys:
+                if key in self.profiles:
+                    self.rank_entries(self.profiles[key], bisect_remove)
+        apply()
+        if incremental:
+            for key in keys:
+                if key in self.profiles:
+                    self.rank_entries(self.profiles[key], bisect.insort)
+        else:
+            self.rebuild_rankings()
+
+    def rebuild_rankings(self):
+        for metric, ranking in self.rankings.items():
+            ranking[:] = sorted(
+                (value, key)
+                for key, profile in self.profiles.items()
+                if (value := profile.metric(metric)) is not None
+            )
+
+    def rank_entries(self, profile, operation):
+        for metric, ranking in self.rankings.items():
+            value = profile.metric(metric)
+            if value is not None:
+                operation(ranking, (value, profile.key))
+
+    def profile(self, key):
+        return self.profiles.get(key)
+
+    def leaderboard(self, metric="mean", limit=20, min_races=1, gender=None):
+        """Los `limit` mejores por la metrica, entre los corredores con al menos `min_races` carreras."""
+        top = []
+        for _, key in self.rankings[metric]:
+            profile = self.profiles[key]
+            if profile.races >= min_races and (gender is None or profile.gender == gender):
+                top.append(profile)
+                if len(top) == limit:
+                    break
+        return leaderboard_frame(top)
@@ -0,0 +1,67 @@
+import bisect
+from itertools import accumulate
+
+from race_core.rollups import HISTOGRAM_BIN_SECONDS
+
+
+class TimeSketch:
+    """Histograma acumulado de los tiempos de un grupo (ano, genero, grupo de edad).
+
+    Con los recuentos por bin de race_time_histogram responde percentiles y cuantiles en
+    O(log bins), sin las filas originales. Dentro de cada bin se supone un reparto uniforme:
+    un percentil se desvia como mucho el peso de un bin y un cuantil, el ancho de un bin.
+    """
+
+    __slots__ = ("bin_starts", "counts", "cumulative", "bin_seconds")
+
+    def __init__(self, bin_starts, counts, bin_seconds=HISTOGRAM_BIN_SECONDS):
+        self.bin_starts = list(bin_starts)
+        self.counts = list(counts)
+        self.cumulative = list(accumulate(self.counts))
+        self.bin_seconds = bin_seconds
+
+    @classmethod
+    def from_bins(cls, bins, bin_seconds=HISTOGRAM_BIN_SECONDS):
+        # `bins`: filas de race_time_histogram de un solo grupo, en cualquier orden.
+        bins = bins.sort_values("bin_start_seconds")
+        return cls(bins["bin_start_seconds"].tolist(), bins["bin_count"].tolist(), bin_seconds)
+
+    def __len__(self):
+        return len(self.bin_starts)
+
+    @property
+    def total(self):
+        return self.cumulative[-1] if self.cumulative else 0
+
+    def rank_fraction(self, seconds):
+        """Fraccion de corredores con un tiempo menor que `seconds` (interpolada dentro del bin)."""
+        if not self.total:
+            return None
+        position = bisect.bisect_right(self.bin_starts, seconds) - 1
+        if position < 0:
+            return 0.0
+        before = self.cumulative[position - 1] if position else 0
+        inside = min(max((seconds - self.bin_starts[position]) / self.bin_seconds, 0.0), 1.0)
+        return (before + self.counts[position] * inside) / self.total
+
+    def quantile(self, fraction):
+        """Tiempo por debajo del cual queda `fraction` de los corredores."""
+        if not self.total:
+            return None
+        target = fraction * self.total
+        position = min(bisect.bisect_left(self.cumulative, target), len(self.cumulative) - 1)
+        before = self.cumulative[position - 1] if position else 0
+        inside = (target - before) / self.counts[position] if self.counts[position] else 0.0
+        return self.bin_starts[position] + inside * self.bin_seconds
+
+
+def build_sketches(histogram, bin_seconds=HISTOGRAM_BIN_SECONDS):
+    """Un TimeSketch por (ano, genero, grupo de edad) a partir de la tabla de histogramas."""
+    sketches = {}
+    ordered = histogram.sort_values(["year", "gender", "age_group", "bin_start_seconds"])
+    for (year, gender, age_group), bins in ordered.groupby(["year", "gender", "age_group"], sort=False):
+        sketches[(int(year), gender, age_group)] = TimeSketch(
+            bins["bin_start_seconds"].tolist(), bins["bin_count"].tolist(), bin_seconds
+        )
+    return sketches
+
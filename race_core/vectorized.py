@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from race_core.parsers import (
+    AGE_GROUP_PREFIXES,
+    CATEGORY_GENDER_RE,
+    CATEGORY_RANK_RE,
+    DISTANCE_NUMBER_RE,
+    GENDER_TOKEN_RE,
+    NO_CATEGORY,
+    OTHER_AGE_GROUP,
+)
+
+
+TIME_RE = r"^(?:(\d+):)?(\d+):(\d+)$"
+
+
+def map_unique(values, func):
+    # Las columnas tienen muy pocos valores distintos: se calcula cada uno una vez y se
+    # reparte por codigo. Los nulos (codigo -1) caen en la ultima posicion, func(None).
+    series = pd.Series(values)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    mapped = func(pd.Series(uniques, dtype=object)).tolist()
+    mapped.append(func(pd.Series([None], dtype=object)).iloc[0])
+    return pd.Series(np.asarray(mapped, dtype=object)[codes], index=series.index)
+
+
+def _clean_text(values):
+    return values.where(values.notna(), None).map(lambda value: "" if value is None else str(value)).str.strip()
+
+
+def _times_to_seconds(values):
+    parts = _clean_text(values).str.extract(TIME_RE)
+    numbers = parts.apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+    hours = np.where(parts[0].isna(), 0.0, numbers[:, 0])
+    return pd.Series(hours * 3600 + numbers[:, 1] * 60 + numbers[:, 2])
+
+
+def _distances_to_km(values):
+    text = _clean_text(values).str.upper()
+    number = pd.to_numeric(text.str.extract(DISTANCE_NUMBER_RE.pattern)[0].str.replace(",", "."), errors="coerce")
+    conditions = [text.str.contains("KM", regex=False), text.str.contains("M", regex=False)]
+    return pd.Series(np.select(conditions, [number, number / 1000], default=np.nan))
+
+
+def _category_bases(values):
+    text = _clean_text(values).str.upper()
+    return text.str.replace(CATEGORY_RANK_RE.pattern, "", regex=True).str.replace(
+        CATEGORY_GENDER_RE.pattern, "", regex=True
+    )
+
+
+def _age_groups(values):
+    text = values.map(lambda value: "" if value is None or value != value else str(value))
+    upper = text.str.upper()
+    conditions = [(text == "") | (text == NO_CATEGORY)]
+    conditions += [upper.str.startswith(prefix) for prefix, _ in AGE_GROUP_PREFIXES]
+    choices = [NO_CATEGORY] + [label for _, label in AGE_GROUP_PREFIXES]
+    return pd.Series(np.select(conditions, choices, default=OTHER_AGE_GROUP))
+
+
+def _genders(values):
+    text = values.map(lambda value: None if value is None else str(value).strip().upper())
+    token = text.str.extract(GENDER_TOKEN_RE.pattern)[0]
+    prefix = text.str[:1].where(text.str[:1].isin(["M", "F"]))
+    return token.fillna(prefix).astype(object).where(lambda s: s.notna(), None)
+
+
+def time_to_seconds(values):
+    return pd.to_numeric(map_unique(values, _times_to_seconds), errors="coerce")
+
+
+def parse_distance_km(values):
+    return pd.to_numeric(map_unique(values, _distances_to_km), errors="coerce")
+
+
+def normalize_category_base(values):
+    return map_unique(values, _category_bases)
+
+
+def map_age_group(values):
+    return map_unique(values, _age_groups)
+
+
+def detect_gender(sexo_values, category_values):
+    from_sexo = map_unique(sexo_values, _genders)
+    from_category = map_unique(category_values, _genders)
+    return from_sexo.where(from_sexo.notna(), from_category)
+
+
+def derive_columns(df):
+    df["year"] = pd.to_numeric(df["carrera"], errors="coerce")
+    df["time_seconds"] = time_to_seconds(df["tiempo"])
+    df["categoria"] = df["categoria"].fillna(NO_CATEGORY)
+    df["category_raw"] = df["categoria"].astype(str).str.strip()
+    df["category_base"] = normalize_category_base(df["category_raw"])
+    df["gender"] = detect_gender(df["sexo"], df["category_raw"])
+    df["age_group"] = map_age_group(df["category_base"])
+    df["distance_km"] = parse_distance_km(df["distancia"])
+    df["pace_seconds"] = df["time_seconds"] / df["distance_km"]
+    df["runner_name"] = (df["nombre"].fillna("") + " " + df["apellido"].fillna("")).str.strip()
+    return df
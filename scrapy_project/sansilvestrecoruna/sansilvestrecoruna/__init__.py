@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# race_core vive en la raiz del repositorio, fuera del proyecto Scrapy.
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
@@ -0,0 +1,153 @@
+import json
+from pathlib import Path
+
+from scrapy.exporters import CsvItemExporter
+from scrapy.extensions.feedexport import FileFeedStorage
+
+from race_core.parsers import normalize_name, to_int_or_none
+
+
+class CrawlState:
+    """Estado del rastreo en disco para poder reanudarlo tras una caída.
+
+    Por competición (clave ``evento/id_comp`` del registro, un directorio por evento) se guardan,
+    en ficheros de solo añadir:
+    - ``{evento}/{id_comp}.pages.jsonl``: cada página procesada, con los IDs de sus corredores y
+      la página siguiente.
+    - ``{evento}/{id_comp}.items``: los IDs de los corredores ya emitidos (o descartados por un
+      pipeline).
+    - ``{evento}/{id_comp}.done``: marca de competición terminada; el spider no vuelve a pedirla.
+
+    Al reanudar se empieza por la primera página con corredores sin emitir, y estos son los
+    únicos que se vuelven a emitir (o cuyos perfiles se vuelven a pedir).
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pages = {}
+        self.emitted = {}
+        self.pending = {}
+        self.last_page_seen = {}
+        self.files = {}
+
+    @staticmethod
+    def item_id(item):
+        # Igual para el item crudo del spider y para el RunnerRecord que sale de la limpieza.
+        puesto, dorsal = (to_int_or_none(item.get(field)) for field in ("puesto", "dorsal"))
+        nombre, apellido = (normalize_name(item.get(field) or "") for field in ("nombre", "apellido"))
+        return "|".join(("" if value is None else str(value)) for value in (puesto, dorsal, nombre, apellido))
+
+    def path(self, comp_key, suffix):
+        return self.directory / f"{comp_key}.{suffix}"
+
+    def is_done(self, comp_key):
+        return self.path(comp_key, "done").exists()
+
+    def load(self, comp_key):
+        if comp_key in self.pages:
+            return
+
+        self.path(comp_key, "done").parent.mkdir(parents=True, exist_ok=True)
+        pages = {}
+        pages_path = self.path(comp_key, "pages.jsonl")
+        if pages_path.exists():
+            with pages_path.open("r", encoding="utf-8") as file_handle:
+                for line in file_handle:
+                    # Una línea cortada por la caída se ignora: esa página se vuelve a procesar.
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    pages[event["page"]] = event
+
+        emitted = set()
+        items_path = self.path(comp_key, "items")
+        if items_path.exists():
+            emitted = set(items_path.read_text(encoding="utf-8").splitlines())
+
+        self.pages[comp_key] = pages
+        self.emitted[comp_key] = emitted
+        self.pending[comp_key] = set()
+        self.last_page_seen[comp_key] = False
+
+    def resume_url(self, comp_key):
+        """Página por la que seguir, o None si la competición no se ha empezado o ya está completa."""
+        if self.is_done(comp_key):
+            return None
+        self.load(comp_key)
+        pages = self.pages[comp_key]
+        emitted = self.emitted[comp_key]
+        for url, event in pages.items():
+            if not emitted.issuperset(event["ids"]):
+                return url
+        if pages:
+            last = list(pages.values())[-1]
+            if last["next"]:
+                return last["next"]
+            self.mark_done(comp_key)
+        return None
+
+    def append(self, comp_key, suffix, text):
+        key = (comp_key, suffix)
+        file_handle = self.files.get(key)
+        if file_handle is None:
+            file_handle = self.files[key] = self.path(comp_key, suffix).open("a", encoding="utf-8")
+        file_handle.write(text + "\n")
+        file_handle.flush()
+
+    def record_page(self, comp_key, url, ids, next_page):
+        self.load(comp_key)
+        event = {"page": url, "ids": ids, "next": next_page}
+        self.pages[comp_key][url] = event
+        self.append(comp_key, "pages.jsonl", json.dumps(event, ensure_ascii=False))
+        self.pending[comp_key].update(item_id for item_id in ids if item_id not in self.emitted[comp_key])
+        if next_page is None:
+            self.last_page_seen[comp_key] = True
+        self.check_done(comp_key)
+
+    def was_emitted(self, comp_key, item_id):
+        self.load(comp_key)
+        return item_id in self.emitted[comp_key]
+
+    def record_item(self, comp_key, item_id):
+        self.load(comp_key)
+        if item_id in self.emitted[comp_key]:
+            return
+        self.emitted[comp_key].add(item_id)
+        self.pending[comp_key].discard(item_id)
+        self.append(comp_key, "items", item_id)
+        self.check_done(comp_key)
+
+    def check_done(self, comp_key):
+        if self.last_page_seen[comp_key] and not self.pending[comp_key]:
+            self.mark_done(comp_key)
+
+    def mark_done(self, comp_key):
+        self.path(comp_key, "done").touch()
+
+    def close(self):
+        for file_handle in self.files.values():
+            file_handle.close()
+        self.files.clear()
+
+
+class UnbufferedFileFeedStorage(FileFeedStorage):
+    """Feed local sin buffer: cada item está en disco en cuanto se exporta, así una caída no
+    pierde items que CrawlState ya dio por emitidos."""
+
+    def open(self, spider):
+        dirname = Path(self.path).parent
+        if dirname and not dirname.exists():
+            dirname.mkdir(parents=True)
+        return Path(self.path).open(self.write_mode, buffering=0)
+
+
+class AppendCsvItemExporter(CsvItemExporter):
+    """CSV que no repite la cabecera al añadir (-o) a un feed que ya tiene filas, como al reanudar
+    un rastreo: la cabecera repetida acabaría leída como un corredor más."""
+
+    def __init__(self, file, include_headers_line=True, **kwargs):
+        if include_headers_line and file.seekable() and file.tell() > 0:
+            include_headers_line = False
+        super().__init__(file, include_headers_line=include_headers_line, **kwargs)
@@ -0,0 +1,85 @@
+import logging
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlRateStats:
+    """Registra paginas/s e items/s durante el rastreo y el promedio final en las stats."""
+
+    def __init__(self, stats, interval):
+        self.stats = stats
+        self.interval = interval
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        interval = crawler.settings.getfloat("CRAWL_RATE_INTERVAL")
+        if not interval:
+            raise NotConfigured
+        extension = cls(crawler.stats, interval)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        return extension
+
+    def spider_opened(self, spider):
+        self.started = time.monotonic()
+        self.pages_prev = 0
+        self.items_prev = 0
+        self.task = task.LoopingCall(self.log, spider)
+        self.task.start(self.interval, now=False)
+
+    def item_scraped(self, item, spider):
+        # Items por evento y ano: permite ver si alguno se queda atras en modo concurrente.
+        self.stats.inc_value(f"crawl_rate/items/{item.get('evento')}/{item.get('carrera')}")
+
+    def counts(self):
+        return (
+            self.stats.get_value("response_received_count", 0),
+            self.stats.get_value("item_scraped_count", 0),
+        )
+
+    def log(self, spider):
+        pages, items = self.counts()
+        logger.info(
+            "%d paginas (%.1f paginas/s), %d items (%.1f items/s)",
+            pages,
+            (pages - self.pages_prev) / self.interval,
+            items,
+            (items - self.items_prev) / self.interval,
+            extra={"spider": spider},
+        )
+        self.pages_prev, self.items_prev = pages, items
+
+    def spider_closed(self, spider, reason):
+        if self.task and self.task.running:
+            self.task.stop()
+
+        elapsed = time.monotonic() - self.started
+        if elapsed <= 0:
+            return
+        pages, items = self.counts()
+        self.stats.set_value("crawl_rate/pages_per_second", round(pages / elapsed, 2))
+        self.stats.set_value("crawl_rate/items_per_second", round(items / elapsed, 2))
+        logger.info(
+            "Rastreo terminado en %.1f s: %.1f paginas/s, %.1f items/s",
+            elapsed,
+            pages / elapsed,
+            items / elapsed,
+            extra={"spider": spider},
+        )
+
+        if self.stats.get_value("httpcache/hit") or self.stats.get_value("httpcache/miss"):
+            logger.info(
+                "Cache HTTP: %d aciertos, %d fallos, %d revalidadas, %d guardadas",
+                self.stats.get_value("httpcache/hit", 0),
+                self.stats.get_value("httpcache/miss", 0),
+                self.stats.get_value("httpcache/revalidate", 0),
+                self.stats.get_value("httpcache/store", 0),
+                extra={"spider": spider},
+            )
@@ -0,0 +1,32 @@
+from weakref import WeakKeyDictionary
+
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet.defer import DeferredSemaphore
+
+
+# Un juego de semáforos por rastreo, compartido por los handlers de http y https.
+_HOST_SEMAPHORES = WeakKeyDictionary()
+
+
+class HostBudgetDownloadHandler(HTTP11DownloadHandler):
+    """Handler HTTP(S) que limita a CRAWL_HOST_BUDGET las descargas simultáneas contra cada host.
+
+    Los slots de descarga son por evento y año y fijan la concurrencia de cada año; este límite es
+    común a todos los slots de un mismo host. Se aplica justo antes de abrir la conexión, así que las
+    respuestas servidas por la cache HTTP no lo consumen."""
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        self.host_budget = crawler.settings.getint("CRAWL_HOST_BUDGET")
+        self.semaphores = _HOST_SEMAPHORES.setdefault(crawler, {})
+
+    async def download_request(self, request):
+        host = urlparse_cached(request).hostname
+        semaphore = self.semaphores.setdefault(host, DeferredSemaphore(self.host_budget))
+        await maybe_deferred_to_future(semaphore.acquire())
+        try:
+            return await super().download_request(request)
+        finally:
+            semaphore.release()
@@ -0,0 +1,81 @@
+import pickle
+import zlib
+from datetime import date
+from time import time
+
+from scrapy.extensions.httpcache import DbmCacheStorage, RFC2616Policy
+
+from race_core.competitions import load_competitions
+
+
+class CompressedDbmCacheStorage(DbmCacheStorage):
+    """Cache DBM de Scrapy (clave = fingerprint de la petición) con las respuestas comprimidas."""
+
+    def store_response(self, spider, request, response):
+        key = self._fingerprinter.fingerprint(request).hex()
+        data = pickle.dumps(response.to_dict(), protocol=4)
+        self.db[f"{key}_data"] = zlib.compress(data)
+        self.db[f"{key}_time"] = str(time())
+
+    def _read_data(self, spider, request):
+        key = self._fingerprinter.fingerprint(request).hex()
+        tkey = f"{key}_time"
+        if tkey not in self.db:
+            return None
+
+        ts = float(self.db[tkey])
+        if 0 < self.expiration_secs < time() - ts:
+            return None
+
+        try:
+            data = pickle.loads(zlib.decompress(self.db[f"{key}_data"]))  # noqa: S301
+        except zlib.error:
+            # Entrada sin comprimir (DbmCacheStorage): se trata como fallo y se vuelve a descargar.
+            return None
+        return data, ts
+
+
+class YearFreshnessPolicy(RFC2616Policy):
+    """Los años cerrados se sirven siempre de la cache; los que siguen vivos se revalidan con
+    ETag/Last-Modified (RFC 2616).
+
+    Sin HTTPCACHE_LIVE_YEARS, un año está vivo si es el último de su evento en el registro de
+    competiciones o si es el año en curso (o posterior); con la lista, solo los años de la lista.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        live_years = settings.get("HTTPCACHE_LIVE_YEARS")
+        self.live_years = None if live_years is None else {int(year) for year in settings.getlist("HTTPCACHE_LIVE_YEARS")}
+        self.latest_years = {}
+        for competition in load_competitions(settings.get("COMPETITIONS_FILE")):
+            latest = self.latest_years.get(competition.event, competition.year)
+            self.latest_years[competition.event] = max(latest, competition.year)
+        self.current_year = date.today().year
+        self.ignore_http_codes = [int(code) for code in settings.getlist("HTTPCACHE_IGNORE_HTTP_CODES")]
+
+    def is_live(self, event, year):
+        if self.live_years is not None:
+            return year in self.live_years
+        return year >= self.current_year or year == self.latest_years.get(event)
+
+    def is_frozen(self, request):
+        ano = request.meta.get("ano")
+        return ano is not None and not self.is_live(request.meta.get("evento"), int(ano))
+
+    def should_cache_response(self, response, request):
+        if response.status in self.ignore_http_codes:
+            return False
+        if self.is_frozen(request):
+            return True
+        return super().should_cache_response(response, request)
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        if self.is_frozen(request):
+            return True
+        return super().is_cached_response_fresh(cachedresponse, request)
+
+    def is_cached_response_valid(self, cachedresponse, response, request):
+        if self.is_frozen(request):
+            return True
+        return super().is_cached_response_valid(cachedresponse, response, request)
@@ -18,3 +18,4 @@ class corredor(scrapy.Item):
     carrera = scrapy.Field()
     distancia = scrapy.Field()
     ubicacion = scrapy.Field()
+    evento = scrapy.Field()
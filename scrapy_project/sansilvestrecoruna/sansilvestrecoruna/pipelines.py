@@ -1,18 +1,162 @@
+import logging
+
 from itemadapter import ItemAdapter
-from scrapy.exceptions import DropItem
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.defer import deferred_from_coro, maybe_deferred_to_future
+from twisted.internet.defer import DeferredLock
+from twisted.internet.threads import deferToThread
+
+from race_core.db import get_connection
+from race_core.loader import load_runner_cache, race_key, refresh_rollups, validate_item, write_results_batch
+from race_core.parsers import normalize_name
+from race_core.records import RunnerRecord
+
+logger = logging.getLogger(__name__)
+
 
 class SanSilvestreLimpiezaPipeline:
     def process_item(self, item, spider):
-        adapter = ItemAdapter(item)
+        # A partir de aquí el corredor viaja como RunnerRecord: enteros y tiempo ya convertidos.
+        record = RunnerRecord.from_mapping(ItemAdapter(item))
 
         # 1. Limpieza de nombres y apellidos (Poner en mayúsculas y quitar espacios extra)
-        for campo in ['nombre', 'apellido']:
-            valor = adapter.get(campo)
-            if valor:
-                adapter[campo] = valor.strip().upper()
+        record.nombre = normalize_name(record.nombre)
+        record.apellido = normalize_name(record.apellido)
 
         # 2. Validación: Si el corredor no tiene nombre, lo descartamos
-        if not adapter.get('nombre'):
-            raise DropItem(f"Corredor sin nombre encontrado en puesto {adapter.get('puesto')}")
+        if not record.nombre:
+            raise DropItem(f"Corredor sin nombre encontrado en puesto {record.puesto}")
+
+        return record
+
+
+class MariaDBPipeline:
+    """Escribe los corredores en MariaDB mientras se rastrea, en lotes. La conexión y cada lote se
+    ejecutan en el pool de hilos del reactor (deferToThread), de uno en uno, para no bloquearlo.
+    Si un lote falla, el spider se cierra con el motivo "db_error". Se activa con
+    DB_PIPELINE_ENABLED = True."""
+
+    def __init__(self, crawler, batch_size, max_pending, refresh):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.refresh = refresh
+        # Un lote a la vez: la conexión de pymysql no se comparte entre hilos.
+        self.lock = DeferredLock()
+        self.pending = 0
+        self.buffer = []
+        self.races = set()
+        self.error = None
+        self.stopping = False
+        self.connection = None
+        self.race_cache = {}
+        self.runner_cache = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("DB_PIPELINE_ENABLED"):
+            raise NotConfigured
+        return cls(
+            crawler,
+            settings.getint("DB_PIPELINE_BATCH_SIZE", 500),
+            settings.getint("DB_PIPELINE_MAX_PENDING", 4),
+            settings.getbool("DB_PIPELINE_REFRESH_ROLLUPS", True),
+        )
+
+    async def open_spider(self, spider):
+        # Sin base de datos el spider no llega a abrirse: el rastreo falla antes de pedir nada.
+        await maybe_deferred_to_future(deferToThread(self.connect))
+
+    def connect(self):
+        connection = get_connection()
+        try:
+            with connection.cursor() as cursor:
+                self.runner_cache = load_runner_cache(cursor)
+        except Exception:
+            connection.close()
+            raise
+        self.connection = connection
+
+    async def process_item(self, item, spider):
+        if self.error is not None:
+            return item
+
+        record = item if isinstance(item, RunnerRecord) else RunnerRecord.from_mapping(ItemAdapter(item))
+        is_valid, reason = validate_item(record)
+        if not is_valid:
+            self.stats.inc_value("db/skipped")
+            logger.debug("Registro omitido en la base de datos (%s): %s", reason, record)
+            return item
+
+        self.races.add(race_key(record))
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            written = self.submit(self.buffer)
+            self.buffer = []
+            if self.pending > self.max_pending:
+                # El escritor va retrasado: el item espera a su lote y Scrapy frena al spider, así
+                # la memoria de los lotes en cola queda acotada.
+                await maybe_deferred_to_future(written)
+        return item
+
+    def submit(self, batch):
+        self.pending += 1
+        written = self.lock.run(deferToThread, self.write_batch, batch)
+        written.addBoth(self.batch_done)
+        return written
+
+    def batch_done(self, result):
+        self.pending -= 1
+        if self.error is not None and not self.stopping:
+            self.stop_crawl()
+        return result
+
+    def stop_crawl(self):
+        # Lo que quedara por rastrear ya no llegaria a la base de datos: se termina con error.
+        self.stopping = True
+        self.stats.set_value("db/error", repr(self.error))
+        engine = self.crawler.engine
+        if hasattr(engine, "close_spider_async"):  # Scrapy >= 2.14
+            deferred_from_coro(engine.close_spider_async(reason="db_error"))
+        else:
+            engine.close_spider(self.crawler.spider, "db_error")
+
+    async def close_spider(self, spider):
+        if self.buffer:
+            self.submit(self.buffer)
+            self.buffer = []
+        await maybe_deferred_to_future(self.lock.run(deferToThread, self.finish))
+        if self.error is not None:
+            self.stats.set_value("db/error", repr(self.error))
+
+    def write_batch(self, batch):
+        if self.error is not None:
+            return
+        try:
+            with self.connection.cursor() as cursor:
+                written = write_results_batch(cursor, self.race_cache, self.runner_cache, batch)
+            self.connection.commit()
+        except Exception as exc:
+            self.fail(exc)
+            return
+        self.stats.inc_value("db/items_written", written)
+        self.stats.inc_value("db/batches")
+
+    def finish(self):
+        try:
+            if self.error is None and self.refresh and self.races:
+                refresh_rollups(self.connection, self.races)
+        except Exception as exc:
+            self.fail(exc)
+        finally:
+            self.connection.close()
 
-        return item
\ No newline at end of file
+    def fail(self, exc):
+        logger.exception("La carga en MariaDB fallo; el resto de items no se escribira")
+        self.error = exc
+        try:
+            self.connection.rollback()
+        except Exception:
+            logger.debug("No se pudo deshacer la transaccion en MariaDB", exc_info=True)
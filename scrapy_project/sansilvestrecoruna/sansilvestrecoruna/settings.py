@@ -89,12 +89,71 @@ FEED_EXPORT_ENCODING = "utf-8"
 USER_AGENT= 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 ROBOTSTXT_OBEY= False # Ignorar el archivo robots.txt si prohíbe el paso
 
-FEED_EXPORT_FIELDS= ['puesto', 'dorsal', 'nombre', 'apellido', 'sexo', 'categoría', 'tiempo', 'distancia', 'carrera', 'ubicacion']
-
 CONCURRENT_REQUESTS = 1  # Obliga a procesar una sola URL a la vez
 DOWNLOAD_DELAY = 0.2    # Un pequeño respiro para no saturar
 
+# Registro de competiciones (evento, ubicación, URL y {id de competición: año}). Sin fichero se usa
+# el de race_core.competitions (San Silvestre de A Coruña): -s COMPETITIONS_FILE=registro.json
+COMPETITIONS_FILE = None
+
+# Modo de rastreo: "serial" (lo anterior, una URL a la vez) o "concurrent" (todos los eventos y años
+# en paralelo, cada uno con su propio slot de descarga y AutoThrottle). Se elige con -s CRAWL_MODE=...
+CRAWL_MODE = "serial"
+CRAWL_HOST_BUDGET = 8        # Descargas simultáneas máximas contra cada host (sumando todos sus
+                             # slots) en modo concurrente
+CRAWL_YEAR_CONCURRENCY = 2   # Peticiones simultáneas por evento y año (slot de descarga), salvo que
+                             # el evento fije su "concurrency" en el registro
+CRAWL_START_DELAY = 0.5      # Retardo inicial por slot; AutoThrottle lo ajusta según la latencia
+CRAWL_MAX_DELAY = 10
+
+# Páginas/s e items/s en el log cada CRAWL_RATE_INTERVAL segundos (0 lo desactiva)
+CRAWL_RATE_INTERVAL = 30
+EXTENSIONS = {
+   'sansilvestrecoruna.extensions.CrawlRateStats': 500,
+}
+
+# Cache HTTP en disco (.scrapy/httpcache): los años cerrados no cambian y se sirven siempre de la
+# cache; solo los vivos se revalidan con ETag/Last-Modified. Con HTTPCACHE_LIVE_YEARS = None son el
+# último año de cada evento del registro y el año en curso; una lista (-s HTTPCACHE_LIVE_YEARS=2024,2025)
+# los fija a mano y una lista vacía congela todos.
+HTTPCACHE_ENABLED = True
+HTTPCACHE_DIR = 'httpcache'
+HTTPCACHE_STORAGE = 'sansilvestrecoruna.httpcache.CompressedDbmCacheStorage'
+HTTPCACHE_POLICY = 'sansilvestrecoruna.httpcache.YearFreshnessPolicy'
+HTTPCACHE_ALWAYS_STORE = True
+HTTPCACHE_IGNORE_HTTP_CODES = [403, 404, 429, 500, 502, 503, 504]
+HTTPCACHE_LIVE_YEARS = None
+
+# Estado del rastreo para reanudarlo tras una caída (.scrapy/<dir>): páginas procesadas, items
+# emitidos y años terminados. Desactivado por defecto: -s CRAWL_STATE_DIR=crawl_state
+# Con el estado activo, el spider escribe el feed local sin buffer y sin repetir la cabecera del CSV
+# al añadir (crawlstate.UnbufferedFileFeedStorage y AppendCsvItemExporter); sin él, los de Scrapy.
+CRAWL_STATE_DIR = None
+
+# La limpieza entrega RunnerRecord; el feed mantiene las columnas (y "categoría") del item corredor
+FEED_EXPORT_FIELDS = {
+   'puesto': 'puesto',
+   'dorsal': 'dorsal',
+   'nombre': 'nombre',
+   'apellido': 'apellido',
+   'sexo': 'sexo',
+   'categoria': 'categoría',
+   'tiempo': 'tiempo',
+   'distancia': 'distancia',
+   'carrera': 'carrera',
+   'ubicacion': 'ubicacion',
+   'evento': 'evento',
+}
+
 # El número 300 indica el orden de ejecución (puedes tener varios)
 ITEM_PIPELINES = {
    'sansilvestrecoruna.pipelines.SanSilvestreLimpiezaPipeline': 300,
-}
\ No newline at end of file
+   'sansilvestrecoruna.pipelines.MariaDBPipeline': 400,
+}
+
+# Carga directa en MariaDB durante el rastreo (variables DB_* como el importador).
+# Desactivada por defecto: se activa con -s DB_PIPELINE_ENABLED=1
+DB_PIPELINE_ENABLED = False
+DB_PIPELINE_BATCH_SIZE = 500     # Corredores por INSERT multi-fila
+DB_PIPELINE_MAX_PENDING = 4      # Lotes en cola como máximo antes de frenar al spider
+DB_PIPELINE_REFRESH_ROLLUPS = True
\ No newline at end of file
@@ -1,90 +1,267 @@
 import scrapy
+from scrapy import signals
+from scrapy.utils.project import data_path
+from race_core.competitions import load_competitions
+from sansilvestrecoruna.crawlstate import CrawlState
 from sansilvestrecoruna.items import corredor
 
 class ResultadosSpider(scrapy.Spider):
     name = "resultados"
-    allowed_domains = ["sansilvestrecoruna.com"]
-
-    MAPA_ANOS = {
-        "16683": 2025,
-        "15442": 2024,
-        "14359": 2023,
-        "13121": 2022,
-        "11984": 2021,
-        "10910": 2019,
-        "9310":  2018,
-        "7799":  2017,
-        "6273":  2016,
-        "5000":  2015,
-        "899":   2014,
-        "-836":  2012,
-        "-603":  2011,
-        "-435":  2010,
-    }
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        if settings.get("CRAWL_STATE_DIR"):
+            cls.update_resume_settings(settings)
+        if settings.get("CRAWL_MODE") == "concurrent":
+            cls.update_concurrent_settings(settings)
+
+    @classmethod
+    def update_resume_settings(cls, settings):
+        # Solo al reanudar: cada item está en disco en cuanto se exporta y el CSV al que se añade
+        # no repite la cabecera.
+        settings.setdict({
+            "FEED_STORAGES": {
+                **settings.getdict("FEED_STORAGES"),
+                "": "sansilvestrecoruna.crawlstate.UnbufferedFileFeedStorage",
+                "file": "sansilvestrecoruna.crawlstate.UnbufferedFileFeedStorage",
+            },
+            "FEED_EXPORTERS": {
+                **settings.getdict("FEED_EXPORTERS"),
+                "csv": "sansilvestrecoruna.crawlstate.AppendCsvItemExporter",
+            },
+        }, priority="spider")
+
+    @classmethod
+    def update_concurrent_settings(cls, settings):
+        # Cada evento y año avanza en paralelo con su propio slot de descarga (concurrencia y
+        # retardo adaptativo). El presupuesto por host lo aplica el handler de descarga sobre todos
+        # los slots del host; CONCURRENT_REQUESTS solo deja sitio para que cada host lo agote.
+        competitions = load_competitions(settings.get("COMPETITIONS_FILE"))
+        hosts = {competition.domain for competition in competitions}
+        host_budget = settings.getint("CRAWL_HOST_BUDGET")
+        year_concurrency = settings.getint("CRAWL_YEAR_CONCURRENCY")
+        download_slots = dict(settings.getdict("DOWNLOAD_SLOTS"))
+        for competition in competitions:
+            if competition.concurrency:
+                download_slots.setdefault(cls.slot_name(competition), {"concurrency": competition.concurrency})
+        settings.setdict({
+            "CONCURRENT_REQUESTS": host_budget * max(len(hosts), 1),
+            "CONCURRENT_REQUESTS_PER_DOMAIN": year_concurrency,
+            "DOWNLOAD_SLOTS": download_slots,
+            "DOWNLOAD_HANDLERS": {
+                **settings.getdict("DOWNLOAD_HANDLERS"),
+                "http": "sansilvestrecoruna.hostbudget.HostBudgetDownloadHandler",
+                "https": "sansilvestrecoruna.hostbudget.HostBudgetDownloadHandler",
+            },
+            "DOWNLOAD_DELAY": settings.getfloat("CRAWL_START_DELAY"),
+            "AUTOTHROTTLE_ENABLED": True,
+            "AUTOTHROTTLE_START_DELAY": settings.getfloat("CRAWL_START_DELAY"),
+            "AUTOTHROTTLE_MAX_DELAY": settings.getfloat("CRAWL_MAX_DELAY"),
+            "AUTOTHROTTLE_TARGET_CONCURRENCY": year_concurrency,
+            # Saca del scheduler la petición del slot con menos descargas en curso
+            "SCHEDULER_PRIORITY_QUEUE": "scrapy.pqueues.DownloaderAwarePriorityQueue",
+        }, priority="spider")
+
+    @staticmethod
+    def slot_name(competition):
+        return f"{competition.domain}/{competition.event}/{competition.year}"
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.set_competitions(load_competitions(crawler.settings.get("COMPETITIONS_FILE"), spider.eventos))
+        state_dir = crawler.settings.get("CRAWL_STATE_DIR")
+        if state_dir:
+            spider.crawl_state = CrawlState(data_path(state_dir, createdir=True))
+            crawler.signals.connect(spider.estado_abierto, signal=signals.spider_opened)
+            crawler.signals.connect(spider.crawl_state.close, signal=signals.spider_closed)
+        return spider
+
+    def estado_abierto(self, spider):
+        # Se conecta aquí, después de las extensiones, para que el item se anote como emitido
+        # cuando el feed ya lo ha escrito (o cuando un pipeline lo ha descartado).
+        self.crawler.signals.connect(self.item_emitido, signal=signals.item_scraped)
+        self.crawler.signals.connect(self.item_emitido, signal=signals.item_dropped)
+
+    def __init__(self, perfiles=None, eventos=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # -a perfiles=1 visita el perfil de cada corredor (modo anterior). Por defecto la
+        # distancia, que es la misma para toda la competición, se lee una sola vez.
+        self.perfiles = perfiles not in (None, False, "", "0", "false")
+        # -a eventos=a,b limita el rastreo a esos eventos del registro.
+        self.eventos = [evento.strip() for evento in eventos.split(",") if evento.strip()] if eventos else None
+        self.distancias = {}
+        self.crawl_state = None
+        self.competiciones = {}
+        self.comp_por_evento_ano = {}
+
+    def set_competitions(self, competitions):
+        self.competiciones = {competition.key: competition for competition in competitions}
+        self.comp_por_evento_ano = {(competition.event, competition.year): competition for competition in competitions}
+        # El middleware de offsite lee allowed_domains al abrir el spider.
+        self.allowed_domains = sorted({competition.domain for competition in competitions})
+
+    def year_meta(self, comp, prio_actual):
+        # 'evento' y 'ano' los usa la política de la cache HTTP; 'competicion' es la clave en el registro.
+        meta = {'competicion': comp.key, 'evento': comp.event, 'ano': comp.year, 'prio_actual': prio_actual}
+        if self.settings.get("CRAWL_MODE") == "concurrent":
+            meta['download_slot'] = self.slot_name(comp)
+        return meta
+
+    async def start(self):
+        # Scrapy >= 2.13 arranca desde start(); start_requests() queda para versiones anteriores.
+        for request in self.start_requests():
+            yield request
 
     def start_requests(self):
-        # Asignamos una prioridad base muy alta que cae drásticamente por cada año
-        # Año 1: Prio 100.000, Año 2: Prio 90.000...
+        # Asignamos una prioridad base muy alta que cae drásticamente por cada competición del
+        # registro. Competición 1: Prio 100.000, competición 2: Prio 90.000...
+        # En modo concurrente todas parten con la misma prioridad.
         prio_base = 100000
-        for id_comp, ano in self.MAPA_ANOS.items():
-            url = f"https://sansilvestrecoruna.com/es/web/resultado/competicion-{id_comp}"
+        prio_paso = 0 if self.settings.get("CRAWL_MODE") == "concurrent" else 10000
+        for comp in self.competiciones.values():
+            url = comp.url
+            prio = prio_base
+            prio_base -= prio_paso
+            if self.crawl_state:
+                url_reanudar = self.crawl_state.resume_url(comp.key)
+                if self.crawl_state.is_done(comp.key):
+                    self.logger.info("%s %s (competición %s) ya terminado, se omite", comp.event, comp.year, comp.competition_id)
+                    continue
+                if url_reanudar:
+                    self.logger.info("%s %s (competición %s): se reanuda en %s", comp.event, comp.year, comp.competition_id, url_reanudar)
+                    url = url_reanudar
             yield scrapy.Request(
                 url, 
                 callback=self.parse, 
-                meta={'ano': ano, 'prio_actual': prio_base}, 
-                priority=prio_base
+                meta=self.year_meta(comp, prio), 
+                priority=prio
             )
-            prio_base -= 10000
+
+    def parse_fila(self, fila, comp):
+        item = corredor()
+        item['puesto'] = (fila.css('td.puesto::text').get() or '').strip()
+        item['dorsal'] = (fila.css('td.dorsal a::text').get() or '').strip()
+        item['nombre'] = (fila.css('td.nombre a::text').get() or '').strip()
+        item['apellido'] = (fila.css('td.apellidos a::text').get() or '').strip()
+        item['sexo'] = (fila.css('td[class*="sexo"]::text').get() or '').strip()
+        item['categoría'] = (fila.css('td[class*="categoria"]::text').get() or '').strip()
+        item['tiempo'] = (fila.css('td.tiempo_display::text').get() or '').strip()
+        item['carrera'] = comp.year
+        item['ubicacion'] = comp.location
+        item['evento'] = comp.event
+        return item, fila.css('td.nombre a::attr(href)').get()
 
     def parse(self, response):
-        ano = response.meta['ano']
+        comp = self.competiciones[response.meta['competicion']]
         prio_actual = response.meta['prio_actual']
-        filas = response.css('div.table-container table tbody tr')
-
-        for i, fila in enumerate(filas):
-            item = corredor()
-            item['puesto'] = (fila.css('td.puesto::text').get() or '').strip()
-            item['dorsal'] = (fila.css('td.dorsal a::text').get() or '').strip()
-            item['nombre'] = (fila.css('td.nombre a::text').get() or '').strip()
-            item['apellido'] = (fila.css('td.apellidos a::text').get() or '').strip()
-            item['sexo'] = (fila.css('td[class*="sexo"]::text').get() or '').strip()
-            item['categoría'] = (fila.css('td[class*="categoria"]::text').get() or '').strip()
-            item['tiempo'] = (fila.css('td.tiempo_display::text').get() or '').strip()
-            item['carrera'] = ano
-            item['ubicacion'] = 'A Coruña'
-
-            url_perfil = fila.css('td.nombre a::attr(href)').get()
+        filas = [self.parse_fila(fila, comp) for fila in response.css('div.table-container table tbody tr')]
+
+        # PAGINACIÓN
+        next_page = response.xpath('//a[contains(text(), "Siguiente")]/@href').get()
+        next_page = response.urljoin(next_page) if next_page else None
+
+        if self.crawl_state:
+            # La página se anota antes de emitir nada; al reanudar solo salen (o se piden sus
+            # perfiles) los corredores que aún no llegaron al feed.
+            ids = [CrawlState.item_id(item) for item, _ in filas]
+            self.crawl_state.record_page(comp.key, response.url, ids, next_page)
+            filas = [
+                (item, url) for (item, url), item_id in zip(filas, ids)
+                if not self.crawl_state.was_emitted(comp.key, item_id)
+            ]
 
+        if self.perfiles:
+            yield from self.seguir_perfiles(response, filas, comp, prio_actual)
+            yield from self.pagina_siguiente(next_page, comp, prio_actual)
+            return
+
+        distancia = self.distancias.get(comp.key)
+        primer_perfil = next((url for _, url in filas if url), None)
+        if distancia is None and primer_perfil:
+            # Primera página de la competición: se lee la distancia de un perfil y, con ella,
+            # se emiten los corredores y se sigue a la página siguiente.
+            yield response.follow(
+                primer_perfil,
+                callback=self.parse_distancia,
+                errback=self.distancia_fallida,
+                meta={
+                    'items': [item for item, _ in filas],
+                    'next_page': next_page,
+                    **self.year_meta(comp, prio_actual),
+                },
+                priority=prio_actual + 1000
+            )
+            return
+
+        yield from self.con_distancia(filas, distancia or "N/A")
+        yield from self.pagina_siguiente(next_page, comp, prio_actual)
+
+    def seguir_perfiles(self, response, filas, comp, prio_actual):
+        for i, (item, url_perfil) in enumerate(filas):
             if url_perfil:
                 # Los perfiles de una página tienen prioridad sobre la página siguiente
                 # Y el puesto 1 tiene prioridad sobre el puesto 2 (prio_actual + 1000 - i)
                 yield response.follow(
                     url_perfil, 
                     callback=self.parse_perfil, 
-                    meta={'item': item}, 
+                    meta={'item': item, **self.year_meta(comp, prio_actual)}, 
                     priority=prio_actual + 1000 - i 
                 )
             else:
                 item['distancia'] = "N/A"
                 yield item
 
-        # PAGINACIÓN
-        next_page = response.xpath('//a[contains(text(), "Siguiente")]/@href').get()
+    def con_distancia(self, filas, distancia):
+        for item, _ in filas:
+            item['distancia'] = distancia
+            yield item
+
+    def pagina_siguiente(self, next_page, comp, prio_actual):
         if next_page:
             # La página siguiente tiene menos prioridad que los perfiles actuales 
-            # pero más que el año siguiente
-            yield response.follow(
+            # pero más que la competición siguiente
+            yield scrapy.Request(
                 next_page, 
                 callback=self.parse, 
-                meta={'ano': ano, 'prio_actual': prio_actual}, 
+                meta=self.year_meta(comp, prio_actual), 
                 priority=prio_actual - 1 
             )
 
-    def parse_perfil(self, response):
-        item = response.meta['item']
+    def leer_distancia(self, response):
         distancia = response.xpath('//td[contains(text(), "KM")]/text()').get()
         if not distancia:
             distancia = response.xpath('//td[contains(text(), " m")]/text()').get()
+        return distancia.strip() if distancia else "N/A"
+
+    def parse_distancia(self, response):
+        meta = response.meta
+        comp = self.competiciones[meta['competicion']]
+        distancia = self.leer_distancia(response)
+        self.distancias[comp.key] = distancia
+        self.logger.info("Distancia de la competición %s (%s %s): %s", comp.competition_id, comp.event, comp.year, distancia)
+
+        for item in meta['items']:
+            item['distancia'] = distancia
+            yield item
+        yield from self.pagina_siguiente(meta['next_page'], comp, meta['prio_actual'])
 
-        item['distancia'] = distancia.strip() if distancia else "N/A"
-        yield item
\ No newline at end of file
+    def distancia_fallida(self, failure):
+        # Sin perfil no se pierden los corredores: salen con N/A y la próxima página lo reintenta.
+        meta = failure.request.meta
+        self.logger.warning("No se pudo leer la distancia de %s: %s", failure.request.url, failure.value)
+        for item in meta['items']:
+            item['distancia'] = "N/A"
+            yield item
+        yield from self.pagina_siguiente(meta['next_page'], self.competiciones[meta['competicion']], meta['prio_actual'])
+
+    def item_emitido(self, item, spider, **kwargs):
+        comp = self.comp_por_evento_ano.get((item.get('evento'), item.get('carrera')))
+        if comp is not None:
+            self.crawl_state.record_item(comp.key, CrawlState.item_id(item))
+
+    def parse_perfil(self, response):
+        item = response.meta['item']
+        item['distancia'] = self.leer_distancia(response)
+        yield item
@@ -0,0 +1,179 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+PROJECT_DIR = ROOT / "scrapy_project" / "sansilvestrecoruna"
+DASHBOARD_DIR = ROOT / "dashboard"
+TESTS_DIR = Path(__file__).resolve().parent
+
+for path in (ROOT, PROJECT_DIR, DASHBOARD_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+ROWS_PER_PAGE = 5
+PROFILE_PAGE = "<html><body><table><tr><td>KM 10</td></tr></table></body></html>"
+
+
+def listing_page(competition_id, page=1, rows=ROWS_PER_PAGE, next_path=None):
+    """Una página de la clasificación con la estructura de la web: `rows` corredores desde el puesto
+    que le toca a `page` y, si hay `next_path`, el enlace a la página siguiente."""
+    first = (page - 1) * rows + 1
+    body = "".join(
+        "<tr>"
+        f'<td class="puesto">{position}</td>'
+        f'<td class="dorsal"><a>{position}</a></td>'
+        f'<td class="nombre"><a href="/participante/{competition_id}-{position}">NOMBRE</a></td>'
+        f'<td class="apellidos"><a href="/participante/{competition_id}-{position}">APELLIDO {position}</a></td>'
+        '<td class="hidden-xs sexo">M</td><td class="hidden-xs categoria">SNM</td>'
+        '<td class="tiempo_display">00:30:00</td>'
+        "</tr>"
+        for position in range(first, first + rows)
+    )
+    pager = f'<a href="{next_path}">Siguiente</a>' if next_path else ""
+    return f'<html><body><div class="table-container"><table><tbody>{body}</tbody></table></div>{pager}</body></html>'
+
+
+class ResultsSite:
+    """Web de resultados local: ``/competicion-<id>[?page=n]`` y ``/participante/<id>-<puesto>``.
+
+    Cuenta las peticiones por host y por (host, competición), y las descargas en curso con su máximo.
+    Las páginas de ``broken`` ({(id, página)}) responden 500.
+    """
+
+    def __init__(self, pages=1, rows=ROWS_PER_PAGE, delay=0):
+        self.pages = pages
+        self.rows = rows
+        self.delay = delay
+        self.broken = set()
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.current = Counter()
+        self.peak = Counter()
+        self.server = None
+
+    @property
+    def port(self):
+        return self.server.server_port
+
+    def url(self, host="127.0.0.1"):
+        return f"http://{host}:{self.port}/competicion-{{competition_id}}"
+
+    def response(self, path):
+        url = urlsplit(path)
+        name = url.path.rsplit("/", 1)[-1]
+        if url.path.startswith("/participante/"):
+            return 200, PROFILE_PAGE
+        competition_id = name.removeprefix("competicion-")
+        page = int(parse_qs(url.query).get("page", ["1"])[0])
+        if (competition_id, page) in self.broken:
+            return 500, ""
+        next_path = f"/competicion-{competition_id}?page={page + 1}" if page < self.pages else None
+        return 200, listing_page(competition_id, page, self.rows, next_path)
+
+    def track(self, host, path, step):
+        # /competicion-<id> o /participante/<id>-<puesto>
+        name = urlsplit(path).path.rsplit("/", 1)[-1]
+        keys = (host, (host, name.removeprefix("competicion-").split("-", 1)[0]))
+        with self.lock:
+            for key in keys:
+                if step > 0:
+                    self.requests[key] += 1
+                self.current[key] += step
+                self.peak[key] = max(self.peak[key], self.current[key])
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                host = self.headers["Host"].split(":", 1)[0]
+                site.track(host, self.path, 1)
+                try:
+                    time.sleep(site.delay)
+                    status, body = site.response(self.path)
+                    if status != 200:
+                        self.send_error(status)
+                        return
+                    body = body.encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    site.track(host, self.path, -1)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def results_site():
+    site = ResultsSite()
+    site.server = ThreadingHTTPServer(("127.0.0.1", 0), site.handler())
+    threading.Thread(target=site.server.serve_forever, daemon=True).start()
+    yield site
+    site.server.shutdown()
+    site.server.server_close()
+
+
+@pytest.fixture
+def write_registry(tmp_path):
+    """Escribe un registro de competiciones con las entradas dadas y devuelve su ruta."""
+
+    def write(*entries):
+        path = tmp_path / "registro.json"
+        registry = [{"location": "A Coruña", **entry} for entry in entries]
+        path.write_text(json.dumps(registry, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    return write
+
+
+# Lanza `scrapy crawl` tras ejecutar el preludio (por ejemplo, para sustituir la conexión a la base
+# de datos): la cmdline de Scrapy se queda con el resto de argumentos.
+CRAWL_SCRIPT = """
+import sys
+sys.path.insert(0, {tests_dir!r})
+{prelude}
+from scrapy.cmdline import execute
+execute(["scrapy"] + sys.argv[1:])
+"""
+
+
+@pytest.fixture
+def run_crawl():
+    """``scrapy crawl resultados`` en un proceso aparte (el reactor no se puede reiniciar), sin
+    cache HTTP ni retardos, con los ajustes y argumentos del spider dados."""
+
+    def run(registry_file, settings=None, spider_args=(), output=None, prelude="", env=None, timeout=120):
+        settings = {
+            "COMPETITIONS_FILE": registry_file,
+            "HTTPCACHE_ENABLED": 0,
+            "DOWNLOAD_DELAY": 0,
+            "CRAWL_START_DELAY": 0,
+            "LOG_LEVEL": "INFO",
+            **(settings or {}),
+        }
+        command = [sys.executable, "-c", CRAWL_SCRIPT.format(tests_dir=str(TESTS_DIR), prelude=prelude), "crawl", "resultados"]
+        for name, value in settings.items():
+            command += ["-s", f"{name}={value}"]
+        for arg in spider_args:
+            command += ["-a", arg]
+        if output is not None:
+            command += ["-o", str(output)]
+        return subprocess.run(command, cwd=PROJECT_DIR, env=env, capture_output=True, text=True, timeout=timeout)
+
+    return run
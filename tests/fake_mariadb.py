@@ -0,0 +1,88 @@
+"""Conexiones falsas a MariaDB: la de los rastreos de prueba (se instala desde el preludio de
+run_crawl) y un cursor que graba las sentencias para probar race_core.loader sin servidor."""
+
+
+class FailingCursor:
+    """Lee una tabla de corredores vacía y falla en la primera escritura."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return []
+
+    def executemany(self, sql, rows):
+        raise RuntimeError("Disco lleno")
+
+
+class FailingConnection:
+    def cursor(self):
+        return FailingCursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def install():
+    import sansilvestrecoruna.pipelines as pipelines
+
+    pipelines.get_connection = FailingConnection
+
+
+def normalize_sql(sql):
+    return " ".join(sql.split())
+
+
+class RecordingCursor:
+    """Guarda cada sentencia (SQL en una línea y parámetros) y responde a las consultas con
+    ``responses``: pares (inicio del SQL, función(params) -> filas)."""
+
+    def __init__(self, responses=()):
+        self.responses = list(responses)
+        self.statements = []
+        self.rows = []
+        self.lastrowid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=None):
+        sql = normalize_sql(sql)
+        self.statements.append((sql, params))
+        self.rows = next((list(respond(params)) for prefix, respond in self.responses if sql.startswith(prefix)), [])
+
+    def executemany(self, sql, rows):
+        self.statements.append((normalize_sql(sql), list(rows)))
+
+    def fetchall(self):
+        return self.rows
+
+    def params(self, prefix):
+        """Parámetros de las sentencias que empiezan por ``prefix``, en orden."""
+        return [params for sql, params in self.statements if sql.startswith(prefix)]
+
+
+class RecordingConnection:
+    def __init__(self, cursor):
+        self.recording_cursor = cursor
+
+    def cursor(self):
+        return self.recording_cursor
+
+    def commit(self):
+        self.recording_cursor.statements.append(("COMMIT", None))
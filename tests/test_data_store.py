@@ -0,0 +1,136 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from data_store import RaceDataset, build_frame, open_dataset, partition_path, write_cache
+from race_core.runner_index import RunnerIndex
+from race_core.runner_stats import RunnerStats
+from sources import FrameSource
+
+
+EVENT = "san-silvestre-coruna"
+# Corredores de cada ano: (nombre, apellido, sexo, tiempo).
+RUNNERS = {
+    2022: [("Ana", "Ruiz", "F", "00:40:00"), ("Luis", "Gil", "M", "00:35:00"), ("José", "Pérez", "M", "00:45:00")],
+    2023: [("ANA", "RUIZ", "F", "00:39:00"), ("Eva", "Sanz", "F", "00:38:00")],
+    2024: [("Ana", "Ruiz", "F", "00:38:30"), ("Luis", "Gil", "M", "00:36:00"), ("Jose", "Perez", "M", "00:44:00")],
+}
+
+
+def records(runners=RUNNERS, event=EVENT):
+    return [
+        {
+            "puesto": position,
+            "dorsal": position,
+            "nombre": first_name,
+            "apellido": last_name,
+            "sexo": sex,
+            "categoría": f"SN{sex}",
+            "tiempo": time_text,
+            "distancia": "KM 10",
+            "carrera": year,
+            "ubicacion": "A Coruña",
+            "evento": event,
+        }
+        for year, rows in runners.items()
+        for position, (first_name, last_name, sex, time_text) in enumerate(rows, start=1)
+    ]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    cache_path = tmp_path / "salidas.parquet"
+    write_cache(build_frame(records()), cache_path, {"version": "test"})
+    return RaceDataset(cache_path)
+
+
+def lazy_source(dataset):
+    index = RunnerIndex.from_names(dataset.runner_names(EVENT))
+    stats = dataset.sync_runner_stats(EVENT, RunnerStats())
+    return FrameSource(None, None, None, index, {}, stats, dataset, EVENT)
+
+
+def test_cache_has_year_partitions_and_no_runner_table(dataset):
+    files = sorted(path.name for path in (dataset.cache_path / f"event={EVENT}").iterdir())
+    assert files == ["histogram.parquet", "summary.parquet", "year=2022", "year=2023", "year=2024"]
+    years = dataset.manifest["events"][EVENT]["years"]
+    assert {year: info["rows"] for year, info in years.items()} == {"2022": 3, "2023": 2, "2024": 3}
+    assert len({info["digest"] for info in years.values()}) == 3
+
+
+def test_runner_history_reads_only_the_runner_years(dataset):
+    source = lazy_source(dataset)
+    assert dataset.cached_partitions() == []
+
+    history = source.runner_history("EVA SANZ")
+    assert history["year"].tolist() == [2023]
+    assert history["time_seconds"].tolist() == [2280.0]
+    assert dataset.cached_partitions() == [(EVENT, 2023)]
+
+    history = source.runner_history("JOSE PEREZ")
+    assert history["year"].tolist() == [2022, 2024]
+    assert history["time_seconds"].tolist() == [2700.0, 2640.0]
+    assert source.runner_history("NADIE").empty
+
+
+def test_lazy_history_matches_the_full_frame(dataset):
+    df = build_frame(records())
+    eager = FrameSource(df, None, None, sketches={}, runner_stats=RunnerStats())
+    source = lazy_source(dataset)
+    for _, key in eager.search_runners("a"):
+        pd.testing.assert_frame_equal(
+            source.runner_history(key).reset_index(drop=True),
+            eager.runner_history(key).reset_index(drop=True),
+            check_dtype=False,
+            check_categorical=False,
+        )
+
+
+def test_partition_lru_keeps_the_last_year_over_the_limit(dataset):
+    dataset.max_bytes = 1
+    dataset.year_frame(EVENT, 2022)
+    dataset.year_frame(EVENT, 2024)
+    assert dataset.cached_partitions() == [(EVENT, 2024)]
+    assert dataset.year_frame(EVENT, 1999).empty
+
+
+def test_sync_runner_stats_reads_only_new_or_changed_years(dataset, monkeypatch):
+    stats = dataset.sync_runner_stats(EVENT, RunnerStats())
+    assert stats.profile("ANA RUIZ").races == 3
+
+    changed = {**RUNNERS, 2023: [("Eva", "Sanz", "F", "00:37:00")], 2025: [("Ana", "Ruiz", "F", "00:38:00")]}
+    del changed[2022]
+    write_cache(build_frame(records(changed)), dataset.cache_path, {"version": "test"})
+    reloaded = RaceDataset(dataset.cache_path)
+    read = []
+    year_runners = reloaded.year_runners
+    monkeypatch.setattr(reloaded, "year_runners", lambda event, year: read.append(year) or year_runners(event, year))
+
+    reloaded.sync_runner_stats(EVENT, stats)
+
+    assert read == [2023, 2025]
+    assert sorted(stats.year_versions) == [2023, 2024, 2025]
+    # La etiqueta de un perfil es la primera grafia vista ("José Pérez", de 2022): se comparan las metricas.
+    full = RunnerStats.from_frame(build_frame(records(changed)))
+    for metric in ("mean", "best", "pace", "trend"):
+        pd.testing.assert_frame_equal(
+            stats.leaderboard(metric, 10).drop(columns="runner"), full.leaderboard(metric, 10).drop(columns="runner")
+        )
+
+
+def test_open_dataset_rebuilds_only_when_the_content_changes(tmp_path):
+    source_path = tmp_path / "salidas.json"
+    source_path.write_text(json.dumps(records(), ensure_ascii=False), encoding="utf-8")
+    dataset = open_dataset(source_path)
+    partition = partition_path(dataset.cache_path, EVENT, 2022)
+    built = partition.stat().st_mtime_ns
+
+    # Mismo contenido con otro mtime: solo se actualiza el manifiesto.
+    os.utime(source_path, ns=(built + 10**9, built + 10**9))
+    assert open_dataset(source_path).years(EVENT) == [2022, 2023, 2024]
+    assert partition.stat().st_mtime_ns == built
+
+    source_path.write_text(json.dumps(records({2025: RUNNERS[2024]}), ensure_ascii=False), encoding="utf-8")
+    assert open_dataset(source_path).years(EVENT) == [2025]
@@ -0,0 +1,23 @@
+def test_concurrent_crawl_keeps_the_budget_per_host_and_the_concurrency_per_slot(results_site, write_registry, run_crawl):
+    results_site.rows = 12
+    results_site.delay = 0.05
+    # Un evento grande en 127.0.0.1 y otro pequeño en localhost: CONCURRENT_REQUESTS deja sitio para
+    # dos hosts, pero 127.0.0.1 no debe quedarse con el presupuesto de localhost cuando este acaba.
+    registry_file = write_registry(
+        {"event": "grande", "url": results_site.url(), "competitions": {"1": 2021, "2": 2022, "3": 2023, "4": 2024}},
+        {"event": "pequeno", "url": results_site.url("localhost"), "competitions": {"9": 2024}, "concurrency": 1},
+    )
+
+    crawl = run_crawl(
+        registry_file,
+        {"CRAWL_MODE": "concurrent", "CRAWL_HOST_BUDGET": 3, "CRAWL_YEAR_CONCURRENCY": 2},
+        spider_args=["perfiles=1"],
+    )
+
+    assert crawl.returncode == 0, crawl.stderr
+    peak = results_site.peak
+    assert peak["127.0.0.1"] == 3
+    assert peak["localhost"] == 1
+    for competition_id in "1234":
+        assert 1 <= peak[("127.0.0.1", competition_id)] <= 2
+    assert peak[("localhost", "9")] == 1
@@ -0,0 +1,70 @@
+import pytest
+
+from fake_mariadb import RecordingConnection, RecordingCursor
+from race_core.loader import refresh_rollups
+from race_core.rollups import ALL
+
+
+# (id, runners.sex, category_code, time_seconds) de cada carrera, y (runner_id, nombre, apellidos).
+RESULTS = {
+    ("prueba", 2023): [(10, "M", "SNM", 2000), (11, "F", "SNF", 2400)],
+    ("prueba", 2024): [(20, "M", "SNM", 1800), (21, "F", "VTAF", 2000), (22, "M", "VTBM", 2200)],
+}
+RUNNERS = {
+    ("prueba", 2023): [(1, "JOSÉ", "PÉREZ GIL"), (2, "ANA", "RUIZ")],
+    ("prueba", 2024): [(1, "JOSÉ", "PÉREZ GIL"), (2, "ANA", "RUIZ"), (3, "LUIS", "PEREZ")],
+}
+
+
+@pytest.fixture
+def refreshed():
+    cursor = RecordingCursor(
+        [
+            ("SELECT r.id, ru.sex, r.category_code, r.time_seconds", lambda params: RESULTS[params]),
+            ("SELECT DISTINCT ru.id, ru.first_name, ru.last_name", lambda params: RUNNERS[params]),
+        ]
+    )
+    refresh_rollups(RecordingConnection(cursor), {("prueba", 2024), ("prueba", 2023)})
+    return cursor
+
+
+def test_each_race_is_refreshed_in_order_and_committed(refreshed):
+    assert refreshed.params("SELECT r.id") == [("prueba", 2023), ("prueba", 2024)]
+    assert refreshed.params("DELETE FROM race_summary") == [("prueba", 2023), ("prueba", 2024)]
+    assert refreshed.params("DELETE FROM race_time_histogram") == [("prueba", 2023), ("prueba", 2024)]
+    # Un COMMIT al final de cada carrera, despues de todas sus escrituras.
+    commits = [position for position, (sql, _) in enumerate(refreshed.statements) if sql == "COMMIT"]
+    assert len(commits) == 2
+    assert commits[-1] == len(refreshed.statements) - 1
+
+
+def test_summary_and_histogram_rows_carry_the_event(refreshed):
+    summary_2024 = refreshed.params("INSERT INTO race_summary")[1]
+    # (evento, ano, genero, grupo de edad) -> participantes y minimo.
+    totals = {row[:4]: row[4:6] for row in summary_2024}
+    assert totals[("prueba", 2024, ALL, ALL)] == (3, 1800)
+    assert totals[("prueba", 2024, "M", ALL)] == (2, 1800)
+    assert totals[("prueba", 2024, "F", "Veteranos A 35-44")] == (1, 2000)
+
+    histogram_2024 = refreshed.params("INSERT INTO race_time_histogram")[1]
+    overall = [row[4:] for row in histogram_2024 if row[:4] == ("prueba", 2024, ALL, ALL)]
+    assert overall == [(1800, 1), (1980, 1), (2160, 1)]
+
+
+def test_result_groups_get_gender_age_group_and_percentiles(refreshed):
+    groups_2024 = {row[0]: row[1:] for row in refreshed.params("INSERT INTO result_groups")[1]}
+    # Fraccion del grupo con peor tiempo: el ganador se queda con 2/3 de los tres.
+    assert groups_2024[20] == ("M", "Senior 20-34", pytest.approx(2 / 3), 0.5, 0.0)
+    assert groups_2024[21][:2] == ("F", "Veteranos A 35-44")
+    assert groups_2024[22][2:] == (0.0, 0.0, 0.0)
+    assert refreshed.params("UPDATE results r") == [("prueba", 2023), ("prueba", 2024)]
+
+
+def test_runner_tokens_and_stats_follow_each_race(refreshed):
+    tokens_2023 = refreshed.params("INSERT IGNORE INTO runner_tokens")[0]
+    assert sorted(tokens_2023) == [("ANA", 2), ("GIL", 1), ("JOSE", 1), ("PEREZ", 1), ("RUIZ", 2)]
+    assert ("PEREZ", 3) in refreshed.params("INSERT IGNORE INTO runner_tokens")[1]
+
+    assert refreshed.params("INSERT IGNORE INTO stats_runners") == [("prueba", 2023), ("prueba", 2024)]
+    assert refreshed.params("DELETE s FROM runner_stats") == [("prueba",), ("prueba",)]
+    assert refreshed.params("INSERT INTO runner_stats") == [("prueba",), ("prueba",)]
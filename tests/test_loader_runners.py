@@ -0,0 +1,64 @@
+from fake_mariadb import RecordingCursor
+from race_core.loader import resolve_runner_ids
+from race_core.parsers import fold_name
+
+
+class RunnersCursor(RecordingCursor):
+    """runners en memoria con uq_runner_identity y una collation que ignora tildes, como la de MariaDB."""
+
+    def __init__(self, rows=()):
+        super().__init__([("SELECT id, first_name, last_name, sex FROM runners WHERE", self.select)])
+        self.ids = {}
+        for key in rows:
+            self.insert(key)
+
+    @staticmethod
+    def collate(key):
+        return tuple(fold_name(value) for value in key)
+
+    def insert(self, key):
+        self.lastrowid = self.ids.setdefault(self.collate(key), (len(self.ids) + 1, key))[0]
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        if self.statements[-1][0].startswith("INSERT INTO runners"):
+            self.insert(params)
+
+    def executemany(self, sql, rows):
+        super().executemany(sql, rows)
+        for key in rows:
+            self.insert(key)
+
+    def select(self, params):
+        wanted = {self.collate(params[start:start + 3]) for start in range(0, len(params), 3)}
+        return [(runner_id, *key) for collated, (runner_id, key) in self.ids.items() if collated in wanted]
+
+
+def test_resolve_runner_ids_inserts_and_selects_only_the_missing_keys():
+    cursor = RunnersCursor([("ANA", "PEREZ", "F")])
+    cache = {("ANA", "PEREZ", "F"): 1}
+    keys = [("LUIS", "GIL", "M"), ("ANA", "PEREZ", "F"), ("LUIS", "GIL", "M"), ("EVA", "RUIZ", "F")]
+
+    resolve_runner_ids(cursor, cache, keys)
+
+    missing = [("EVA", "RUIZ", "F"), ("LUIS", "GIL", "M")]
+    assert cursor.params("INSERT INTO runners") == [missing]
+    assert cursor.params("SELECT id, first_name, last_name, sex FROM runners") == [[value for key in missing for value in key]]
+    assert cache == {("ANA", "PEREZ", "F"): 1, ("EVA", "RUIZ", "F"): 2, ("LUIS", "GIL", "M"): 3}
+
+
+def test_resolve_runner_ids_does_nothing_when_every_key_is_cached():
+    cursor = RunnersCursor()
+    resolve_runner_ids(cursor, {("ANA", "PEREZ", "F"): 1}, [("ANA", "PEREZ", "F")])
+    assert cursor.statements == []
+
+
+def test_resolve_runner_ids_falls_back_to_upsert_for_keys_equal_under_the_collation():
+    # "JOSÉ" y "JOSE" son la misma fila para MariaDB, pero el SELECT devuelve la clave guardada.
+    cursor = RunnersCursor([("JOSE", "PEREZ", "M")])
+    cache = {}
+
+    resolve_runner_ids(cursor, cache, [("JOSÉ", "PÉREZ", "M")])
+
+    assert cache == {("JOSE", "PEREZ", "M"): 1, ("JOSÉ", "PÉREZ", "M"): 1}
+    assert len(cursor.ids) == 1
@@ -0,0 +1,39 @@
+import os
+import socket
+
+
+DB_SETTINGS = {"DB_PIPELINE_ENABLED": 1, "DB_PIPELINE_BATCH_SIZE": 1, "DB_PIPELINE_MAX_PENDING": 1}
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_crawl_fails_fast_when_the_database_is_unreachable(results_site, write_registry, run_crawl):
+    registry_file = write_registry({"event": "prueba", "url": results_site.url(), "competitions": {"1": 2024}})
+
+    # Lotes de un corredor y uno en cola: sin conexión, la versión con hilo y cola se quedaba
+    # esperando en put() para siempre.
+    crawl = run_crawl(
+        registry_file,
+        DB_SETTINGS,
+        env={**os.environ, "DB_HOST": "127.0.0.1", "DB_PORT": str(unused_port())},
+        timeout=60,
+    )
+
+    assert crawl.returncode != 0
+    assert "OperationalError" in crawl.stderr
+    assert not results_site.requests
+
+
+def test_failed_batch_closes_the_spider_with_db_error(results_site, write_registry, run_crawl):
+    results_site.pages = 20
+    registry_file = write_registry({"event": "prueba", "url": results_site.url(), "competitions": {"1": 2024}})
+
+    crawl = run_crawl(registry_file, DB_SETTINGS, prelude="import fake_mariadb; fake_mariadb.install()", timeout=60)
+
+    assert "Spider closed (db_error)" in crawl.stderr
+    assert "'db/error': \"RuntimeError('Disco lleno')\"" in crawl.stderr
+    assert results_site.requests[("127.0.0.1", "1")] < 20
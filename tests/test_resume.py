@@ -0,0 +1,56 @@
+import io
+
+from scrapy.settings import Settings
+
+import sansilvestrecoruna.settings as project_settings
+from conftest import ROWS_PER_PAGE
+from race_core.records import iter_csv_records
+from sansilvestrecoruna.spiders.resultados import ResultadosSpider
+
+
+def test_resumed_crawl_appends_to_the_csv_without_repeating_the_header(results_site, write_registry, run_crawl, tmp_path):
+    results_site.pages = 2
+    results_site.broken.add(("1", 2))
+    registry_file = write_registry({"event": "prueba", "url": results_site.url(), "competitions": {"1": 2024}})
+    settings = {"CRAWL_STATE_DIR": tmp_path / "estado", "RETRY_ENABLED": 0}
+    feed = tmp_path / "salidas.csv"
+
+    # La página 2 falla: el primer rastreo termina con la competición a medias.
+    assert run_crawl(registry_file, settings, output=feed).returncode == 0
+    assert len(feed.read_text(encoding="utf-8").splitlines()) == 1 + ROWS_PER_PAGE
+    results_site.broken.clear()
+    assert run_crawl(registry_file, settings, output=feed).returncode == 0
+
+    lines = feed.read_text(encoding="utf-8").splitlines()
+    assert lines[0].startswith("puesto,")
+    assert lines.count(lines[0]) == 1
+    with feed.open("r", encoding="utf-8", newline="") as file_handle:
+        records = list(iter_csv_records(file_handle))
+    assert [record.puesto for record in records] == list(range(1, 2 * ROWS_PER_PAGE + 1))
+    assert {record.evento for record in records} == {"prueba"}
+
+
+def test_csv_records_skip_repeated_headers():
+    # Feeds reanudados antes de AppendCsvItemExporter: la cabecera aparece otra vez a mitad.
+    header = "puesto,dorsal,nombre,apellido,sexo,categoría,tiempo,distancia,carrera,ubicacion,evento\r\n"
+    row = "{0},{0},ANA,PEREZ,F,SNF,00:40:00,KM 10,2024,A Coruña,prueba\r\n"
+    feed = io.StringIO(header + row.format(1) + header + row.format(2))
+    assert [(record.puesto, record.evento) for record in iter_csv_records(feed)] == [(1, "prueba"), (2, "prueba")]
+
+
+def spider_settings(**overrides):
+    settings = Settings()
+    settings.setmodule(project_settings, priority="project")
+    settings.setdict(overrides, priority="cmdline")
+    ResultadosSpider.update_settings(settings)
+    return settings
+
+
+def test_resume_feed_classes_only_with_crawl_state():
+    plain = spider_settings()
+    assert plain.getwithbase("FEED_STORAGES")["file"] == "scrapy.extensions.feedexport.FileFeedStorage"
+    assert plain.getwithbase("FEED_EXPORTERS")["csv"] == "scrapy.exporters.CsvItemExporter"
+
+    resumable = spider_settings(CRAWL_STATE_DIR="estado")
+    assert resumable.getwithbase("FEED_STORAGES")["file"] == "sansilvestrecoruna.crawlstate.UnbufferedFileFeedStorage"
+    assert resumable.getwithbase("FEED_EXPORTERS")["csv"] == "sansilvestrecoruna.crawlstate.AppendCsvItemExporter"
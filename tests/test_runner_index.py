@@ -0,0 +1,66 @@
+import numpy as np
+
+from race_core.runner_index import RunnerIndex, fold_name
+
+
+NAMES = [
+    "José Pérez-Gil",
+    "ANA RUIZ",
+    "jose  perez gil",
+    None,
+    "Luis García Pérez",
+    "MARÍA PEREZ",
+    "JOSE PEREZ GIL",
+    "Ana Ruiz",
+    "Anabel Rodriguez",
+    "Juana Sanchez",
+    "JOSE PEREZ GIL",
+]
+
+
+def test_fold_name_removes_accents_case_and_punctuation():
+    assert fold_name("José  Pérez-Gil") == "JOSE PEREZ GIL"
+    assert fold_name("o'donnell_smith") == "O DONNELL SMITH"
+    assert fold_name(None) == ""
+    assert fold_name(float("nan")) == ""
+
+
+def test_folded_names_are_one_runner_labelled_with_the_most_common_spelling():
+    index = RunnerIndex.from_names(NAMES)
+    assert len(index) == 6
+    assert index.search("jose") == [("JOSE PEREZ GIL", "JOSE PEREZ GIL")]
+    assert index.search("ruiz ana") == [("ANA RUIZ", "ANA RUIZ")]
+
+
+def test_word_prefixes_come_before_substrings():
+    index = RunnerIndex.from_names(NAMES)
+    assert [key for _, key in index.search("ana")] == ["ANA RUIZ", "ANABEL RODRIGUEZ", "JUANA SANCHEZ"]
+    assert [key for _, key in index.search("perez")] == ["JOSE PEREZ GIL", "LUIS GARCIA PEREZ", "MARIA PEREZ"]
+    assert [key for _, key in index.search("ez")] == []
+    assert [key for _, key in index.search("a", limit=2)] == ["ANA RUIZ", "ANABEL RODRIGUEZ"]
+    assert index.search("  ") == []
+    assert index.search("zzz") == []
+
+
+def test_substring_matches_are_checked_word_by_word():
+    # "ARIA" comparte trigramas con "MARIA PEREZ" y "LUIS GARCIA": solo esta dentro de una palabra en el primero.
+    index = RunnerIndex.from_names(NAMES)
+    assert [key for _, key in index.search("aria")] == ["MARIA PEREZ"]
+    assert [key for _, key in index.search("erez ose")] == ["JOSE PEREZ GIL"]
+
+
+def test_rows_and_row_keys_map_runners_to_frame_positions():
+    index = RunnerIndex.from_names(NAMES)
+    assert index.rows("JOSE PEREZ GIL").tolist() == [0, 2, 6, 10]
+    assert index.rows("ANA RUIZ").tolist() == [1, 7]
+    assert index.rows("NADIE").tolist() == []
+    keys = index.row_keys(len(NAMES))
+    assert keys[3] == ""
+    assert [fold_name(name) for name in NAMES] == keys.tolist()
+
+
+def test_empty_index():
+    index = RunnerIndex.from_names([])
+    assert len(index) == 0
+    assert index.search("ana") == []
+    assert np.array_equal(index.rows("ANA"), [])
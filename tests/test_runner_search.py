@@ -0,0 +1,72 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import sources
+from race_core.loader import name_tokens
+from race_core.runner_index import RunnerIndex
+
+
+RUNNERS = [
+    (1, "PABLO", "BOCELO BELLAS", "M"),
+    (2, "ANA", "PEREZ GIL", "F"),
+    (3, "LUIS", "GARCIA PEREZ", "M"),
+    (4, "MARIA", "PEREZ", "F"),
+    (5, "PEREZ", "OTRO EVENTO", "M"),
+]
+
+
+@pytest.fixture
+def sqlite_queries(monkeypatch):
+    # Las tablas minimas de la busqueda; run_query ejecuta el SQL de MariaDB con los parametros de sqlite.
+    connection = sqlite3.connect(":memory:")
+    connection.executescript(
+        """
+        CREATE TABLE runners (id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, sex TEXT);
+        CREATE TABLE races (id INTEGER PRIMARY KEY, event TEXT, year INTEGER);
+        CREATE TABLE results (id INTEGER PRIMARY KEY, race_id INTEGER, runner_id INTEGER);
+        CREATE TABLE runner_tokens (token TEXT, runner_id INTEGER, PRIMARY KEY (token, runner_id));
+        INSERT INTO races VALUES (1, 'san-silvestre-coruna', 2024), (2, 'coruna-10k', 2024);
+        """
+    )
+    connection.executemany("INSERT INTO runners VALUES (?, ?, ?, ?)", RUNNERS)
+    connection.executemany(
+        "INSERT INTO runner_tokens VALUES (?, ?)",
+        [
+            (token, runner_id)
+            for runner_id, first_name, last_name, _ in RUNNERS
+            for token in name_tokens(first_name, last_name)
+        ],
+    )
+    connection.executemany(
+        "INSERT INTO results (race_id, runner_id) VALUES (?, ?)",
+        [(1, 1), (1, 2), (1, 3), (1, 4), (2, 5)],
+    )
+
+    def run_query(sql, params=None):
+        cursor = connection.execute(sql.replace("%s", "?"), params or ())
+        return pd.DataFrame(cursor.fetchall(), columns=[column[0] for column in cursor.description])
+
+    monkeypatch.setattr(sources, "run_query", run_query)
+    return connection
+
+
+def test_mariadb_search_matches_surnames(sqlite_queries):
+    source = sources.MariaDBSource("san-silvestre-coruna")
+    assert [label for label, _ in source.search_runners("perez")] == ["ANA PEREZ GIL", "LUIS GARCIA PEREZ", "MARIA PEREZ"]
+    assert source.search_runners("garcia luis") == [("LUIS GARCIA PEREZ", ("LUIS", "GARCIA PEREZ"))]
+    assert source.search_runners("bellas") == [("PABLO BOCELO BELLAS", ("PABLO", "BOCELO BELLAS"))]
+    assert source.search_runners("Pérez ma") == [("MARIA PEREZ", ("MARIA", "PEREZ"))]
+    # Solo por prefijo: "rez" no es el principio de ninguna palabra.
+    assert source.search_runners("rez") == []
+    assert source.search_runners("   ") == []
+
+
+def test_frame_search_matches_surnames():
+    names = [f"{first_name} {last_name}" for _, first_name, last_name, _ in RUNNERS[:4]]
+    source = sources.FrameSource(
+        None, None, None, runner_index=RunnerIndex.from_names(names), sketches={}, runner_stats=object(),
+    )
+    assert [label for label, _ in source.search_runners("perez")] == ["ANA PEREZ GIL", "LUIS GARCIA PEREZ", "MARIA PEREZ"]
+    assert [label for label, _ in source.search_runners("bellas")] == ["PABLO BOCELO BELLAS"]
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+
+from race_core.runner_stats import RunnerProfile, RunnerStats
+
+
+def results(year, *rows):
+    """DataFrame derivado de un ano: (nombre, tiempo, genero); el ritmo es el de 10 km."""
+    return pd.DataFrame(
+        {
+            "year": year,
+            "runner_name": [name for name, _, _ in rows],
+            "time_seconds": [float(seconds) for _, seconds, _ in rows],
+            "pace_seconds": [seconds / 10 for _, seconds, _ in rows],
+            "gender": [gender for _, _, gender in rows],
+        }
+    )
+
+
+YEARS = {
+    2022: results(2022, ("Ana Ruiz", 2400, "F"), ("Luis Gil", 2000, "M"), ("José Pérez", 2600, "M")),
+    2023: results(2023, ("ANA RUIZ", 2300, "F"), ("Luis Gil", 2100, "M")),
+    2024: results(2024, ("Ana Ruiz", 2200, "F"), ("Luis Gil", 2200, "M"), ("Luis Gil", 2500, "M"), ("Eva Sanz", 1900, "F")),
+}
+
+
+def test_profile_keeps_sums_when_years_are_added_and_removed():
+    profile = RunnerProfile("ANA RUIZ", "Ana Ruiz")
+    for year, seconds in ((2022, 2400), (2023, 2300), (2024, 2200)):
+        profile.add_result(year, seconds, seconds / 10, 0.5)
+    assert (profile.races, profile.best_seconds, profile.mean_seconds) == (3, 2200, 2300)
+    assert profile.trend_seconds == pytest.approx(-100)
+
+    profile.remove_result(2024)
+    assert (profile.best_seconds, profile.mean_seconds, profile.mean_pace_seconds) == (2300, 2350, 235)
+    profile.add_result(2023, 2500)
+    assert profile.years[2023] == (2500, None, None)
+    assert profile.mean_pace_seconds == 240
+    assert profile.trend_seconds == pytest.approx(100)
+
+    profile.remove_result(2022)
+    assert profile.trend_seconds is None
+
+
+def test_from_frame_counts_each_runner_once_per_year_with_the_best_time():
+    stats = RunnerStats.from_frame(pd.concat(YEARS.values(), ignore_index=True))
+    assert len(stats) == 4
+    luis = stats.profile("LUIS GIL")
+    assert luis.years[2024][0] == 2200
+    assert luis.gender == "M"
+    assert stats.profile("ANA RUIZ").races == 3
+    assert stats.profile("NADIE") is None
+
+
+def test_leaderboard_filters_and_orders_by_metric():
+    stats = RunnerStats.from_frame(pd.concat(YEARS.values(), ignore_index=True))
+    assert stats.leaderboard("best", 2)["runner"].tolist() == ["Eva Sanz", "Luis Gil"]
+    assert stats.leaderboard("mean", 10, min_races=3)["runner"].tolist() == ["Luis Gil", "Ana Ruiz"]
+    assert stats.leaderboard("trend", 10)["runner"].tolist() == ["Ana Ruiz", "Luis Gil"]
+    assert stats.leaderboard("best", 10, gender="F")["runner"].tolist() == ["Eva Sanz", "Ana Ruiz"]
+    assert stats.leaderboard("pace", 10, min_races=4).empty
+
+
+def leaderboards(stats):
+    return {metric: stats.leaderboard(metric, 10) for metric in ("mean", "best", "pace", "trend")}
+
+
+@pytest.mark.parametrize("profiles", [0, 200])
+def test_add_and_remove_year_match_a_full_rebuild(profiles):
+    # Con muchos perfiles ajenos al ano, los rankings se actualizan entrada a entrada.
+    others = [results(2000, *((f"Otro {number}", 5000 + number, "M") for number in range(profiles)))]
+    stats = RunnerStats.from_frame(pd.concat(others + [YEARS[2022], YEARS[2023]], ignore_index=True))
+
+    stats.add_year(2024, YEARS[2024], version="v1")
+    full = RunnerStats.from_frame(pd.concat(others + list(YEARS.values()), ignore_index=True))
+    for metric, leaders in leaderboards(full).items():
+        pd.testing.assert_frame_equal(leaderboards(stats)[metric], leaders)
+    assert stats.year_versions == {2024: "v1"}
+
+    stats.remove_year(2023)
+    without = RunnerStats.from_frame(pd.concat(others + [YEARS[2022], YEARS[2024]], ignore_index=True))
+    for metric, leaders in leaderboards(without).items():
+        pd.testing.assert_frame_equal(leaderboards(stats)[metric], leaders)
+
+
+def test_add_years_loads_everything_and_replaces_changed_years():
+    stats = RunnerStats()
+    stats.add_years((year, year_df, f"v{year}") for year, year_df in YEARS.items())
+    assert stats.year_versions == {2022: "v2022", 2023: "v2023", 2024: "v2024"}
+    pd.testing.assert_frame_equal(
+        stats.leaderboard("mean", 10), RunnerStats.from_frame(pd.concat(YEARS.values())).leaderboard("mean", 10)
+    )
+
+    stats.add_years([(2022, results(2022, ("Eva Sanz", 1800, "F")), "v2022b")])
+    assert stats.year_versions[2022] == "v2022b"
+    assert stats.profile("JOSE PEREZ") is None
+    assert stats.profile("EVA SANZ").best_seconds == 1800
+    assert stats.leaderboard("best", 1)["runner"].tolist() == ["Eva Sanz"]
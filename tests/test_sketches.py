@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from race_core.rollups import ALL, HISTOGRAM_COLUMNS, frame_rollups
+from race_core.sketches import TimeSketch, build_sketches
+
+
+def test_rank_fraction_interpolates_inside_the_bin():
+    sketch = TimeSketch([1200, 1260, 1320], [2, 4, 2])
+    assert sketch.total == 8
+    assert sketch.rank_fraction(1100) == 0.0
+    assert sketch.rank_fraction(1200) == 0.0
+    assert sketch.rank_fraction(1260) == pytest.approx(2 / 8)
+    assert sketch.rank_fraction(1290) == pytest.approx(4 / 8)
+    assert sketch.rank_fraction(5000) == 1.0
+
+
+def test_quantile_is_the_inverse_of_rank_fraction():
+    sketch = TimeSketch([1200, 1260, 1320], [2, 4, 2])
+    assert sketch.quantile(0.5) == pytest.approx(1290)
+    assert sketch.quantile(0.0) == 1200
+    assert sketch.quantile(1.0) == pytest.approx(1380)
+    for seconds in (1215, 1290, 1350):
+        assert sketch.quantile(sketch.rank_fraction(seconds)) == pytest.approx(seconds)
+
+
+def test_empty_sketch_has_no_percentiles():
+    sketch = TimeSketch([], [])
+    assert len(sketch) == 0
+    assert sketch.rank_fraction(1200) is None
+    assert sketch.quantile(0.5) is None
+
+
+def test_from_bins_sorts_the_rows():
+    bins = pd.DataFrame({"bin_start_seconds": [1320, 1200, 1260], "bin_count": [2, 2, 4]})
+    sketch = TimeSketch.from_bins(bins)
+    assert sketch.bin_starts == [1200, 1260, 1320]
+    assert sketch.cumulative == [2, 6, 8]
+
+
+def test_build_sketches_has_one_sketch_per_group_of_the_histogram():
+    df = pd.DataFrame(
+        {
+            "year": [2024] * 4,
+            "gender": ["M", "M", "F", None],
+            "age_group": ["Senior 20-34"] * 4,
+            "time_seconds": [1210.0, 1290.0, 1500.0, 1800.0],
+        }
+    )
+    _, histogram = frame_rollups(df)
+    sketches = build_sketches(histogram[HISTOGRAM_COLUMNS].sample(frac=1, random_state=1))
+    assert sketches[(2024, ALL, ALL)].total == 4
+    assert sketches[(2024, "M", ALL)].bin_starts == [1200, 1260]
+    assert sketches[(2024, "M", "Senior 20-34")].total == 2
+    assert (2024, None, ALL) not in sketches